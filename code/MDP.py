@@ -3,16 +3,16 @@
 
 from __future__ import annotations  # necessary for typing hint references to class not completely defined yet
 # __future__ does not work with Python3.7<
-from typing import List, Tuple, Optional
+from typing import List, Sequence, Tuple, Optional
 from dataclasses import dataclass
 
 
 class State:
-    pass
+    __slots__ = () # lets subclasses define compact states with __slots__
 
 
 class Action:
-    pass
+    __slots__ = ()
 
 
 @dataclass
@@ -54,6 +54,32 @@ class MDP:
     def initial_state(self) -> State:
         pass
 
+    '''
+      Read-only views: same results as states(), applicable_actions() and next_states(),
+      except that the result may be shared (e.g., cached by the MDP) and must not be modified.
+      MDPs that copy their data to protect it (e.g., SMMDP) return it directly here,
+      so solvers should prefer these methods when they only read the result.
+      By default, they call the methods above.
+    '''
+
+    def states_view(self) -> Sequence[State]:
+        return self.states()
+
+    def applicable_actions_view(self, s: State) -> Sequence[Action]:
+        return self.applicable_actions(s)
+
+    def next_states_view(self, s: State, a: Action) -> Sequence[ActionOutcome]:
+        return self.next_states(s, a)
+
+    def compile(self) -> Optional[MDP]:
+        '''
+          Returns a compiled version of this MDP (cf. CompiledMDP in file compiled.py),
+          or None if this MDP should not be compiled,
+          e.g., because its transitions are computed on the fly and may change.
+          Solvers use the compiled version when it is available.
+        '''
+        return None
+
 
 class Policy:
     '''
@@ -79,6 +105,12 @@ class ExplicitPolicy(Policy):
     def set_action(self, s: State, a: Action):
         self._explicit_decision[s] = a
 
+    def unset_action(self, s: State):
+        '''
+          Forgets the decision of the state, which gets the default action again.
+        '''
+        self._explicit_decision.pop(s, None)
+
     def action(self, s: State):
         if not s in self._explicit_decision:
             self.set_action(s, next(
@@ -0,0 +1,50 @@
+import unittest
+
+class Test(unittest.TestCase):
+
+    def test(self):
+        from example1 import example_1
+        from algos import compute_v_of_policy, policy_iteration, value_iteration
+
+        smmdp = example_1()
+        pol, vivalue = value_iteration(mdp=smmdp, gamma=.99, epsilon=.0001)
+
+        bellman = compute_v_of_policy(smmdp, pol, gamma=.99, stopping_threshold=.0001)
+        direct = compute_v_of_policy(smmdp, pol, gamma=.99, stopping_threshold=.0001, method='direct')
+        gmres = compute_v_of_policy(smmdp, pol, gamma=.99, stopping_threshold=.0001, method='gmres')
+        for state in smmdp.states():
+            self.assertAlmostEqual(bellman.value(state), direct.value(state), delta=.01)
+            self.assertAlmostEqual(gmres.value(state), direct.value(state), delta=.0001)
+
+        # a policy that selects an action that is not applicable is an error, not a value of 0
+        from MDP import ExplicitPolicy
+        wrong = ExplicitPolicy(smmdp)
+        wrong.set_action(smmdp.states()[0], smmdp.get_action('not applicable'))
+        with self.assertRaises(ValueError):
+            compute_v_of_policy(smmdp, wrong, gamma=.99, stopping_threshold=.0001, method='direct')
+
+        pipol = policy_iteration(smmdp, gamma=.99, epsilon=.0001, stopping_threshold=.0001, evaluation='direct')
+        for state in smmdp.states():
+            self.assertEqual(pipol.action(state), pol.action(state))
+
+    def test_uncompiled(self):
+        from example2 import example_2
+        from algos import compute_v_of_policy
+        from MDP import ExplicitPolicy
+
+        mdp = example_2()
+        self.assertIsNone(mdp.compile())
+        pol = ExplicitPolicy(mdp)
+        bellman = compute_v_of_policy(mdp, pol, gamma=.9, stopping_threshold=.0001)
+        direct = compute_v_of_policy(mdp, pol, gamma=.9, stopping_threshold=.0001, method='direct')
+        for state in mdp.states():
+            self.assertAlmostEqual(bellman.value(state), direct.value(state), delta=.001)
+
+def main():
+    unittest.main()
+
+if __name__ == "__main__":
+    main()
+  
+
+# eof
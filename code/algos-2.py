@@ -0,0 +1,44 @@
+import unittest
+
+class Test(unittest.TestCase):
+
+    def test(self):
+        from dungeon import basic_map, DungeonMDP
+        import algos
+        from algos import in_place_value_iteration, value_iteration
+
+        mdp = DungeonMDP(basic_map())
+        algos.NB_BACKUPS = 0
+        _, vivalue = value_iteration(mdp, gamma=.99, epsilon=.001)
+        nb_sweeps_vi = algos.NB_BACKUPS
+
+        for ordering in [ None, 'bfs', 'reverse-bfs', 'reverse-topological' ]:
+            algos.NB_BACKUPS = 0
+            pol, value = in_place_value_iteration(mdp, gamma=.99, epsilon=.001, ordering=ordering)
+            self.assertLessEqual(algos.NB_BACKUPS, nb_sweeps_vi)
+            for state in mdp.states():
+                self.assertAlmostEqual(value.value(state), vivalue.value(state), delta=.1)
+
+        pol, value = in_place_value_iteration(mdp, gamma=.99, epsilon=.001, randomize=True, seed=0)
+        for state in mdp.states():
+            self.assertAlmostEqual(value.value(state), vivalue.value(state), delta=.1)
+
+    def test_uncompiled(self):
+        from example2 import example_2
+        from algos import in_place_value_iteration, value_iteration
+
+        mdp = example_2()
+        _, vivalue = value_iteration(mdp, gamma=.9, epsilon=.0001)
+        for ordering in [ None, 'reverse-bfs', 'reverse-topological' ]:
+            _, value = in_place_value_iteration(mdp, gamma=.9, epsilon=.0001, ordering=ordering)
+            for state in mdp.states():
+                self.assertAlmostEqual(value.value(state), vivalue.value(state), delta=.01)
+
+def main():
+    unittest.main()
+
+if __name__ == "__main__":
+    main()
+  
+
+# eof
@@ -0,0 +1,41 @@
+import unittest
+
+class Test(unittest.TestCase):
+
+    def test(self):
+        from dungeon import basic_map, DungeonMDP
+        from algos import prioritized_sweeping, value_iteration, compute_q_from_v, is_policy_nearly_greedy
+
+        mdp = DungeonMDP(basic_map())
+        _, vivalue = value_iteration(mdp, gamma=.99, epsilon=.001)
+        pol, value = prioritized_sweeping(mdp, gamma=.99, epsilon=.001)
+        for state in mdp.states():
+            self.assertAlmostEqual(value.value(state), vivalue.value(state), delta=.2)
+        self.assertTrue(is_policy_nearly_greedy(mdp, pol, .01, compute_q_from_v(mdp, value, .99)))
+
+    def test_example(self):
+        from example2 import example_2
+        from algos import prioritized_sweeping, value_iteration, transition_table, predecessors
+
+        mdp = example_2()
+        preds = predecessors(transition_table(mdp))
+        self.assertEqual(preds[0], {0,1})
+        self.assertEqual(preds[3], {2,3})
+
+        _, vivalue = value_iteration(mdp, gamma=.9, epsilon=.0001)
+        _, value = prioritized_sweeping(mdp, gamma=.9, epsilon=.0001)
+        for state in mdp.states():
+            self.assertAlmostEqual(value.value(state), vivalue.value(state), delta=.01)
+
+        # a bounded number of backups
+        _, value = prioritized_sweeping(mdp, gamma=.9, epsilon=.0001, max_backups=1)
+        self.assertEqual(len([ s for s in mdp.states() if value.value(s) != 0 ]), 1)
+
+def main():
+    unittest.main()
+
+if __name__ == "__main__":
+    main()
+  
+
+# eof
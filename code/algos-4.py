@@ -0,0 +1,47 @@
+import unittest
+
+class Test(unittest.TestCase):
+
+    def test(self):
+        from dungeon import basic_map, DungeonMDP
+        from algos import modified_policy_iteration, policy_iteration, value_iteration
+
+        mdp = DungeonMDP(basic_map())
+        _, vivalue = value_iteration(mdp, gamma=.99, epsilon=.001)
+        for max_sweeps in [ 1, 5, 50 ]:
+            pol, value = modified_policy_iteration(mdp, gamma=.99, epsilon=.001, stopping_threshold=.0001, max_sweeps=max_sweeps)
+            for state in mdp.states():
+                self.assertAlmostEqual(value.value(state), vivalue.value(state), delta=.2)
+
+    def test_example(self):
+        from example1 import example_1
+        from algos import modified_policy_iteration, policy_iteration
+
+        smmdp = example_1()
+        pipol = policy_iteration(smmdp, gamma=.9, epsilon=.0001, stopping_threshold=.0001)
+        pol, _ = modified_policy_iteration(smmdp, gamma=.9, epsilon=.0001, stopping_threshold=.0001, max_sweeps=3)
+        for state in smmdp.states():
+            self.assertEqual(pol.action(state), pipol.action(state))
+
+    def test_terminal(self):
+        from MDP import ExplicitPolicy
+        from statemachine import SMMDP, SMTransition
+        from algos import modified_policy_iteration
+
+        # the goal has no applicable action
+        mdp = SMMDP([ SMTransition('start', 'go', [ ('goal', 1., 10.) ]),
+                      SMTransition('start', 'stay', [ ('start', 1., 0.) ]) ], 'start')
+        pol, value = modified_policy_iteration(mdp, gamma=.9, epsilon=.0001, stopping_threshold=.0001,
+            starting_pi=ExplicitPolicy(mdp))
+        self.assertIs(pol.action(mdp.initial_state()), mdp.get_action('go'))
+        self.assertAlmostEqual(value.value(mdp.initial_state()), 10.)
+        self.assertEqual(value.value(mdp.get_state('goal')), 0)
+
+def main():
+    unittest.main()
+
+if __name__ == "__main__":
+    main()
+  
+
+# eof
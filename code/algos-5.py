@@ -0,0 +1,57 @@
+import unittest
+
+class Test(unittest.TestCase):
+
+    def test(self):
+        import numpy
+        from example1 import example_1
+        from algos import ArrayActionValueFunction, ArrayStateValueFunction, compute_q_from_v, value_iteration
+        from statemachine import SMState
+
+        smmdp = example_1()
+        model = smmdp.compile()
+        s0 = smmdp.get_state('0')
+        hunt = smmdp.get_action('hunt')
+
+        v = ArrayStateValueFunction(model)
+        self.assertEqual(v.value(s0), 0)
+        v.set_value(s0, 3.5)
+        self.assertEqual(v.value(s0), 3.5)
+        self.assertEqual(v.values_[model.state_index(s0)], 3.5)
+        unknown = SMState('unknown')
+        self.assertEqual(v.value(unknown), 0) # unknown states have value 0
+        v.set_value(unknown, 1) # and are stored on the side
+        self.assertEqual(v.value(unknown), 1)
+
+        v32 = ArrayStateValueFunction(model, dtype=numpy.float32)
+        self.assertEqual(v32.values_.dtype, numpy.float32)
+
+        q = ArrayActionValueFunction(model)
+        q.set_value(s0, hunt, 2)
+        self.assertEqual(q.value(s0, hunt), 2)
+        self.assertEqual(q.value(s0, smmdp.get_action('nohunt')), 0)
+        fish = smmdp.get_action('fish')
+        self.assertEqual(q.value(s0, fish), 0)
+        q.set_value(s0, fish, 1)
+        self.assertEqual(q.value(s0, fish), 1)
+        states, actions, rs = model.states(), model.actions(), model.row_states()
+        for k in range(model.nb_rows()):
+            self.assertEqual(model.pair_row(states[rs[k]], actions[model.action_ids_[k]]), k)
+
+        # the solvers return array-backed value functions on compiled MDPs
+        _, value = value_iteration(smmdp, gamma=.9, epsilon=.01)
+        self.assertIsInstance(value, ArrayStateValueFunction)
+        qvalue = compute_q_from_v(smmdp, value, .9)
+        self.assertIsInstance(qvalue, ArrayActionValueFunction)
+        for state in smmdp.states():
+            self.assertAlmostEqual(max([ qvalue.value(state, a) for a in smmdp.applicable_actions(state) ]),
+                value.value(state), delta=.01)
+
+def main():
+    unittest.main()
+
+if __name__ == "__main__":
+    main()
+  
+
+# eof
@@ -0,0 +1,95 @@
+import unittest
+
+class Test(unittest.TestCase):
+
+    def check(self, mdp, pol, value, gamma, epsilon):
+        from algos import value_iteration
+        _, vivalue = value_iteration(mdp, gamma=gamma, epsilon=epsilon)
+        for s in mdp.states():
+            self.assertAlmostEqual(value.value(s), vivalue.value(s), delta=.01)
+            if mdp.applicable_actions(s):
+                self.assertIn(pol.action(s), mdp.applicable_actions(s))
+
+    def test_edits(self):
+        from algos import resolve, value_iteration
+        from benchmark.generators import chain_smmdp
+        from statemachine import SMTransition
+
+        gamma, epsilon = .9, .00001
+        mdp = chain_smmdp(20, 10)
+        pol, value = value_iteration(mdp, gamma=gamma, epsilon=epsilon)
+        model = mdp.compile()
+
+        # an edit in the first component only changes the values of this component
+        mdp.set_reward('c0_s3', 'stay', 'c0_s4', 50.)
+        self.assertEqual(mdp.dirty_states(), { mdp.get_state('c0_s3') })
+        self.assertIsNot(mdp.compile(), model)
+        backed_up = set()
+        def predecessors(s):
+            backed_up.add(s)
+            return mdp.predecessors(s)
+        pol, value = resolve(mdp, gamma, epsilon, pol, value, predecessors=predecessors)
+        self.assertEqual(mdp.dirty_states(), set())
+        self.assertTrue(all([ repr(s).startswith('c0_') for s in backed_up ]))
+        self.check(mdp, pol, value, gamma, epsilon)
+
+        # new transitions and states, removed transitions
+        mdp.set_transition(SMTransition('c5_s0', 'jump', [ ('c19_s0', .5, 1.), ('new', .5, 100.) ]))
+        mdp.set_transition(SMTransition('new', 'stay', [ ('new', 1., 0.) ]))
+        mdp.remove_transition('c7_s2', 'next')
+        mdp.set_transition(SMTransition('c3_s1', 'stay', [ ('c3_s2', 1., 3.) ]))
+        self.assertEqual({ repr(s) for s in mdp.predecessors(mdp.get_state('new')) }, { 'c5_s0', 'new' })
+        self.assertEqual(mdp.applicable_actions_view(mdp.get_state('c7_s2')), (mdp.get_action('stay'),))
+        pol, value = resolve(mdp, gamma, epsilon, pol, value)
+        self.check(mdp, pol, value, gamma, epsilon)
+        self.assertIs(pol.action(mdp.get_state('c5_s0')), mdp.get_action('jump'))
+
+        with self.assertRaises(KeyError):
+            mdp.remove_transition('c7_s2', 'next')
+        with self.assertRaises(KeyError):
+            mdp.set_reward('c0_s0', 'stay', 'c9_s9', 1.)
+
+        # the states stay dirty if the repair is interrupted
+        mdp.set_reward('c2_s3', 'stay', 'c2_s4', 50.)
+        def failing(s):
+            raise RuntimeError('interrupted')
+        with self.assertRaises(RuntimeError):
+            resolve(mdp, gamma, epsilon, pol, value, predecessors=failing)
+        self.assertEqual(mdp.dirty_states(), { mdp.get_state('c2_s3') })
+
+    def test_unset_action(self):
+        from MDP import ExplicitPolicy
+        from example1 import example_1
+
+        mdp = example_1()
+        pol = ExplicitPolicy(mdp)
+        s = mdp.initial_state()
+        default = pol.action(s)
+        other = [ a for a in mdp.applicable_actions(s) if a is not default ][0]
+        pol.set_action(s, other)
+        self.assertIs(pol.action(s), other)
+        pol.unset_action(s)
+        self.assertIs(pol.action(s), default)
+        pol.unset_action(s)
+
+    def test_predecessors(self):
+        from algos import predecessors, transition_table
+        from benchmark.generators import random_smmdp
+        from statemachine import SMTransition
+
+        mdp = random_smmdp(30, 3, 4)
+        mdp.predecessors(mdp.initial_state()) # computes the index before the edits
+        mdp.set_transition(SMTransition('3', 'a0', [ ('7', 1., 0.) ]))
+        mdp.remove_transition('4', 'a1')
+        expected = predecessors(transition_table(mdp))
+        for s in mdp.states():
+            self.assertEqual(set(mdp.predecessors(s)), expected[s])
+
+def main():
+    unittest.main()
+
+if __name__ == "__main__":
+    main()
+  
+
+# eof
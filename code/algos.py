@@ -8,11 +8,18 @@
 '''
 from __future__ import annotations # necessary for typing hint references to class not completely defined yet
 # __future__ does not work with Python3.7<
-from typing import Tuple, Optional
+from typing import Callable, Dict, Iterable, List, Set, Tuple, Optional, Union
 
-from random import random
+from heapq import heappop, heappush
+from random import random, Random
+
+import numpy
 
 from MDP import Action, ActionOutcome, MDP, State, Policy, ExplicitPolicy, History
+from compiled import CompiledMDP, compile_mdp, compute_q_from_v_arrays, compute_v_of_rows_linear, in_place_value_iteration_arrays, policy_rows, \
+    value_iteration_arrays
+from connectedcomp import compute_connected_components
+from instrumentation import SolverStats
 
 class StateValueFunction:
     '''
@@ -21,7 +28,7 @@ class StateValueFunction:
     def __init__(self, mdp: Optional[MDP] = None, value_function: Optional[StateValueFunction] = None):
         self._explicit_value = {}
         if (not mdp is None) and (not value_function is None):
-            for state in mdp.states():
+            for state in mdp.states_view():
                 self._explicit_value[state] = value_function.value(state)
 
     def set_value(self, s: State, v: float): 
@@ -32,6 +39,30 @@ class StateValueFunction:
             self.set_value(s,0)
         return self._explicit_value[s]
 
+class ArrayStateValueFunction(StateValueFunction):
+    '''
+      A value function stored in a contiguous array (values_), one value per state of a compiled MDP.
+      The compiled MDP is the index shared by all the value functions of this MDP.
+      value() and set_value() are kept for compatibility; solvers should work on the array directly.
+      States unknown to the compiled MDP are stored in the dictionary of StateValueFunction.
+    '''
+    def __init__(self, model: CompiledMDP, values: Optional[numpy.ndarray] = None, dtype = numpy.float64):
+        super().__init__()
+        self._model = model
+        self.values_: numpy.ndarray = numpy.zeros(model.nb_states(), dtype=dtype) if values is None \
+            else numpy.asarray(values, dtype=dtype)
+
+    def set_value(self, s: State, v: float):
+        i = self._model.state_indices().get(s)
+        if i is None:
+            super().set_value(s, v)
+        else:
+            self.values_[i] = v
+
+    def value(self, s: State) -> float:
+        i = self._model.state_indices().get(s)
+        return super().value(s) if i is None else float(self.values_[i])
+
 def state_value_difference(mdp: MDP, v1: StateValueFunction, v2: StateValueFunction) -> float:
     '''
       Returns the absolute max difference between the two specified state value functions.  
@@ -44,7 +75,7 @@ def state_value_difference(mdp: MDP, v1: StateValueFunction, v2: StateValueFunct
       this can be unnecessarily expensive; 
       in practice, we would send the threshold as a parameter and stop as soon as the threshold is reached.
     '''
-    return max([ abs(v1.value(s) - v2.value(s)) for s in mdp.states() ])
+    return max([ abs(v1.value(s) - v2.value(s)) for s in mdp.states_view() ])
 
 class ActionValueFunction:
     '''
@@ -61,6 +92,37 @@ class ActionValueFunction:
             self.set_value(s,a,0)
         return self._explicit_value[s,a]
 
+class ArrayActionValueFunction(ActionValueFunction):
+    '''
+      An action value function stored in a contiguous array (values_), 
+      one value per (state,action) row of a compiled MDP.
+      Pairs unknown to the compiled MDP are stored in the dictionary of ActionValueFunction.
+    '''
+    def __init__(self, model: CompiledMDP, values: Optional[numpy.ndarray] = None, dtype = numpy.float64):
+        super().__init__()
+        self._model = model
+        self.values_: numpy.ndarray = numpy.zeros(model.nb_rows(), dtype=dtype) if values is None \
+            else numpy.asarray(values, dtype=dtype)
+
+    def set_value(self, s: State, a: Action, v: float):
+        k = self._model.pair_row(s, a)
+        if k < 0:
+            super().set_value(s, a, v)
+        else:
+            self.values_[k] = v
+
+    def value(self, s: State, a: Action) -> float:
+        k = self._model.pair_row(s, a)
+        return super().value(s, a) if k < 0 else float(self.values_[k])
+
+def state_values_array(model: CompiledMDP, v: StateValueFunction) -> numpy.ndarray:
+    '''
+      Returns the values of the specified value function as an array indexed by the states of the compiled MDP.
+    '''
+    if isinstance(v, ArrayStateValueFunction) and v._model is model:
+        return v.values_
+    return numpy.array([ v.value(s) for s in model.states() ])
+
 def simulate_one_step(mdp: MDP, state: State, act: Action) -> Tuple[State,float]:
     '''
       Simulates the execution of one action.  
@@ -68,7 +130,7 @@ def simulate_one_step(mdp: MDP, state: State, act: Action) -> Tuple[State,float]
       The result of this method is the new state and the reward associated with the transition.
     '''
     r = random()
-    for outcome in mdp.next_states(state, act):
+    for outcome in mdp.next_states_view(state, act):
         r -= outcome.prob
         if r <= 0:
             return outcome.state, outcome.reward
@@ -95,7 +157,7 @@ def greedy_action(mdp: MDP, q: ActionValueFunction, s: State) -> Tuple[Action,fl
     '''
     best_action = None
     best_val = None
-    for a in mdp.applicable_actions(s):
+    for a in mdp.applicable_actions_view(s):
         val = q.value(s,a)
         if best_val == None or best_val < val:
             best_action = a
@@ -109,7 +171,7 @@ def greedy_policy(mdp: MDP, q: ActionValueFunction) -> Tuple[Policy,StateValueFu
     '''
     result_pol = ExplicitPolicy(mdp)
     result_val = StateValueFunction()
-    for s in mdp.states():
+    for s in mdp.states_view():
         action, val = greedy_action(mdp, q, s)
         result_pol.set_action(s, action)
         result_val.set_value(s, val)
@@ -123,7 +185,7 @@ def one_step_lookahead(mdp: MDP, v: StateValueFunction, gamma: float, s: State,
       and adding their expected outcomes.
     '''
     value = 0
-    for outcome in mdp.next_states(s,a):
+    for outcome in mdp.next_states_view(s,a):
         value += outcome.prob * (outcome.reward + (gamma * v.value(outcome.state)))
     return value
 
@@ -131,9 +193,12 @@ def compute_q_from_v(mdp: MDP, v: StateValueFunction, gamma: float) -> ActionVal
     '''
       Computes the action value function as a one-step lookahead value of the specified state value function.
     '''
+    model = mdp.compile()
+    if model is not None:
+        return ArrayActionValueFunction(model, compute_q_from_v_arrays(model, state_values_array(model, v), gamma))
     result = ActionValueFunction()
-    for s in mdp.states():
-        for a in mdp.applicable_actions(s):
+    for s in mdp.states_view():
+        for a in mdp.applicable_actions_view(s):
             result.set_value(s,a,one_step_lookahead(mdp, v, gamma, s, a))
     return result
 
@@ -143,7 +208,7 @@ def compute_v_from_q_and_policy(mdp: MDP, pol: Policy, q: ActionValueFunction) -
       for the given policy.
     '''
     result = StateValueFunction()
-    for s in mdp.states():
+    for s in mdp.states_view():
         result.set_value(s, q.value(s,pol.action(s)))
     return result
 
@@ -163,29 +228,66 @@ def compute_v_of_policy(mdp: MDP, \
     pol: Policy, \
     gamma: float, \
     stopping_threshold: float, \
-    starting_value: Optional[StateValueFunction] = None) -> StateValueFunction:
+    starting_value: Optional[StateValueFunction] = None, \
+    method: str = 'bellman', \
+    stats: Optional[SolverStats] = None) -> StateValueFunction:
     '''
       Computes iteratively the value of each state for the specified policy with the specified discount factor gamma.
       The algorithm iteratively performs a backup until the backup change is below the specified stopping threshold.
       The user can specify a starting state value function; starting with a good value function can decrease the number of required iterations.
-      (The result could also be computed as a system of linear equations.)
+      The result can also be computed as a system of linear equations (I - gamma P) v = r, 
+      which is much faster when gamma is close to 1:
+      * method 'bellman' iterates the backups (default);
+      * method 'direct' solves the system with a sparse LU factorisation;
+      * method 'gmres' solves the system iteratively, with a residual below stopping_threshold * (1-gamma).
+      If stats is specified, each iteration is recorded in it (cf. instrumentation.py).
     '''
+    if stats is not None:
+        mdp = stats.wrap(mdp)
+        stats.start()
+    if method != 'bellman':
+        result = compute_v_of_policy_linear(mdp, pol, gamma, stopping_threshold, starting_value, method)
+        if stats is not None:
+            stats.record_iteration('compute_v_of_policy', None, result)
+        return result
+
     current_svalue: StateValueFunction = StateValueFunction() if starting_value == None else starting_value
     while True: # could bound the number of iterations
         qvalue = compute_q_from_v(mdp, current_svalue, gamma)
         new_svalue = compute_v_from_q_and_policy(mdp, pol, qvalue)
         diff = state_value_difference(mdp, current_svalue, new_svalue)
+        if stats is not None:
+            stats.record_iteration('compute_v_of_policy', diff, new_svalue)
         if diff < stopping_threshold:
             return new_svalue
         current_svalue = new_svalue
 
+def compute_v_of_policy_linear(mdp: MDP, pol: Policy, gamma: float, stopping_threshold: float,
+    starting_value: Optional[StateValueFunction], solver: str) -> StateValueFunction:
+    '''
+      Computes the value of the policy by solving a system of linear equations (cf. compute_v_of_policy).
+      If the MDP cannot be compiled, only the actions selected by the policy are compiled.
+    '''
+    model = mdp.compile()
+    if model is None:
+        model = compile_mdp(mdp, pol)
+        rows = model.state_ptr_[:-1].copy()
+        rows[numpy.diff(model.state_ptr_) == 0] = -1
+    else:
+        rows = policy_rows(model, pol)
+    x0 = None
+    if starting_value is not None:
+        x0 = numpy.array([ starting_value.value(s) for s in model.states() ])
+    v = compute_v_of_rows_linear(model, rows, gamma, solver, stopping_threshold * (1 - gamma), x0)
+    return value_from_array(model, v)
+
 def is_policy_nearly_greedy(mdp: MDP, pol: Policy, epsilon: float, q: ActionValueFunction):
     '''
       Indicates whether the specified policy is nearly greedy for the action value function, 
       i.e., whether the action it selects in each state has a value 
       that is at most epsilon away from the value of the state with maximal value.
     '''
-    for s in mdp.states():
+    for s in mdp.states_view():
         a = pol.action(s)
         avalue = q.value(s,a)
         _, greedy_avalue = greedy_action(mdp, q, s)
@@ -193,30 +295,380 @@ def is_policy_nearly_greedy(mdp: MDP, pol: Policy, epsilon: float, q: ActionValu
             return False
     return True
 
-def policy_iteration(mdp: MDP, gamma: float, epsilon: float, stopping_threshold: float, starting_pi: Optional[Policy] = None) -> Policy:
+def policy_iteration(mdp: MDP, gamma: float, epsilon: float, stopping_threshold: float, starting_pi: Optional[Policy] = None,
+    evaluation: str = 'bellman', stats: Optional[SolverStats] = None) -> Policy:
     '''
       Performs the policy iteration algorithm.
       epsilon is used to determine when a policy is nearly optimal (cf. subroutine is_policy_nearly_greedy).
       stopping_threshold is used to determine when the value of a policy is precise enough (cf. policy compute_v_of_policy).
+      evaluation is the method used to compute the value of a policy (cf. compute_v_of_policy).
+      If stats is specified, the evaluation iterations and the improvement steps are recorded in it;
+      the residual of an improvement step is the change of value of the greedy backup.
     '''
+    if stats is not None:
+        mdp = stats.wrap(mdp)
     pol = ExplicitPolicy(mdp) if starting_pi == None else starting_pi 
+    vs = None
     while True:
-        vs = compute_v_of_policy(mdp, pol, gamma, stopping_threshold)
+        # the new policy differs from the previous one in a few states: its value is a good starting point
+        vs = compute_v_of_policy(mdp, pol, gamma, stopping_threshold, starting_value=vs, method=evaluation, stats=stats)
         qs = compute_q_from_v(mdp, vs, gamma)
-        if is_policy_nearly_greedy(mdp, pol, epsilon, qs):
+        nearly_greedy = is_policy_nearly_greedy(mdp, pol, epsilon, qs)
+        if stats is not None:
+            _, greedy_vs = greedy_policy(mdp, qs)
+            stats.record_iteration('policy_iteration', state_value_difference(mdp, vs, greedy_vs), vs)
+        if nearly_greedy:
             return pol
         pol, vs = greedy_policy(mdp, qs)
 
-def value_iteration(mdp: MDP, gamma: float, epsilon: float) -> Tuple[Policy, StateValueFunction]:
+def policy_from_rows(model: CompiledMDP, rows, mdp: Optional[MDP] = None) -> ExplicitPolicy:
+    '''
+      Converts the rows selected in each state of a compiled MDP into a policy.
+      The policy defaults to the first applicable action of the specified MDP (by default the compiled MDP).
+    '''
+    result = ExplicitPolicy(model if mdp is None else mdp)
+    for i, s in enumerate(model.states()):
+        if rows[i] >= 0:
+            result.set_action(s, model.actions()[model.action_ids_[rows[i]]])
+    return result
+
+def value_from_array(model: CompiledMDP, v: numpy.ndarray) -> StateValueFunction:
+    '''
+      Converts an array of values, one per state of a compiled MDP, into a state value function.
+    '''
+    return ArrayStateValueFunction(model, v)
+
+def value_iteration(mdp: MDP, gamma: float, epsilon: float,
+    stats: Optional[SolverStats] = None) -> Tuple[Policy, StateValueFunction]:
     '''
       Performs the value iteration algorithm.
+      If the MDP can be compiled (cf. MDP.compile), the backups are performed on arrays.
+      If stats is specified, each iteration is recorded in it (cf. instrumentation.py).
     '''
+    global NB_BACKUPS
+    if stats is not None:
+        mdp = stats.wrap(mdp)
+        stats.start()
+    model = mdp.compile()
+    if model is not None:
+        callback = None if stats is None else \
+            lambda diff, v: stats.record_iteration('value_iteration', diff, v)
+        v, rows, nb_backups = value_iteration_arrays(model, gamma, epsilon, callback=callback)
+        NB_BACKUPS += nb_backups
+        return policy_from_rows(model, rows, mdp), value_from_array(model, v)
+
     vs = StateValueFunction()
     while True:
         pol, newvs = bellman_backup(mdp, vs, gamma)
         diff = state_value_difference(mdp, vs, newvs)
+        if stats is not None:
+            stats.record_iteration('value_iteration', diff, newvs)
         if diff < epsilon:
             return pol, newvs
         vs = newvs
 
-# eof
\ No newline at end of file
+def state_ordering(mdp: MDP, ordering: Union[None,str,List[State]] = None) -> List[State]:
+    '''
+      Computes the order in which the states are backed up by in_place_value_iteration:
+      * None: the order of mdp.states();
+      * 'bfs': breadth-first from the initial state;
+      * 'reverse-bfs': the reverse of 'bfs', the states far from the initial state first;
+      * 'reverse-topological': the strongly connected components that cannot be left first, 
+        so that the values flow backwards along chain-like MDPs;
+      * a list of states, used as is.
+      For the bfs orderings, the states that are not reachable from the initial state are added at the end.
+    '''
+    if ordering is None:
+        return list(mdp.states_view())
+    if isinstance(ordering, list):
+        return ordering
+    if ordering == 'bfs' or ordering == 'reverse-bfs':
+        result = [ mdp.initial_state() ]
+        known = { mdp.initial_state() }
+        i = 0
+        while i < len(result):
+            state = result[i]
+            i += 1
+            for act in mdp.applicable_actions_view(state):
+                for outcome in mdp.next_states_view(state, act):
+                    if not outcome.state in known:
+                        known.add(outcome.state)
+                        result.append(outcome.state)
+        result.extend([ s for s in mdp.states_view() if not s in known ])
+        return result if ordering == 'bfs' else result[::-1]
+    if ordering == 'reverse-topological':
+        # post-order on the graph of the components: children (downstream components) come first
+        result = []
+        done = set()
+        for root in compute_connected_components(mdp).roots():
+            stack = [ (root, iter(root.children())) ]
+            done.add(root)
+            while stack:
+                cc, children = stack[-1]
+                child = next(children, None)
+                if child is None:
+                    stack.pop()
+                    result.extend(cc.states())
+                elif not child in done:
+                    done.add(child)
+                    stack.append((child, iter(child.children())))
+        return result
+    raise ValueError(f'Unknown ordering {ordering}')
+
+def in_place_value_iteration(mdp: MDP, gamma: float, epsilon: float,
+    ordering: Union[None,str,List[State]] = None,
+    randomize: bool = False, seed: Optional[int] = None) -> Tuple[Policy, StateValueFunction]:
+    '''
+      Performs the value iteration algorithm in place (Gauss-Seidel style):
+      a single state value function is updated state by state, 
+      so that a backup immediately benefits from the backups performed before it in the same sweep.
+      The states are backed up in the order given by state_ordering(mdp, ordering).
+      If randomize is True, the order is shuffled before each sweep (asynchronous value iteration).
+      The algorithm stops when no value changed by more than epsilon during a sweep.
+    '''
+    global NB_BACKUPS
+    order = list(state_ordering(mdp, ordering))
+    rng = Random(seed) if randomize else None
+    model = mdp.compile()
+    if model is not None:
+        v, rows, nb_sweeps = in_place_value_iteration_arrays(model, gamma, epsilon,
+            [ model.state_index(s) for s in order ], rng)
+        NB_BACKUPS += nb_sweeps
+        return policy_from_rows(model, rows, mdp), value_from_array(model, v)
+
+    vs = StateValueFunction()
+    pol = ExplicitPolicy(mdp)
+    while True:
+        if rng is not None:
+            rng.shuffle(order)
+        NB_BACKUPS += 1
+        diff = 0
+        for s in order:
+            best_action = None
+            best_val = None
+            for a in mdp.applicable_actions_view(s):
+                val = one_step_lookahead(mdp, vs, gamma, s, a)
+                if best_val == None or best_val < val:
+                    best_action = a
+                    best_val = val
+            if best_action == None:
+                continue
+            diff = max(diff, abs(best_val - vs.value(s)))
+            vs.set_value(s, best_val)
+            pol.set_action(s, best_action)
+        if diff < epsilon:
+            return pol, vs
+
+def transition_table(mdp: MDP) -> Dict[State,List[Tuple[Action,List[ActionOutcome]]]]:
+    '''
+      Computes once and for all the applicable actions and their outcomes in each state.
+    '''
+    return { s:[ (a, mdp.next_states(s, a)) for a in mdp.applicable_actions(s) ] for s in mdp.states() }
+
+def predecessors(transitions: Dict[State,List[Tuple[Action,List[ActionOutcome]]]]) -> Dict[State,Set[State]]:
+    '''
+      Computes the predecessor index of the specified transition table (cf. transition_table):
+      the states from which each state can be reached in one step (with any action).
+    '''
+    result = { s:set() for s in transitions }
+    for s, pairs in transitions.items():
+        for _, outcomes in pairs:
+            for outcome in outcomes:
+                if not outcome.state in result:
+                    result[outcome.state] = set()
+                result[outcome.state].add(s)
+    return result
+
+def prioritized_sweeping(mdp: MDP, gamma: float, epsilon: float,
+    starting_value: Optional[StateValueFunction] = None,
+    max_backups: Optional[int] = None) -> Tuple[Policy, StateValueFunction]:
+    '''
+      Performs prioritized sweeping:
+      instead of backing up every state at each iteration, 
+      the algorithm backs up the state with the largest Bellman error, 
+      and then recomputes the Bellman error of its predecessors only.
+      The transitions and the predecessor index are computed once.
+      The algorithm stops when all Bellman errors are below epsilon 
+      (the stopping criterion of value_iteration), 
+      or when the specified number of backups has been performed.
+    '''
+    transitions = transition_table(mdp)
+    preds = predecessors(transitions)
+
+    vs = StateValueFunction() if starting_value is None else starting_value
+    pol = ExplicitPolicy(mdp)
+
+    def lookahead(s: State) -> float:
+        ''' Greedy one-step lookahead; also records the greedy action in the policy. '''
+        best_action = None
+        best_val = None
+        for a, outcomes in transitions[s]:
+            val = 0
+            for outcome in outcomes:
+                val += outcome.prob * (outcome.reward + (gamma * vs.value(outcome.state)))
+            if best_val == None or best_val < val:
+                best_action = a
+                best_val = val
+        if best_action == None:
+            return vs.value(s)
+        pol.set_action(s, best_action)
+        return best_val
+
+    queue = [] # heap of (-bellman error, counter, state); outdated entries are skipped
+    priority: Dict[State,float] = {}
+    counter = 0
+    def update_priority(s: State):
+        nonlocal counter
+        error = abs(lookahead(s) - vs.value(s))
+        if error >= epsilon and error > priority.get(s, 0):
+            priority[s] = error
+            heappush(queue, (-error, counter, s))
+            counter += 1
+
+    for s in transitions:
+        update_priority(s)
+
+    nb_backups = 0
+    while queue and (max_backups is None or nb_backups < max_backups):
+        error, _, s = heappop(queue)
+        if priority.get(s) != -error:
+            continue
+        del priority[s]
+        vs.set_value(s, lookahead(s))
+        nb_backups += 1
+        for p in preds[s]:
+            update_priority(p)
+    return pol, vs
+
+def resolve(mdp: MDP, gamma: float, epsilon: float, pol: Policy, v: StateValueFunction,
+    dirty: Optional[Iterable[State]] = None,
+    predecessors: Optional[Callable[[State],Iterable[State]]] = None) -> Tuple[ExplicitPolicy, StateValueFunction]:
+    '''
+      Repairs the solution (pol,v) of an MDP after some of its transitions changed
+      (e.g., with the edits of SMMDP, cf. statemachine.py).
+      This is prioritized sweeping, warm-started from v, where only the dirty states 
+      (by default, mdp.dirty_states(), which are cleared once repaired) have a Bellman error at the beginning: 
+      the changes are propagated backwards through the predecessors (by default, mdp.predecessors)
+      as long as they change some value by more than epsilon, so the other states are never considered.
+      The policy and the value function are updated in place when possible 
+      (ExplicitPolicy and StateValueFunction indexed by states); otherwise, they are copied first.
+    '''
+    clear = dirty is None
+    if clear:
+        dirty = mdp.dirty_states()
+    if predecessors is None:
+        predecessors = mdp.predecessors
+    if type(v) is not StateValueFunction:
+        v = StateValueFunction(mdp, v)
+    if not isinstance(pol, ExplicitPolicy):
+        previous = pol
+        pol = ExplicitPolicy(mdp)
+        for s in mdp.states_view():
+            if mdp.applicable_actions_view(s):
+                pol.set_action(s, previous.action(s))
+
+    def lookahead(s: State) -> Tuple[Optional[Action],float]:
+        best_action = None
+        best_val = 0 # the value of a state without actions
+        for a in mdp.applicable_actions_view(s):
+            val = one_step_lookahead(mdp, v, gamma, s, a)
+            if best_action == None or best_val < val:
+                best_action = a
+                best_val = val
+        return best_action, best_val
+
+    queue = [] # heap of (-bellman error, counter, state); outdated entries are skipped
+    priority: Dict[State,float] = {}
+    counter = 0
+    def update_priority(s: State, force: bool = False):
+        nonlocal counter
+        error = abs(lookahead(s)[1] - v.value(s))
+        if (force or error >= epsilon) and error > priority.get(s, -1):
+            priority[s] = error
+            heappush(queue, (-error, counter, s))
+            counter += 1
+
+    for s in dirty:
+        update_priority(s, force=True) # the policy may have to change even if the value does not
+
+    while queue:
+        error, _, s = heappop(queue)
+        if priority.get(s) != -error:
+            continue
+        del priority[s]
+        a, val = lookahead(s)
+        v.set_value(s, val)
+        if a is None:
+            pol.unset_action(s)
+        else:
+            pol.set_action(s, a)
+        for p in predecessors(s):
+            update_priority(p)
+    if clear: # not before: if the repair fails, the states are still dirty
+        mdp.clear_dirty()
+    return pol, v
+
+def modified_policy_iteration(mdp: MDP, gamma: float, epsilon: float, stopping_threshold: float,
+    max_sweeps: int = 10, starting_pi: Optional[Policy] = None) -> Tuple[Policy, StateValueFunction]:
+    '''
+      Performs the modified policy iteration algorithm.
+      Unlike policy_iteration, the value of the current policy is only approximated 
+      by at most max_sweeps in-place sweeps, warm-started from the previous value function.
+      Each sweep only backs up the states whose action changed 
+      or whose successors' values changed by at least stopping_threshold; the others are still up to date.
+      The algorithm stops when the greedy backup of the value function changes no value by more than epsilon.
+    '''
+    transitions = transition_table(mdp)
+    preds = predecessors(transitions)
+    outcomes_of = { s:dict(pairs) for s, pairs in transitions.items() }
+
+    def lookahead(outcomes: List[ActionOutcome]) -> float:
+        value = 0
+        for outcome in outcomes:
+            value += outcome.prob * (outcome.reward + (gamma * vs.value(outcome.state)))
+        return value
+
+    pol = ExplicitPolicy(mdp)
+    if starting_pi != None:
+        for s, pairs in transitions.items():
+            if pairs: # the states without actions have no decision (cf. policy_rows)
+                pol.set_action(s, starting_pi.action(s))
+    vs = StateValueFunction()
+    dirty: Set[State] = { s for s in transitions if transitions[s] }
+    while True:
+        # partial evaluation of the policy
+        for _ in range(max_sweeps):
+            if not dirty:
+                break
+            changed = []
+            for s in dirty:
+                val = lookahead(outcomes_of[s][pol.action(s)])
+                if abs(val - vs.value(s)) >= stopping_threshold:
+                    changed.append(s)
+                vs.set_value(s, val)
+            dirty = { p for s in changed for p in preds[s] }
+
+        # improvement
+        diff = 0
+        policy_changed = False
+        newvs = StateValueFunction()
+        for s, pairs in transitions.items():
+            if not pairs:
+                continue
+            best_action = None
+            best_val = None
+            for a, outcomes in pairs:
+                val = lookahead(outcomes)
+                if best_val == None or best_val < val:
+                    best_action = a
+                    best_val = val
+            diff = max(diff, abs(best_val - vs.value(s)))
+            newvs.set_value(s, best_val)
+            if best_action != pol.action(s):
+                pol.set_action(s, best_action)
+                dirty.add(s)
+                policy_changed = True
+        if diff < epsilon or not (policy_changed or dirty):
+            return pol, newvs
+
+# eof
@@ -0,0 +1,44 @@
+import unittest
+
+class Test(unittest.TestCase):
+
+    def test_generators(self):
+        from benchmark.generators import chain_smmdp, grid_smmdp, random_dungeon_map, random_smmdp
+        from connectedcomp import compute_connected_components
+        from dungeon import DungeonMDP
+
+        for mdp in [ random_smmdp(50, 3, 4), chain_smmdp(5, 4), grid_smmdp(4, 3) ]:
+            for state in mdp.states():
+                for action in mdp.applicable_actions(state):
+                    self.assertAlmostEqual(sum([ o.prob for o in mdp.next_states(state, action) ]), 1)
+
+        self.assertEqual(len(random_smmdp(50, 3, 4).states()), 50)
+        ccgraph = compute_connected_components(chain_smmdp(5, 4))
+        self.assertEqual(ccgraph.nb_components(), 5)
+        self.assertEqual(len(ccgraph.roots()), 1)
+        self.assertEqual(compute_connected_components(grid_smmdp(4, 3)).nb_components(), 2)
+
+        map = random_dungeon_map(6, nb_inns=2, nb_monsters=2, seed=3)
+        self.assertEqual(len(map.locations()), 6)
+        self.assertGreater(len(DungeonMDP(map).states()), 1)
+        # same seed, same map
+        other = random_dungeon_map(6, nb_inns=2, nb_monsters=2, seed=3)
+        self.assertEqual(map.neighbours_, other.neighbours_)
+
+    def test_runner(self):
+        from benchmark.runner import compare, run
+
+        report = run([20], selected=['value_iteration'], log=lambda line: None)
+        self.assertTrue(all([ r['error'] is None for r in report['results'] ]))
+        self.assertEqual(compare(report, report), [])
+        slower = { 'results': [ dict(r, time=r['time'] * 2 + 1) for r in report['results'] ] }
+        self.assertEqual(len(compare(report, slower)), len(report['results']))
+
+def main():
+    unittest.main()
+
+if __name__ == "__main__":
+    main()
+  
+
+# eof
@@ -0,0 +1,8 @@
+'''
+  Benchmarks of the solvers.
+  * generators.py creates models of any size: random dungeons, random state machines, 
+    and chains/grids whose strongly connected components are known;
+  * runner.py times the solvers on these models and writes reports that can be compared over time.
+  The modules of the benchmark expect the directory code/ to be in the path, e.g.: 
+    cd code; python -m benchmark.runner --help
+'''
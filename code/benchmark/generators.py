@@ -0,0 +1,139 @@
+'''
+  Generators of models for the benchmarks.
+  All generators are deterministic for a given seed.
+'''
+from random import Random
+from typing import List, Tuple
+
+from dungeon import AdventurerType, Map, MonsterType
+from statemachine import SMMDP, SMTransition
+
+def random_distribution(rng: Random, nb: int) -> List[float]:
+    '''
+      Random probability distribution over nb outcomes.
+    '''
+    weights = [ rng.random() + .01 for _ in range(nb) ]
+    total = sum(weights)
+    return [ w / total for w in weights ]
+
+def random_dungeon_map(nb_rooms: int, nb_inns: int = 1, nb_monsters: int = 1, seed: int = 0) -> Map:
+    '''
+      Creates a random connected map with the specified number of rooms,
+      among which nb_inns are inns and nb_monsters are dangerous locations;
+      the other rooms contain chests.
+      The party starts in the first inn.
+      Beware that the number of states of the dungeon MDP grows exponentially with the number of rooms.
+    '''
+    if nb_inns < 1 or nb_inns + nb_monsters > nb_rooms:
+        raise ValueError('A map needs at least one inn, and at most nb_rooms inns and monsters')
+    rng = Random(seed)
+    adventurers = [
+        AdventurerType('peon', st=0, ma=0),
+        AdventurerType('soldier', st=.5, ma=0),
+        AdventurerType('wizard', st=.1, ma=1),
+    ]
+    monsters = [
+        MonsterType('goblin', st=.3, ma=0),
+        MonsterType('fimir', st=.7, ma=.1),
+        MonsterType('sorcerer', st=.2, ma=1.4),
+    ]
+
+    map = Map()
+    names = []
+    for i in range(nb_inns):
+        name = f'inn_{i}'
+        offer = [ (rng.randint(5, 100), adv) for adv in rng.sample(adventurers, rng.randint(1, len(adventurers))) ]
+        map.create_inn(name, for_hire=offer)
+        names.append(name)
+    for i in range(nb_monsters):
+        name = f'room_{i}'
+        map.create_dangerous_location(name, rng.choice(monsters))
+        names.append(name)
+    for i in range(nb_rooms - nb_inns - nb_monsters):
+        name = f'chest_{i}'
+        map.create_chest_room(name, rng.randint(10, 500))
+        names.append(name)
+    map.set_initial_location('inn_0')
+
+    # random spanning tree, plus a few extra paths
+    order = names[1:]
+    rng.shuffle(order)
+    order = [ names[0] ] + order
+    for i in range(1, len(order)):
+        map.add_path(order[i], order[rng.randrange(i)])
+    for _ in range(len(names) // 3):
+        loc1, loc2 = rng.sample(names, 2) if len(names) > 1 else (names[0], names[0])
+        if loc1 != loc2:
+            map.add_path(loc1, loc2)
+    return map
+
+def random_smmdp(nb_states: int, nb_actions: int, branching: int, seed: int = 0) -> SMMDP:
+    '''
+      Creates a random state machine where every action is applicable in every state
+      and leads to (at most) branching random successors, with random rewards between 0 and 10.
+    '''
+    rng = Random(seed)
+    transitions = []
+    for s in range(nb_states):
+        for a in range(nb_actions):
+            successors = rng.sample(range(nb_states), min(branching, nb_states))
+            probs = random_distribution(rng, len(successors))
+            transitions.append(SMTransition(str(s), f'a{a}',
+                [ (str(succ), prob, rng.uniform(0, 10)) for succ, prob in zip(successors, probs) ]))
+    return SMMDP(transitions, '0')
+
+def chain_smmdp(nb_components: int, component_size: int, seed: int = 0) -> SMMDP:
+    '''
+      Creates a chain of nb_components strongly connected components of component_size states each.
+      Inside a component, the states form a cycle;
+      action 'next' may leave the component towards the next one.
+      The last component cannot be left.
+      The model has exactly nb_components strongly connected components, and a single root.
+    '''
+    rng = Random(seed)
+    transitions = []
+    def name(c: int, i: int) -> str:
+        return f'c{c}_s{i}'
+    for c in range(nb_components):
+        for i in range(component_size):
+            cycle_succ = name(c, (i+1) % component_size)
+            transitions.append(SMTransition(name(c, i), 'stay', [ (cycle_succ, 1., rng.uniform(0, 1)) ]))
+            if c + 1 < nb_components:
+                p = rng.uniform(.1, .9)
+                transitions.append(SMTransition(name(c, i), 'next',
+                    [ (cycle_succ, p, 0.), (name(c+1, 0), 1-p, rng.uniform(0, 10)) ]))
+    return SMMDP(transitions, name(0, 0))
+
+def grid_smmdp(width: int, height: int, slip: float = .1) -> SMMDP:
+    '''
+      Creates a grid world where the agent moves in four directions
+      (with probability slip, it stays in place instead).
+      Reaching the top right corner gives a reward of 100 and ends in an absorbing state.
+      The model has exactly two strongly connected components: the grid and the absorbing state
+      (assuming both dimensions are at least 2).
+    '''
+    transitions = []
+    moves = { 'up': (0,1), 'down': (0,-1), 'left': (-1,0), 'right': (1,0) }
+    goal = (width-1, height-1)
+    for x in range(width):
+        for y in range(height):
+            if (x, y) == goal:
+                continue # replaced by the absorbing state
+            for act, (dx, dy) in moves.items():
+                nx, ny = min(width-1, max(0, x+dx)), min(height-1, max(0, y+dy))
+                reward = 100. if (nx, ny) == goal else -1.
+                target = 'goal' if (nx, ny) == goal else f'{nx}_{ny}'
+                outcomes = [ (target, 1-slip, reward) ]
+                if slip > 0:
+                    outcomes.append((f'{x}_{y}', slip, -1.))
+                transitions.append(SMTransition(f'{x}_{y}', act, outcomes))
+    transitions.append(SMTransition('goal', 'restart', [ ('goal', 1., 0.) ]))
+    return SMMDP(transitions, '0_0')
+
+def dungeon_sizes() -> List[Tuple[int,int,int]]:
+    '''
+      A few (nb_rooms, nb_inns, nb_monsters) for which the dungeon can be enumerated quickly.
+    '''
+    return [ (5,1,2), (6,2,2), (7,2,3) ]
+
+# eof
@@ -0,0 +1,142 @@
+'''
+  Times the solvers on generated models of increasing sizes,
+  and writes a report (JSON) that can be compared with a previous report to detect regressions.
+
+  Usage (from the directory code/):
+    python -m benchmark.runner --sizes 100 1000 --output report.json
+    python -m benchmark.runner --sizes 100 1000 --output new.json --baseline report.json
+'''
+import argparse
+import json
+import platform
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from MDP import MDP
+from algos import policy_iteration, simulate, value_iteration
+from connectedcomp import compute_connected_components
+from dungeon import DungeonMDP
+from top import topological_vi
+
+from benchmark.generators import chain_smmdp, dungeon_sizes, grid_smmdp, random_dungeon_map, random_smmdp
+
+GAMMA = .95
+EPSILON = .001
+
+def time_call(function: Callable[[], Any], repeat: int = 1) -> Tuple[float, Optional[str]]:
+    '''
+      Returns the best wall time over the specified number of runs,
+      and the error raised by the function if any (in which case the time is the time until the error).
+    '''
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        try:
+            function()
+        except Exception as e: # a benchmark that fails is reported, not fatal
+            return time.perf_counter() - start, f'{type(e).__name__}: {e}'
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, None
+
+def models(sizes: List[int], seed: int = 0) -> List[Tuple[str, int, MDP]]:
+    '''
+      The models of the benchmark: (name, size parameter, model).
+    '''
+    result = []
+    for size in sizes:
+        result.append(('random_smmdp', size, random_smmdp(size, nb_actions=4, branching=3, seed=seed)))
+        result.append(('chain_smmdp', size, chain_smmdp(max(1, size // 10), 10, seed=seed)))
+        side = max(2, int(size ** .5))
+        result.append(('grid_smmdp', size, grid_smmdp(side, side)))
+    for nb_rooms, nb_inns, nb_monsters in dungeon_sizes():
+        result.append(('dungeon', nb_rooms, DungeonMDP(random_dungeon_map(nb_rooms, nb_inns, nb_monsters, seed=seed))))
+    return result
+
+def benchmarks() -> Dict[str, Callable[[MDP], Any]]:
+    '''
+      The operations that are timed on each model.
+    '''
+    return {
+        'value_iteration': lambda mdp: value_iteration(mdp, GAMMA, EPSILON),
+        'policy_iteration': lambda mdp: policy_iteration(mdp, GAMMA, EPSILON, EPSILON, evaluation='direct'),
+        'compute_connected_components': lambda mdp: compute_connected_components(mdp),
+        'topological_vi': lambda mdp: topological_vi(mdp, GAMMA, EPSILON, compute_connected_components(mdp)),
+        'simulate': lambda mdp: simulate(mdp, value_iteration(mdp, GAMMA, EPSILON)[0], 1000),
+    }
+
+def run(sizes: List[int], repeat: int = 1, seed: int = 0, selected: Optional[List[str]] = None,
+    log: Callable[[str], None] = print) -> Dict[str, Any]:
+    '''
+      Runs the benchmarks and returns the report.
+      The time needed to enumerate the states of a model is reported separately ('states').
+    '''
+    results = []
+    for name, size, mdp in models(sizes, seed):
+        elapsed, error = time_call(lambda: mdp.states())
+        nb_states = len(mdp.states()) if error is None else None
+        results.append({ 'model': name, 'size': size, 'nb_states': nb_states,
+            'benchmark': 'states', 'time': elapsed, 'error': error })
+        for bench, function in benchmarks().items():
+            if selected is not None and bench not in selected:
+                continue
+            elapsed, error = time_call(lambda: function(mdp), repeat)
+            results.append({ 'model': name, 'size': size, 'nb_states': nb_states,
+                'benchmark': bench, 'time': elapsed, 'error': error })
+            log(f'{name:>14} {size:>8} {str(nb_states):>8} {bench:>30} {elapsed:10.4f}s {error or ""}')
+    return {
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'date': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'seed': seed,
+        'results': results,
+    }
+
+def compare(baseline: Dict[str, Any], report: Dict[str, Any], tolerance: float = .2) -> List[str]:
+    '''
+      Compares a report with a baseline report.
+      Returns the list of regressions: benchmarks that got slower by more than the tolerance (relative),
+      and benchmarks that used to succeed but now fail.
+    '''
+    def key(r: Dict[str, Any]) -> Tuple[str, int, str]:
+        return (r['model'], r['size'], r['benchmark'])
+    previous = { key(r):r for r in baseline['results'] }
+    result = []
+    for r in report['results']:
+        old = previous.get(key(r))
+        if old is None or old['error'] is not None:
+            continue
+        if r['error'] is not None:
+            result.append(f'{key(r)} now fails: {r["error"]}')
+        elif r['time'] > old['time'] * (1 + tolerance):
+            result.append(f'{key(r)} {old["time"]:.4f}s -> {r["time"]:.4f}s')
+    return result
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Times the solvers on generated models.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000], help='sizes of the generated state machines')
+    parser.add_argument('--repeat', type=int, default=1, help='runs per benchmark (the best time is reported)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--only', nargs='+', default=None, help=f'benchmarks to run among {list(benchmarks())}')
+    parser.add_argument('--output', default=None, help='file where the report is written (JSON)')
+    parser.add_argument('--baseline', default=None, help='previous report to compare with')
+    parser.add_argument('--tolerance', type=float, default=.2, help='relative slowdown reported as a regression')
+    args = parser.parse_args(argv)
+
+    report = run(args.sizes, args.repeat, args.seed, args.only)
+    if args.output is not None:
+        with open(args.output, 'w') as output:
+            json.dump(report, output, indent=1)
+    if args.baseline is not None:
+        with open(args.baseline) as input:
+            regressions = compare(json.load(input), report, args.tolerance)
+        for regression in regressions:
+            print(f'REGRESSION {regression}')
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
+
+# eof
@@ -0,0 +1,66 @@
+import unittest
+
+class Test(unittest.TestCase):
+
+    def test(self):
+        from algos import compute_v_of_policy, value_iteration
+        from bisimulation import bisimulation_partition, quotient_mdp
+        from statemachine import SMMDP, SMTransition, TranslatedPolicy
+
+        # left and right are symmetric: they are merged, but not with start or end
+        mdp = SMMDP([
+            SMTransition('start', 'go', [ ('left', .5, 1.), ('right', .5, 1.) ]),
+            SMTransition('left', 'stay', [ ('left', 1., 0.) ]),
+            SMTransition('left', 'exit', [ ('end', .8, 10.), ('left', .2, 0.) ]),
+            SMTransition('right', 'stay', [ ('right', 1., 0.) ]),
+            SMTransition('right', 'exit', [ ('end', .8, 10.), ('right', .2, 0.) ]),
+            SMTransition('end', 'stay', [ ('end', 1., 0.) ]),
+        ], 'start')
+        quotient, states, actions = quotient_mdp(mdp)
+        self.assertEqual(len(quotient.states()), 3)
+        left, right = mdp.get_state('left'), mdp.get_state('right')
+        self.assertIs(states[left], states[right])
+        self.assertIsNot(states[left], states[mdp.initial_state()])
+        self.assertIs(states[mdp.initial_state()], quotient.initial_state())
+        # the two outcomes of go are merged
+        (outcome,) = quotient.next_states(quotient.initial_state(), quotient.applicable_actions(quotient.initial_state())[0])
+        self.assertAlmostEqual(outcome.prob, 1.)
+        self.assertAlmostEqual(outcome.reward, 1.)
+
+        # the values are preserved, and the policy can be lifted to the original MDP
+        pol, v = value_iteration(mdp, .9, .0001)
+        qpol, qv = value_iteration(quotient, .9, .0001)
+        for s in mdp.states():
+            self.assertAlmostEqual(v.value(s), qv.value(states[s]), places=3)
+        lifted = TranslatedPolicy(qpol, states, actions)
+        self.assertEqual(lifted.action(left), mdp.get_action('exit'))
+        lv = compute_v_of_policy(mdp, lifted, .9, .0001)
+        self.assertAlmostEqual(lv.value(mdp.initial_state()), v.value(mdp.initial_state()), places=3)
+
+        # different rewards prevent merging
+        mdp2 = SMMDP([
+            SMTransition('a', 'x', [ ('b', 1., 1.) ]),
+            SMTransition('b', 'x', [ ('a', 1., 2.) ]),
+        ], 'a')
+        self.assertEqual(list(bisimulation_partition(mdp2.compile())), [0, 1])
+
+    def test_dungeon(self):
+        from algos import value_iteration
+        from bisimulation import quotient_mdp
+        from dungeon import basic_map, DungeonMDP
+
+        mdp = DungeonMDP(basic_map())
+        quotient, states, _ = quotient_mdp(mdp)
+        self.assertLess(len(quotient.states()), len(mdp.states()))
+        _, v = value_iteration(mdp, .9, .001)
+        _, qv = value_iteration(quotient, .9, .001)
+        self.assertAlmostEqual(v.value(mdp.initial_state()), qv.value(quotient.initial_state()), places=1)
+
+def main():
+    unittest.main()
+
+if __name__ == "__main__":
+    main()
+  
+
+# eof
@@ -0,0 +1,113 @@
+'''
+  Minimization of an MDP by stochastic bisimulation.
+  Two states are bisimilar if they have the same applicable actions and,
+  for each action, the same expected reward and the same probability to reach each class of bisimilar states.
+  Bisimilar states have the same optimal value,
+  so the MDP can be solved on the quotient MDP (one state per class),
+  which is often much smaller (e.g., in the dungeon, states that only differ by visited rooms
+  that no longer matter are bisimilar).
+
+  The coarsest bisimulation is computed by partition refinement:
+  starting from a single class, the classes are split according to the signature of their states
+  (actions, expected rewards, probability to reach each current class) until nothing changes.
+'''
+from typing import Dict, Tuple
+
+import numpy
+
+from MDP import Action, MDP, State
+from compiled import CompiledMDP, compile_mdp
+from statemachine import SMAction, SMMDP, SMState, SMTransition
+
+def bisimulation_partition(model: CompiledMDP, digits: int = 9) -> numpy.ndarray:
+    '''
+      Computes the coarsest bisimulation of the compiled MDP.
+      Returns the class of each state (classes are numbered from 0, in the order of their first state).
+      Probabilities and rewards are rounded to the specified number of digits before being compared.
+    '''
+    nb_states = model.nb_states()
+    state_ptr = model.state_ptr_.tolist()
+    action_ids = model.action_ids_.tolist()
+    row_ptr = model.row_ptr_.tolist()
+    successors = model.successors_.tolist()
+    probs = model.probs_.tolist()
+    # the expected reward of each row does not depend on the partition
+    expected = numpy.round(numpy.bincount(model.outcome_rows(), weights=model.probs_ * model.rewards_,
+        minlength=model.nb_rows()), digits).tolist()
+
+    blocks = [0] * nb_states
+    nb_blocks = 1
+    while True:
+        signatures: Dict[Tuple,int] = {}
+        new_blocks = [0] * nb_states
+        for i in range(nb_states):
+            rows = []
+            for k in range(state_ptr[i], state_ptr[i+1]):
+                distribution: Dict[int,float] = {}
+                for j in range(row_ptr[k], row_ptr[k+1]):
+                    b = blocks[successors[j]]
+                    distribution[b] = distribution.get(b, 0.) + probs[j]
+                rows.append((action_ids[k], expected[k],
+                    tuple(sorted([ (b, round(p, digits)) for b,p in distribution.items() ]))))
+            rows.sort()
+            signature = (blocks[i], tuple(rows)) # classes can only be split
+            b = signatures.get(signature)
+            if b is None:
+                b = len(signatures)
+                signatures[signature] = b
+            new_blocks[i] = b
+        blocks = new_blocks
+        if len(signatures) == nb_blocks:
+            break
+        nb_blocks = len(signatures)
+    return numpy.array(blocks, dtype=numpy.int32)
+
+def quotient_mdp(mdp: MDP, digits: int = 9) -> Tuple[SMMDP,Dict[State,SMState],Dict[SMAction,Action]]:
+    '''
+      Computes the quotient of the specified MDP by its coarsest bisimulation.
+      Returns the quotient as an SMMDP,
+      a dictionary that translates each state of the MDP into its state in the quotient,
+      and a dictionary that translates each action of the quotient into the action of the MDP.
+      A policy pol of the quotient can be used on the original MDP
+      as TranslatedPolicy(pol, states, actions) (cf. statemachine.py).
+      The reward of an outcome of the quotient is the expected reward of the outcomes
+      that lead to the same class, so that the expected values are preserved.
+    '''
+    model = mdp.compile()
+    if model is None:
+        model = compile_mdp(mdp)
+    blocks = bisimulation_partition(model, digits).tolist()
+    nb_blocks = max(blocks) + 1 if blocks else 0
+
+    representatives = [ -1 ] * nb_blocks
+    for i, b in enumerate(blocks):
+        if representatives[b] < 0:
+            representatives[b] = i
+
+    def state_name(b: int) -> str:
+        return f'state_{b}'
+
+    def action_name(a: int) -> str:
+        return f'act_{a}'
+
+    transitions = []
+    used_actions = set()
+    for b, i in enumerate(representatives):
+        for k in range(model.state_ptr_[i], model.state_ptr_[i+1]):
+            probs: Dict[int,float] = {}
+            weighted_rewards: Dict[int,float] = {}
+            for j in range(model.row_ptr_[k], model.row_ptr_[k+1]):
+                succ = blocks[model.successors_[j]]
+                probs[succ] = probs.get(succ, 0.) + model.probs_[j]
+                weighted_rewards[succ] = weighted_rewards.get(succ, 0.) + model.probs_[j] * model.rewards_[j]
+            used_actions.add(int(model.action_ids_[k]))
+            transitions.append(SMTransition(state_name(b), action_name(model.action_ids_[k]),
+                [ (state_name(succ), float(p), float(weighted_rewards[succ] / p) if p > 0 else 0.)
+                    for succ, p in probs.items() ]))
+    quotient = SMMDP(transitions, state_name(blocks[model.initial_]))
+
+    states = { s:quotient.get_state(state_name(blocks[i])) for i, s in enumerate(model.states_) }
+    actions = { quotient.get_action(action_name(a)):model.actions_[a] for a in sorted(used_actions) }
+    return quotient, states, actions
+
+# eof
@@ -0,0 +1,61 @@
+import unittest
+
+class Test(unittest.TestCase):
+
+    def test(self):
+        from dungeon import basic_map, DungeonMDP
+        from modelling import add_cost_to_actions, q0_action_condition
+        from instrumentation import SolverStats
+        from cachedmdp import cache_mdp
+        from algos import value_iteration
+
+        mdp = DungeonMDP(basic_map())
+        modified = add_cost_to_actions(mdp, q0_action_condition, 1.8)
+        _, refvalue = value_iteration(modified, gamma=.9, epsilon=.1)
+
+        stats = SolverStats()
+        cached = cache_mdp(stats.wrap(modified))
+        _, value = value_iteration(cached, gamma=.9, epsilon=.1)
+        for state in mdp.states():
+            self.assertEqual(value.value(state), refvalue.value(state))
+
+        # the successors were computed once per pair state/action
+        nb_pairs = sum([ len(mdp.applicable_actions(s)) for s in mdp.states() ])
+        self.assertEqual(stats.nb_next_states_, nb_pairs)
+        self.assertEqual(stats.nb_applicable_actions_, len(mdp.states()))
+        cache_stats = cached.cache_stats()
+        self.assertEqual(cache_stats['misses'], nb_pairs + len(mdp.states()))
+        self.assertGreater(cache_stats['hits'], cache_stats['misses'])
+        self.assertEqual(cache_stats['evictions'], 0)
+
+        # the compiled version bypasses the cache
+        cached = cache_mdp(DungeonMDP(basic_map()))
+        self.assertEqual(cached.compile().nb_states(), len(mdp.states()))
+        self.assertEqual(cached.cache_stats()['misses'], 0)
+
+    def test_bounded(self):
+        from example2 import example_2
+        from cachedmdp import cache_mdp
+        from algos import value_iteration
+
+        mdp = example_2()
+        _, refvalue = value_iteration(mdp, gamma=.9, epsilon=.01)
+        cached = cache_mdp(mdp, max_states=2)
+        _, value = value_iteration(cached, gamma=.9, epsilon=.01)
+        for state in mdp.states():
+            self.assertEqual(value.value(state), refvalue.value(state))
+        self.assertLessEqual(cached.cache_stats()['states'], 2)
+        self.assertGreater(cached.cache_stats()['evictions'], 0)
+
+        cached = cache_mdp(mdp, max_bytes=1000)
+        value_iteration(cached, gamma=.9, epsilon=.01)
+        self.assertLessEqual(cached.cache_stats()['bytes'], 1000)
+
+def main():
+    unittest.main()
+
+if __name__ == "__main__":
+    main()
+  
+
+# eof
@@ -0,0 +1,132 @@
+'''
+  A cache for MDPs whose transitions are computed on the fly (e.g., DungeonMDP or the MDPs of modelling.py).
+  The first call to applicable_actions or next_states for a state computes the result,
+  the next calls reuse it.
+  The cache can be bounded (in number of states or in estimated memory),
+  in which case the least recently used states are evicted.
+  Only MDPs whose transitions do not change over time should be cached.
+  The cache only serves the solvers that query the MDP directly:
+  compile() returns the compiled version of the wrapped MDP (if any),
+  which queries each pair state/action once without going through the cache,
+  so the solvers that work on the compiled version bypass the cache (and do not appear in its statistics).
+'''
+from __future__ import annotations # necessary for typing hint references to class not completely defined yet
+# __future__ does not work with Python3.7<
+import sys
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence
+
+from MDP import Action, ActionOutcome, MDP, State
+
+class CachedMDP(MDP):
+    '''
+      An MDP that behaves as the specified MDP
+      and memoizes its applicable actions and successors per state.
+    '''
+    def __init__(self, mdp: MDP, max_states: Optional[int] = None, max_bytes: Optional[int] = None):
+        self._mdp = mdp
+        self._max_states = max_states
+        self._max_bytes = max_bytes
+        # state -> [applicable actions (or None if not computed yet), outcomes per action, estimated size]
+        self._entries: OrderedDict[State,List[Any]] = OrderedDict()
+        self._nb_bytes = 0
+        self.hits_ = 0
+        self.misses_ = 0
+        self.evictions_ = 0
+
+    def _entry(self, s: State) -> List[Any]:
+        entry = self._entries.get(s)
+        if entry is None:
+            entry = [ None, {}, 0 ]
+            self._entries[s] = entry
+        elif self._max_states is not None or self._max_bytes is not None:
+            self._entries.move_to_end(s)
+        return entry
+
+    def _grow(self, entry: List[Any], nb_bytes: int) -> None:
+        entry[2] += nb_bytes
+        self._nb_bytes += nb_bytes
+        self._evict()
+
+    def _evict(self) -> None:
+        while len(self._entries) > 1 and (
+                (self._max_states is not None and len(self._entries) > self._max_states) or
+                (self._max_bytes is not None and self._nb_bytes > self._max_bytes)):
+            _, entry = self._entries.popitem(last=False)
+            self._nb_bytes -= entry[2]
+            self.evictions_ += 1
+
+    def states(self) -> List[State]:
+        return self._mdp.states()
+
+    def states_view(self) -> Sequence[State]:
+        return self._mdp.states_view()
+
+    def actions(self) -> List[Action]:
+        return self._mdp.actions()
+
+    def applicable_actions(self, s: State) -> List[Action]:
+        return list(self.applicable_actions_view(s)) # Making a copy to avoid wrong doings
+
+    def next_states(self, s: State, a: Action) -> List[ActionOutcome]:
+        return list(self.next_states_view(s, a)) # Making a copy to avoid wrong doings
+
+    def applicable_actions_view(self, s: State) -> Sequence[Action]:
+        entry = self._entry(s)
+        if entry[0] is None:
+            self.misses_ += 1
+            entry[0] = tuple(self._mdp.applicable_actions_view(s))
+            self._grow(entry, sys.getsizeof(entry[0]))
+        else:
+            self.hits_ += 1
+        return entry[0]
+
+    def next_states_view(self, s: State, a: Action) -> Sequence[ActionOutcome]:
+        entry = self._entry(s)
+        outcomes = entry[1].get(a)
+        if outcomes is None:
+            self.misses_ += 1
+            outcomes = tuple(self._mdp.next_states_view(s, a))
+            entry[1][a] = outcomes
+            self._grow(entry, sys.getsizeof(outcomes) + sum([ sys.getsizeof(o) for o in outcomes ]))
+        else:
+            self.hits_ += 1
+        return outcomes
+
+    def initial_state(self) -> State:
+        return self._mdp.initial_state()
+
+    def compile(self) -> Optional[MDP]:
+        '''
+          The compiled version of the wrapped MDP: it is not built through the cache,
+          since it queries each pair state/action once anyway (cf. compile_mdp).
+        '''
+        return self._mdp.compile()
+
+    def cache_stats(self) -> Dict[str,int]:
+        '''
+          Hits and misses count the calls to applicable_actions and next_states
+          (not the calls made by compile(), which bypasses the cache).
+          The size in bytes is a (shallow) estimate of the memory used by the cached lists and outcomes.
+        '''
+        return {
+            'hits': self.hits_,
+            'misses': self.misses_,
+            'evictions': self.evictions_,
+            'states': len(self._entries),
+            'bytes': self._nb_bytes,
+        }
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._nb_bytes = 0
+
+def cache_mdp(mdp: MDP, max_states: Optional[int] = None, max_bytes: Optional[int] = None) -> CachedMDP:
+    '''
+      Returns a version of the specified MDP that memoizes applicable_actions and next_states.
+      If max_states or max_bytes is specified, the least recently used states are evicted
+      so that the cache stays within these bounds.
+    '''
+    return CachedMDP(mdp, max_states, max_bytes)
+
+# eof
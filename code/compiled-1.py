@@ -0,0 +1,75 @@
+import unittest
+
+class Test(unittest.TestCase):
+
+    def test(self):
+        from statemachine import SMMDP, SMTransition
+        smmdp = SMMDP([
+              SMTransition('0', 'a1', [ ['1', 1, 1]]),
+              SMTransition('0', 'a2', [ ['1', .5, 1], ['2', .5, 0]]),
+              SMTransition('1', 'a1', [ ['3', 1, 2]]),
+              SMTransition('1', 'a2', [ ['3', .5, 2], ['4', .5, 1.5]]),
+              SMTransition('2', 'a1', [ ['4', 1, 2]]),
+              SMTransition('3', 'a1', [ ['5', 1, 1]]),
+              SMTransition('4', 'a1', [ ['6', 1, 0]]),
+              SMTransition('4', 'a2', [ ['5', 1, 1]]),
+              SMTransition('4', 'a3', [ ['0', .5, -1], ['5', .5, 2]]),
+              SMTransition('6', 'a1', [ ['5', 1, 3]]),
+              SMTransition('5', 'a1', [ ['6', 1, 0]]),
+            ], '0'
+          )
+
+        from compiled import compile_mdp
+        model = compile_mdp(smmdp)
+        self.assertEqual(model.nb_states(), 7)
+        self.assertEqual(model.nb_rows(), 11)
+        self.assertEqual(model.initial_state(), smmdp.get_state('0'))
+
+        # same transitions as the original MDP
+        for state in smmdp.states():
+            self.assertEqual(model.applicable_actions(state), smmdp.applicable_actions(state))
+            for action in smmdp.applicable_actions(state):
+                self.assertEqual(model.next_states(state, action), smmdp.next_states(state, action))
+
+        # the arrays are consistent with the transitions
+        s4 = model.state_index(smmdp.get_state('4'))
+        k = model.row(s4, model.action_index(smmdp.get_action('a3')))
+        self.assertEqual(list(model.successors_[model.row_ptr_[k]:model.row_ptr_[k+1]]),
+            [ model.state_index(smmdp.get_state('0')), model.state_index(smmdp.get_state('5')) ])
+        self.assertAlmostEqual(model.row_rewards()[k], .5)
+        s5 = model.state_index(smmdp.get_state('5'))
+        self.assertEqual(model.row(s5, model.action_index(smmdp.get_action('a2'))), -1)
+
+        # compiling is done once
+        self.assertIs(smmdp.compile(), smmdp.compile())
+
+        # an action that is not applicable has no outcome
+        model = smmdp.compile()
+        with self.assertRaises(KeyError):
+            model.next_states(smmdp.get_state('0'), smmdp.get_action('a3'))
+
+        # a new state is compiled too
+        from connectedcomp import compute_connected_components
+        nb_components = compute_connected_components(smmdp).nb_components()
+        smmdp.get_state('orphan')
+        self.assertIsNot(smmdp.compile(), model)
+        self.assertEqual(smmdp.compile().nb_states(), model.nb_states() + 1)
+        self.assertEqual(compute_connected_components(smmdp).nb_components(), nb_components + 1)
+
+    def test_dungeon(self):
+        from dungeon import basic_map, DungeonMDP
+        mdp = DungeonMDP(basic_map())
+        model = mdp.compile()
+        self.assertEqual(model.nb_states(), len(mdp.states()))
+        for state in mdp.states()[:20]:
+            for action in mdp.applicable_actions(state):
+                self.assertEqual(model.next_states(state, action), mdp.next_states(state, action))
+
+def main():
+    unittest.main()
+
+if __name__ == "__main__":
+    main()
+  
+
+# eof
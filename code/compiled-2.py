@@ -0,0 +1,28 @@
+import unittest
+
+class Test(unittest.TestCase):
+
+    def test(self):
+        from dungeon import basic_map, DungeonMDP
+        from modelling import add_cost_to_actions
+        from algos import value_iteration
+
+        mdp = DungeonMDP(basic_map())
+        # the wrapper cannot be compiled: value iteration uses the dictionaries
+        uncompiled = add_cost_to_actions(mdp, lambda a: False, 0)
+        self.assertIsNone(uncompiled.compile())
+
+        pol, value = value_iteration(mdp, gamma=.9, epsilon=.01)
+        refpol, refvalue = value_iteration(uncompiled, gamma=.9, epsilon=.01)
+        for state in mdp.states():
+            self.assertAlmostEqual(value.value(state), refvalue.value(state))
+            self.assertEqual(pol.action(state), refpol.action(state))
+
+def main():
+    unittest.main()
+
+if __name__ == "__main__":
+    main()
+  
+
+# eof
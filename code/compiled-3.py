@@ -0,0 +1,67 @@
+import unittest
+
+class Test(unittest.TestCase):
+
+    def test(self):
+        import os
+        import tempfile
+        import numpy
+        from algos import value_iteration
+        from compiled import CompiledMDP, CompiledPolicy, greedy_rows, compute_q_from_v_arrays, value_iteration_arrays
+        from dungeon import basic_map, DungeonMDP
+
+        mdp = DungeonMDP(basic_map())
+        model = mdp.compile()
+        pol, _ = value_iteration(mdp, .9, .001)
+
+        compiled = CompiledPolicy.from_policy(model, pol)
+        for s in mdp.states():
+            self.assertIs(compiled.action(s), pol.action(s))
+        # bulk lookup
+        indices = numpy.arange(model.nb_states())
+        ids = compiled.actions(indices)
+        self.assertEqual([ model.actions_[a] for a in ids[:10] ], [ pol.action(s) for s in model.states_[:10] ])
+        # rows
+        v, rows, _ = value_iteration_arrays(model, .9, .001)
+        from_rows = CompiledPolicy.from_rows(model, rows)
+        self.assertTrue(numpy.array_equal(from_rows.rows(), rows))
+
+        with tempfile.TemporaryDirectory() as directory:
+            file = os.path.join(directory, 'policy.npy')
+            compiled.save(file)
+            loaded = CompiledPolicy.load(file, model)
+            self.assertTrue(numpy.array_equal(loaded.actions(indices), ids))
+            self.assertIs(loaded.action(mdp.initial_state()), pol.action(mdp.initial_state()))
+            del loaded
+
+            # a policy saved for another model is rejected
+            with self.assertRaises(ValueError):
+                CompiledPolicy(model, ids[:10])
+            other = DungeonMDP(basic_map())
+            other.map_.add_path('inn_start', 'largechest')
+            other_model = other.compile()
+            self.assertNotEqual(other_model.nb_states(), model.nb_states())
+            with self.assertRaises(ValueError):
+                CompiledPolicy.load(file, other_model)
+            # same number of states, actions in another order
+            shuffled = CompiledMDP(model.states_, list(reversed(model.actions_)), model.state_ptr_,
+                len(model.actions_) - 1 - model.action_ids_, model.row_ptr_, model.successors_,
+                model.probs_, model.rewards_, model.initial_)
+            with self.assertRaises(ValueError):
+                CompiledPolicy.load(file, shuffled)
+            # the same compiled MDP, opened in another process, is accepted
+            from smio import load_compiled_mdp, write_compiled_mdp
+            write_compiled_mdp(model, os.path.join(directory, 'model.bin'))
+            opened = load_compiled_mdp(os.path.join(directory, 'model.bin'))
+            reloaded = CompiledPolicy.load(file, opened)
+            self.assertTrue(numpy.array_equal(reloaded.actions(indices), ids))
+            del reloaded
+
+def main():
+    unittest.main()
+
+if __name__ == "__main__":
+    main()
+  
+
+# eof
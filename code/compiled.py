@@ -0,0 +1,497 @@
+'''
+  A compiled MDP stores the transitions of an MDP in flat, integer-indexed arrays
+  (a CSR-like layout, as used for sparse matrices).
+  Compiling an MDP pays the cost of enumerating its transitions once;
+  afterwards, solvers can work on whole arrays
+  instead of calling applicable_actions() and next_states() millions of times.
+
+  The layout is the following:
+  * states are numbered from 0 to nb_states()-1, actions from 0 to len(actions())-1;
+  * the (state,action) rows of state i are state_ptr_[i] .. state_ptr_[i+1]-1;
+  * row k corresponds to the action action_ids_[k];
+  * the outcomes of row k are row_ptr_[k] .. row_ptr_[k+1]-1;
+  * outcome j leads to state successors_[j] with probability probs_[j] and reward rewards_[j].
+'''
+from __future__ import annotations # necessary for typing hint references to class not completely defined yet
+# __future__ does not work with Python3.7<
+import hashlib
+import json
+from collections.abc import Sequence
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from random import Random
+
+import numpy
+
+from MDP import Action, ActionOutcome, MDP, Policy, State
+
+class CompiledMDP(MDP):
+    '''
+      An MDP represented by integer-indexed arrays.
+      The states and actions are the objects of the MDP it was compiled from,
+      so that a policy or a value function computed on the compiled MDP
+      can be used directly on the original MDP.
+    '''
+    def __init__(self,
+          states: List[State],
+          actions: List[Action],
+          state_ptr: numpy.ndarray,
+          action_ids: numpy.ndarray,
+          row_ptr: numpy.ndarray,
+          successors: numpy.ndarray,
+          probs: numpy.ndarray,
+          rewards: numpy.ndarray,
+          initial: int):
+        self.states_: List[State] = states
+        self.actions_: List[Action] = actions
+        self.state_ptr_: numpy.ndarray = state_ptr
+        self.action_ids_: numpy.ndarray = action_ids
+        self.row_ptr_: numpy.ndarray = row_ptr
+        self.successors_: numpy.ndarray = successors
+        self.probs_: numpy.ndarray = probs
+        self.rewards_: numpy.ndarray = rewards
+        self.initial_: int = initial
+        self.state_index_: Optional[Dict[State,int]] = None # lazy computation
+        self.action_index_: Optional[Dict[Action,int]] = None
+        self.pair_rows_: Optional[Dict[Tuple[int,int],int]] = None
+        self.row_states_: Optional[numpy.ndarray] = None
+        self.outcome_rows_: Optional[numpy.ndarray] = None
+        self.row_rewards_: Optional[numpy.ndarray] = None
+
+    ''' Sizes and index maps. '''
+
+    def nb_states(self) -> int:
+        return len(self.state_ptr_) - 1
+
+    def nb_rows(self) -> int:
+        return len(self.action_ids_)
+
+    def state_indices(self) -> Dict[State,int]:
+        '''
+          The index of each state.
+        '''
+        if self.state_index_ is None:
+            self.state_index_ = { state:i for i,state in enumerate(self.states_) }
+        return self.state_index_
+
+    def action_indices(self) -> Dict[Action,int]:
+        '''
+          The index of each action.
+        '''
+        if self.action_index_ is None:
+            self.action_index_ = { act:i for i,act in enumerate(self.actions_) }
+        return self.action_index_
+
+    def state_index(self, s: State) -> int:
+        return self.state_indices()[s]
+
+    def action_index(self, a: Action) -> int:
+        return self.action_indices()[a]
+
+    def pair_row(self, s: State, a: Action) -> int:
+        '''
+          Returns the row of the pair (s,a), or -1 if the state or the action is unknown 
+          or if the action is not applicable in the state.
+        '''
+        i = self.state_indices().get(s)
+        act = self.action_indices().get(a)
+        if i is None or act is None:
+            return -1
+        if self.pair_rows_ is None:
+            self.pair_rows_ = { pair:k for k,pair in enumerate(zip(self.row_states().tolist(), self.action_ids_.tolist())) }
+        return self.pair_rows_.get((i, act), -1)
+
+    def row(self, i: int, a: int) -> int:
+        '''
+          Returns the row of the pair (state i, action a), or -1 if a is not applicable in state i.
+        '''
+        for k in range(self.state_ptr_[i], self.state_ptr_[i+1]):
+            if self.action_ids_[k] == a:
+                return k
+        return -1
+
+    ''' Derived arrays, computed once and shared by the solvers. '''
+
+    def row_states(self) -> numpy.ndarray:
+        '''
+          The state of each (state,action) row.
+        '''
+        if self.row_states_ is None:
+            self.row_states_ = numpy.repeat(
+                numpy.arange(self.nb_states(), dtype=numpy.int64), numpy.diff(self.state_ptr_))
+        return self.row_states_
+
+    def outcome_rows(self) -> numpy.ndarray:
+        '''
+          The (state,action) row of each outcome.
+        '''
+        if self.outcome_rows_ is None:
+            self.outcome_rows_ = numpy.repeat(
+                numpy.arange(self.nb_rows(), dtype=numpy.int64), numpy.diff(self.row_ptr_))
+        return self.outcome_rows_
+
+    def row_rewards(self) -> numpy.ndarray:
+        '''
+          The expected immediate reward of each (state,action) row.
+        '''
+        if self.row_rewards_ is None:
+            self.row_rewards_ = numpy.bincount(self.outcome_rows(),
+                weights=self.probs_ * self.rewards_, minlength=self.nb_rows())
+        return self.row_rewards_
+
+    ''' The MDP interface. '''
+
+    def states(self) -> List[State]:
+        return self.states_
+
+    def actions(self) -> List[Action]:
+        return self.actions_
+
+    def applicable_actions(self, s: State) -> List[Action]:
+        i = self.state_index(s)
+        return [ self.actions_[a] for a in self.action_ids_[self.state_ptr_[i]:self.state_ptr_[i+1]] ]
+
+    def next_states(self, s: State, a: Action) -> List[ActionOutcome]:
+        k = self.row(self.state_index(s), self.action_index(a))
+        if k < 0:
+            raise KeyError(a) # not applicable in s
+        return [ ActionOutcome(prob=float(self.probs_[j]),
+                    state=self.states_[self.successors_[j]],
+                    reward=float(self.rewards_[j]))
+                for j in range(self.row_ptr_[k], self.row_ptr_[k+1]) ]
+
+    def initial_state(self) -> State:
+        return self.states_[self.initial_]
+
+    def compile(self) -> CompiledMDP:
+        return self
+
+class LazyList(Sequence):
+    '''
+      A list whose elements are created when they are first accessed (and then kept), 
+      so that opening a large model does not create millions of objects.
+    '''
+    def __init__(self, size: int, factory: Callable[[int],Any]):
+        self._elements: List[Any] = [ None ] * size
+        self._factory = factory
+
+    def __len__(self) -> int:
+        return len(self._elements)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [ self[k] for k in range(*i.indices(len(self))) ]
+        result = self._elements[i]
+        if result is None:
+            result = self._factory(i)
+            self._elements[i] = result
+        return result
+
+def compile_mdp(mdp: MDP, pol: Optional[Policy] = None) -> CompiledMDP:
+    '''
+      Compiles the specified MDP into integer-indexed arrays.
+      Each pair state/action is queried exactly once.
+      States that are reached but not listed in mdp.states() are appended to the compiled MDP.
+      If a policy is specified, only the action selected by the policy is compiled in each state.
+    '''
+    if isinstance(mdp, CompiledMDP) and pol is None:
+        return mdp
+
+    states: List[State] = list(mdp.states())
+    state_index: Dict[State,int] = { s:i for i,s in enumerate(states) }
+    actions: List[Action] = list(mdp.actions())
+    action_index: Dict[Action,int] = { a:i for i,a in enumerate(actions) }
+
+    state_ptr = [0]
+    action_ids = []
+    row_ptr = [0]
+    successors = []
+    probs = []
+    rewards = []
+
+    initial = mdp.initial_state()
+    if not initial in state_index:
+        state_index[initial] = len(states)
+        states.append(initial)
+
+    i = 0
+    while i < len(states): # states may grow if some successor is not in mdp.states()
+        s = states[i]
+        for a in (mdp.applicable_actions_view(s) if pol is None else [ pol.action(s) ]):
+            if not a in action_index:
+                action_index[a] = len(actions)
+                actions.append(a)
+            action_ids.append(action_index[a])
+            for outcome in mdp.next_states_view(s, a):
+                succ = outcome.state
+                if not succ in state_index:
+                    state_index[succ] = len(states)
+                    states.append(succ)
+                successors.append(state_index[succ])
+                probs.append(float(outcome.prob))
+                rewards.append(float(outcome.reward))
+            row_ptr.append(len(successors))
+        state_ptr.append(len(action_ids))
+        i += 1
+
+    result = CompiledMDP(states, actions,
+        state_ptr=numpy.array(state_ptr, dtype=numpy.int64),
+        action_ids=numpy.array(action_ids, dtype=numpy.int32),
+        row_ptr=numpy.array(row_ptr, dtype=numpy.int64),
+        successors=numpy.array(successors, dtype=numpy.int32),
+        probs=numpy.array(probs, dtype=numpy.float64),
+        rewards=numpy.array(rewards, dtype=numpy.float64),
+        initial=state_index[initial])
+    result.state_index_ = state_index
+    result.action_index_ = action_index
+    return result
+
+'''
+  Array versions of the basic operations of algos.py.
+  A state value function is an array of size nb_states(),
+  an action value function is an array of size nb_rows().
+'''
+
+def compute_q_from_v_arrays(model: CompiledMDP, v: numpy.ndarray, gamma: float) -> numpy.ndarray:
+    '''
+      Computes the one-step lookahead value of every (state,action) row: 
+      this is a sparse matrix-vector product, computed as a segmented sum over the outcomes.
+    '''
+    # bincount accumulates the outcomes in order, 
+    # so that the result is exactly the one of algos.one_step_lookahead
+    return numpy.bincount(model.outcome_rows(),
+        weights=model.probs_ * (model.rewards_ + gamma * v[model.successors_]), minlength=model.nb_rows())
+
+def greedy_rows(model: CompiledMDP, q: numpy.ndarray) -> Tuple[numpy.ndarray,numpy.ndarray]:
+    '''
+      Computes the segmented max of the specified action value function over the actions of each state.
+      Returns the value of each state and the greedy row of each state
+      (the first row with maximal value, as in algos.greedy_action).
+      States without applicable action get the value 0 and the row -1.
+    '''
+    values = numpy.zeros(model.nb_states())
+    rows = numpy.full(model.nb_states(), -1, dtype=numpy.int64)
+    if model.nb_rows() == 0:
+        return values, rows
+    has_rows = numpy.diff(model.state_ptr_) > 0
+    starts = model.state_ptr_[:-1][has_rows]
+    values[has_rows] = numpy.maximum.reduceat(q, starts)
+    candidates = numpy.where(q == values[model.row_states()], numpy.arange(model.nb_rows()), model.nb_rows())
+    rows[has_rows] = numpy.minimum.reduceat(candidates, starts)
+    return values, rows
+
+def bellman_backup_arrays(model: CompiledMDP, v: numpy.ndarray, gamma: float) -> Tuple[numpy.ndarray,numpy.ndarray]:
+    '''
+      Performs the Bellman backup of the specified state value function.
+      Returns the new state value function and the greedy row of each state.
+    '''
+    return greedy_rows(model, compute_q_from_v_arrays(model, v, gamma))
+
+def policy_rows(model: CompiledMDP, pol: Policy) -> numpy.ndarray:
+    '''
+      Computes the row selected by the specified policy in each state
+      (-1 for the states without applicable actions).
+      Raises ValueError if the policy selects an action that is not applicable.
+    '''
+    result = numpy.full(model.nb_states(), -1, dtype=numpy.int64)
+    actions = model.action_indices()
+    for i, s in enumerate(model.states()):
+        if model.state_ptr_[i] == model.state_ptr_[i+1]:
+            continue # no action to select
+        a = pol.action(s)
+        k = model.row(i, actions.get(a, -1))
+        if k < 0:
+            raise ValueError(f'The policy selects {a} in {s}, where it is not applicable')
+        result[i] = k
+    return result
+
+class CompiledPolicy(Policy):
+    '''
+      A policy of a compiled MDP stored as one action index per state (-1 if the state has no action).
+      action(s) costs one lookup in the state index; 
+      actions() returns the actions of many states at once, as an array of action indices.
+      The array can be saved and loaded again (memory mapped) in another process, 
+      provided that this process uses the same compiled MDP (e.g., opened with smio.load_compiled_mdp):
+      a fingerprint of the MDP (number of states, names of the actions) is saved next to the array
+      (in file + '.json') and checked when loading.
+    '''
+    def __init__(self, model: CompiledMDP, action_ids: numpy.ndarray):
+        if len(action_ids) != model.nb_states():
+            raise ValueError(f'{len(action_ids)} actions for {model.nb_states()} states')
+        self.model_ = model
+        self.action_ids_ = action_ids
+
+    @classmethod
+    def from_rows(cls, model: CompiledMDP, rows: numpy.ndarray) -> CompiledPolicy:
+        '''
+          The policy that selects the specified row in each state (cf. greedy_rows).
+        '''
+        rows = numpy.asarray(rows)
+        return cls(model, numpy.where(rows >= 0, model.action_ids_[numpy.maximum(rows, 0)], -1).astype(numpy.int32))
+
+    @classmethod
+    def from_policy(cls, model: CompiledMDP, pol: Policy) -> CompiledPolicy:
+        return cls.from_rows(model, policy_rows(model, pol))
+
+    def action(self, s: State) -> Optional[Action]:
+        a = self.action_ids_[self.model_.state_index(s)]
+        return None if a < 0 else self.model_.actions_[a]
+
+    def actions(self, state_indices: numpy.ndarray) -> numpy.ndarray:
+        '''
+          The action indices selected in the specified states (given by their indices).
+        '''
+        return self.action_ids_[state_indices]
+
+    def rows(self) -> numpy.ndarray:
+        '''
+          The row selected in each state (-1 if none).
+        '''
+        row_states = self.model_.row_states()
+        selected = self.model_.action_ids_ == self.action_ids_[row_states]
+        result = numpy.full(self.model_.nb_states(), -1, dtype=numpy.int64)
+        result[row_states[selected]] = numpy.flatnonzero(selected)
+        return result
+
+    @staticmethod
+    def fingerprint(model: CompiledMDP, action_name: Callable[[Action],str] = repr) -> Dict[str,Any]:
+        '''
+          What identifies the compiled MDP of a saved policy: the number of states,
+          and the names of the actions (hashed), computed as in smio.write_compiled_mdp.
+        '''
+        digest = hashlib.sha256()
+        for a in model.actions_:
+            digest.update(action_name(a).encode())
+            digest.update(b'\0')
+        return { 'nb_states': model.nb_states(), 'nb_actions': len(model.actions_), 'actions': digest.hexdigest() }
+
+    def save(self, file: str, action_name: Callable[[Action],str] = repr) -> None:
+        '''
+          Saves the action indices (numpy format), and the fingerprint of the MDP in file + '.json'.
+        '''
+        with open(file, 'wb') as output:
+            numpy.save(output, numpy.asarray(self.action_ids_, dtype=numpy.int32))
+        with open(file + '.json', 'w') as output:
+            json.dump(self.fingerprint(self.model_, action_name), output)
+
+    @classmethod
+    def load(cls, file: str, model: CompiledMDP, mmap: bool = True,
+          action_name: Callable[[Action],str] = repr) -> CompiledPolicy:
+        '''
+          Loads a policy saved for the specified compiled MDP;
+          raises ValueError if it was saved for another MDP.
+        '''
+        with open(file + '.json') as input:
+            saved = json.load(input)
+        if saved != cls.fingerprint(model, action_name):
+            raise ValueError(f'{file} was saved for another compiled MDP')
+        action_ids = numpy.load(file, mmap_mode='r' if mmap else None)
+        if len(action_ids) != model.nb_states() or action_ids.max(initial=-1) >= len(model.actions_):
+            raise ValueError(f'{file} does not match the compiled MDP')
+        return cls(model, action_ids)
+
+def compute_v_of_rows_linear(model: CompiledMDP, rows: numpy.ndarray, gamma: float,
+      solver: str = 'direct', tolerance: float = 1e-8,
+      starting_value: Optional[numpy.ndarray] = None) -> numpy.ndarray:
+    '''
+      Computes the value of the policy that selects the specified row in each state
+      by solving the system of linear equations (I - gamma P) v = r
+      where P is the transition matrix of the policy and r its expected immediate reward.
+      States whose row is -1 (no action) have the value 0.
+      The solver is either 'direct' (sparse LU factorisation) 
+      or 'gmres' (iterative, stops when the residual is below the specified tolerance).
+    '''
+    import scipy.sparse # pip install scipy
+    import scipy.sparse.linalg
+
+    n = model.nb_states()
+    has_row = rows >= 0
+    selected = rows[has_row]
+    origins = numpy.flatnonzero(has_row)
+    counts = model.row_ptr_[selected + 1] - model.row_ptr_[selected]
+    # indices of the outcomes of the selected rows, origin state of each outcome
+    offsets = numpy.repeat(model.row_ptr_[selected] - (numpy.cumsum(counts) - counts), counts)
+    outcomes = offsets + numpy.arange(numpy.sum(counts))
+    outcome_origins = numpy.repeat(origins, counts)
+
+    p = scipy.sparse.csr_matrix(
+        (model.probs_[outcomes], (outcome_origins, model.successors_[outcomes])), shape=(n,n))
+    r = numpy.zeros(n)
+    r[has_row] = model.row_rewards()[selected]
+    a = scipy.sparse.identity(n, format='csr') - gamma * p
+
+    if solver == 'direct':
+        return scipy.sparse.linalg.spsolve(a.tocsc(), r)
+    if solver == 'gmres':
+        try:
+            v, info = scipy.sparse.linalg.gmres(a, r, x0=starting_value, rtol=0, atol=tolerance)
+        except TypeError: # scipy < 1.12 calls rtol tol
+            v, info = scipy.sparse.linalg.gmres(a, r, x0=starting_value, tol=0, atol=tolerance)
+        if info != 0:
+            raise RuntimeError(f'gmres did not converge ({info})')
+        return v
+    raise ValueError(f'Unknown solver {solver}')
+
+def value_iteration_arrays(model: CompiledMDP, gamma: float, epsilon: float,
+      starting_value: Optional[numpy.ndarray] = None,
+      callback: Optional[Callable[[float,numpy.ndarray],None]] = None) -> Tuple[numpy.ndarray,numpy.ndarray,int]:
+    '''
+      Performs the value iteration algorithm on the arrays.
+      The callback, if any, is called after each backup with the change of the value function and the new values.
+      Returns the state value function, the greedy row of each state, and the number of backups performed.
+    '''
+    v = numpy.zeros(model.nb_states()) if starting_value is None else starting_value
+    nb_backups = 0
+    while True:
+        newv, rows = bellman_backup_arrays(model, v, gamma)
+        nb_backups += 1
+        diff = numpy.max(numpy.abs(newv - v)) if model.nb_states() > 0 else 0
+        if callback is not None:
+            callback(diff, newv)
+        if diff < epsilon:
+            return newv, rows, nb_backups
+        v = newv
+
+def in_place_value_iteration_arrays(model: CompiledMDP, gamma: float, epsilon: float, order: List[int],
+      rng: Optional[Random] = None) -> Tuple[numpy.ndarray,numpy.ndarray,int]:
+    '''
+      Performs value iteration in place (Gauss-Seidel): 
+      the backup of a state immediately uses the new values of the states backed up before it in the sweep.
+      The states are backed up in the specified order; 
+      if a random generator is specified, the order is shuffled before each sweep.
+      Stops when no value changed by more than epsilon during a sweep.
+      Returns the state value function, the greedy row of each state, and the number of sweeps performed.
+    '''
+    # Python lists are much faster than numpy arrays for element-wise accesses
+    state_ptr = model.state_ptr_.tolist()
+    row_ptr = model.row_ptr_.tolist()
+    successors = model.successors_.tolist()
+    probs = model.probs_.tolist()
+    rewards = model.rewards_.tolist()
+    v = [0.0] * model.nb_states()
+    rows = [-1] * model.nb_states()
+    order = list(order)
+    nb_sweeps = 0
+    while True:
+        if rng is not None:
+            rng.shuffle(order)
+        nb_sweeps += 1
+        diff = 0
+        for i in order:
+            best_row = -1
+            best_val = None
+            for k in range(state_ptr[i], state_ptr[i+1]):
+                val = 0
+                for j in range(row_ptr[k], row_ptr[k+1]):
+                    val += probs[j] * (rewards[j] + gamma * v[successors[j]])
+                if best_val == None or best_val < val:
+                    best_row = k
+                    best_val = val
+            if best_val == None:
+                continue
+            diff = max(diff, abs(best_val - v[i]))
+            v[i] = best_val
+            rows[i] = best_row
+        if diff < epsilon:
+            return numpy.array(v), numpy.array(rows, dtype=numpy.int64), nb_sweeps
+
+# eof
@@ -0,0 +1,44 @@
+import unittest
+
+class Test(unittest.TestCase):
+
+    def test_large_chain(self):
+        import sys
+        from benchmark.generators import chain_smmdp
+        from connectedcomp import compute_connected_components
+
+        # a depth-first search deeper than the recursion limit
+        mdp = chain_smmdp(200, 10)
+        self.assertGreater(len(mdp.states()), sys.getrecursionlimit())
+        for _ in range(2): # no state is kept between calls
+            ccgraph = compute_connected_components(mdp)
+            self.assertEqual(ccgraph.nb_components(), 200)
+            self.assertEqual(len(ccgraph.roots()), 1)
+            root = next(iter(ccgraph.roots()))
+            self.assertIn(mdp.initial_state(), root.states())
+
+    def test_components(self):
+        from compiled import compile_mdp
+        from connectedcomp import strongly_connected_components
+        from statemachine import SMMDP, SMTransition
+
+        mdp = SMMDP([
+            SMTransition('1', 'a', [ ('2', .5, 0), ('4', .5, 0) ]),
+            SMTransition('2', 'a', [ ('3', 1, 0) ]),
+            SMTransition('3', 'a', [ ('1', .5, 0), ('5', .5, 0) ]),
+            SMTransition('4', 'a', [ ('5', 1, 0) ]),
+            SMTransition('5', 'a', [ ('5', 1, 0) ]),
+        ], '1')
+        model = compile_mdp(mdp)
+        components = [ sorted([ repr(model.states_[i]) for i in component ])
+            for component in strongly_connected_components(model) ]
+        self.assertEqual(components, [ ['5'], ['4'], ['1', '2', '3'] ])
+
+def main():
+    unittest.main()
+
+if __name__ == "__main__":
+    main()
+  
+
+# eof
@@ -1,9 +1,9 @@
-from collections import deque
 from typing import Any, List, FrozenSet, Set
 
 import numpy
 
 from MDP import State, MDP
+from compiled import CompiledMDP, compile_mdp
 
 
 class ConnectedComponent:
@@ -68,67 +68,85 @@ class CCGraph:
         return result
 
 
-SCCS = deque()
+def strongly_connected_components(model: CompiledMDP) -> List[List[int]]:
+    '''
+      Computes the strongly connected components of the compiled MDP (Tarjan's algorithm, iterative).
+      Returns the components as lists of state indices, in the order Tarjan finds them:
+      no state of a component can reach a component that comes after it (sinks first).
+      The state-level edges are read from the arrays of the compiled MDP
+      (the outcomes of a state are contiguous), so the cost is linear in the number of outcomes.
+    '''
+    nb_states = model.nb_states()
+    edge_ptr = model.row_ptr_[model.state_ptr_].tolist()
+    successors = model.successors_.tolist()
+    index = [-1] * nb_states
+    low = [0] * nb_states
+    done = [False] * nb_states # the state belongs to a component that is already computed
+    stack = []
+    result = []
+    counter = 0
+    for root in range(nb_states):
+        if index[root] >= 0:
+            continue
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        path = [ root ] # the recursion stack of the depth-first search
+        positions = [ edge_ptr[root] ] # the next edge of each state of the path
+        while path:
+            state = path[-1]
+            j = positions[-1]
+            end = edge_ptr[state+1]
+            while j < end:
+                succ = successors[j]
+                j += 1
+                if index[succ] < 0:
+                    break
+                if not done[succ] and index[succ] < low[state]:
+                    low[state] = index[succ]
+            else:
+                # all the successors are explored
+                path.pop()
+                positions.pop()
+                if low[state] == index[state]:
+                    component = []
+                    while True:
+                        s = stack.pop()
+                        done[s] = True
+                        component.append(s)
+                        if s == state:
+                            break
+                    result.append(component)
+                if path and low[state] < low[path[-1]]:
+                    low[path[-1]] = low[state]
+                continue
+            positions[-1] = j
+            index[succ] = low[succ] = counter
+            counter += 1
+            stack.append(succ)
+            path.append(succ)
+            positions.append(edge_ptr[succ])
+    return result
 
 
 def compute_connected_components(mdp: MDP) -> CCGraph:
-    global SCCS
+    '''
+      Computes the graph of the strongly connected components of the MDP,
+      as a chain in topological order: each component has (at most) one child,
+      the component found just before it by strongly_connected_components,
+      and the last one found is the single root.
+    '''
+    model = mdp.compile()
+    if model is None:
+        model = compile_mdp(mdp)
+    states = model.states()
     result = CCGraph()
-    dfn = dict.fromkeys(mdp.states())
-    low = dict.fromkeys(mdp.states())
-    in_stack = dict.fromkeys(mdp.states())  # 0 -> F; 1 -> T;
-    stack = []
-    for state in mdp.states():
-        # print(dfn[state])
-        if dfn[state] is None:
-            dfs(mdp, state, dfn, low, stack, in_stack)
-
-    leafBot = ConnectedComponent(SCCS.popleft(), set())
-    result.add_connected_component(leafBot)
-    while SCCS:
-        node = ConnectedComponent(SCCS.popleft(), {leafBot})
+    child = None
+    for component in strongly_connected_components(model):
+        node = ConnectedComponent([ states[i] for i in component ], set() if child is None else { child })
         result.add_connected_component(node)
-        leafBot = node
-
+        child = node
     return result
 
 
 # eof
-time = 0
-
-
-def dfs(mdp: MDP, state, dfn, low, stack, in_stack):
-    global time
-    global SCCS
-    dfn[state] = time
-    low[state] = time
-    stack.append(state)
-    in_stack[state] = 1
-
-    time += 1
-
-    statesCanGo = []
-    for action in mdp.applicable_actions(state):
-        for outcome in mdp.next_states(state, action):
-            s = outcome.state
-            statesCanGo.append(s)
-    for y in statesCanGo:
-        if dfn[y] is None:
-            dfs(mdp, y, dfn, low, stack, in_stack)
-            low[state] = min(low[state], low[y])
-        elif in_stack[y] == 1:
-            low[state] = min(low[state], dfn[y])
-
-    if dfn[state] == low[state]:
-
-        pointer = stack[-1]
-        SCC = []
-        while state.__hash__() != pointer.__hash__():
-            s = stack.pop()
-            SCC.append(s)
-            in_stack[s] = None
-            pointer = stack[-1]
-        s = stack.pop()
-        SCC.append(s)
-        in_stack[s] = None
-        SCCS.append(SCC)
@@ -0,0 +1,106 @@
+import unittest
+
+class Test(unittest.TestCase):
+
+    def test(self):
+        import pickle
+        from dungeon import AdventurerType, DungeonState, Party
+
+        peon = AdventurerType('peon', st=0, ma=0)
+        wizard = AdventurerType('wizard', st=.1, ma=1.0)
+
+        # parties are interned
+        p1 = Party(Party(Party(), add=peon), add=wizard)
+        p2 = Party(Party(Party(), add=wizard), add=peon)
+        self.assertIs(p1, p2)
+        self.assertEqual(p1.adventurer_types(), [peon, wizard])
+        self.assertIs(Party(p1, rem=wizard), Party(Party(), add=peon))
+        self.assertTrue(Party().empty_party())
+
+        # states are interned
+        s0 = DungeonState(location='inn')
+        s1 = DungeonState(state=s0, add=peon)
+        s2 = DungeonState(state=s1, location='room')
+        self.assertIs(DungeonState(state=DungeonState(state=s0, location='room'), add=peon), s2)
+        self.assertEqual(s2.location_, 'room')
+        self.assertIs(s2.party_, s1.party_)
+        self.assertTrue(s2.has_visited('inn'))
+        self.assertTrue(s2.has_visited('room'))
+        self.assertFalse(s1.has_visited('room'))
+        self.assertFalse(s1.has_visited('never seen'))
+        self.assertEqual(s2.visited_places_, frozenset(['inn', 'room']))
+        self.assertNotEqual(s1, s2)
+        self.assertEqual(len({ s0, s1, s2, DungeonState(state=s1, location='room') }), 3)
+
+        # going back to a visited location does not change the visited set
+        s3 = DungeonState(state=s2, location='inn')
+        self.assertEqual(s3.visited_places_, s2.visited_places_)
+        self.assertEqual(s3.location_, 'inn')
+
+        # pickled states are interned again
+        self.assertIs(pickle.loads(pickle.dumps(s2)), s2)
+        self.assertIs(pickle.loads(pickle.dumps(s2.party_)), s2.party_)
+
+    def test_two_maps(self):
+        from dungeon import AdventurerType, basic_map, DungeonMDP, DungeonState, HireAction, Map, MonsterType, MoveAction
+        DungeonMDP(basic_map()).states() # interns the parties and actions of the weak peon
+
+        # another map, with a strong adventurer of the same name
+        strong_peon = AdventurerType('peon', st=1, ma=2)
+        map = Map()
+        map.create_inn('inn', for_hire=[(10,strong_peon)])
+        map.set_initial_location('inn')
+        map.create_dangerous_location('room', MonsterType('goblin', st=.3, ma=.0))
+        map.add_path('inn', 'room')
+        mdp = DungeonMDP(map)
+        self.assertEqual(map.location_mask(['inn', 'room']), 3) # the ids only depend on this map
+        s = DungeonState(state=mdp.initial_state(), add=strong_peon)
+        self.assertIs(s.party_.adventurer_types()[0], strong_peon)
+        self.assertEqual([ o.prob for o in mdp.next_states(s, MoveAction('room', strong_peon)) ], [1])
+
+        # the actions of the map hire and move the strong peon
+        hire = mdp.applicable_actions(mdp.initial_state())[1]
+        self.assertIs(hire, HireAction(strong_peon, 10))
+        self.assertIs(hire.adventurer_type_, strong_peon)
+        s = mdp.next_states(mdp.initial_state(), hire)[0].state
+        self.assertIs(s.party_.adventurer_types()[0], strong_peon)
+        move = [ a for a in mdp.applicable_actions(s) if isinstance(a, MoveAction) ][0]
+        self.assertIs(move.adv_, strong_peon)
+        self.assertEqual([ o.prob for o in mdp.next_states(s, move) ], [1])
+
+    def test_mdp(self):
+        from dungeon import basic_map, DungeonMDP
+        mdp = DungeonMDP(basic_map())
+        self.assertEqual(len(mdp.states()), 848)
+        self.assertIs(mdp.initial_state(), mdp.initial_state())
+
+    def test_equality(self):
+        from algos import StateValueFunction
+        from dungeon import basic_map, DungeonMDP, DungeonState
+
+        self.assertEqual(DungeonState(location='x'), DungeonState(location='x'))
+        self.assertEqual(hash(DungeonState(location='x')), hash(DungeonState(location='x')))
+        self.assertNotEqual(DungeonState(location='x'), DungeonState(location='y'))
+        # states built outside the MDP, or by another MDP of an equal map, are equal to the states of the MDP
+        map = basic_map()
+        mdp = DungeonMDP(map)
+        s0 = mdp.initial_state()
+        s = DungeonState(location=map.get_initial_location())
+        self.assertIsNot(s.locations_, s0.locations_)
+        self.assertEqual(s, s0)
+        self.assertEqual(hash(s), hash(s0))
+        other = DungeonMDP(basic_map())
+        self.assertEqual(set(other.states()), set(mdp.states()))
+        v = StateValueFunction()
+        v.set_value(s0, 3.)
+        self.assertEqual(v.value(s), 3.)
+        self.assertEqual(mdp.compile().state_index(s), mdp.compile().state_index(s0))
+
+def main():
+    unittest.main()
+
+if __name__ == "__main__":
+    main()
+  
+
+# eof
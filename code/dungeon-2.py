@@ -0,0 +1,72 @@
+import unittest
+
+class Test(unittest.TestCase):
+
+    def test(self):
+        import pickle
+        from dungeon import AdventurerType, DungeonAction, HireAction, MoveAction, NoAction
+
+        peon = AdventurerType('peon', st=0, ma=0)
+
+        # actions are interned
+        self.assertIs(NoAction(), NoAction())
+        self.assertIs(MoveAction('room1', peon), MoveAction('room1', AdventurerType('peon', st=0, ma=0)))
+        self.assertIs(HireAction(peon, 10), HireAction(peon, 10))
+        self.assertIsNot(MoveAction('room1', peon), MoveAction('room1', None))
+        self.assertNotEqual(HireAction(peon, 10), HireAction(peon, 20))
+
+        # ids are unique
+        actions = [ NoAction(), MoveAction('room1', peon), MoveAction('room1', None), HireAction(peon, 10) ]
+        self.assertEqual(len({ a.id_ for a in actions }), len(actions))
+        for a in actions:
+            self.assertIs(DungeonAction.ACTIONS[a.id_], a)
+            self.assertIs(pickle.loads(pickle.dumps(a)), a)
+
+        # the actions that are not used any more are released
+        import gc
+        action = MoveAction('nowhere', peon)
+        key = action.id_
+        del action
+        gc.collect()
+        self.assertNotIn(key, DungeonAction.ACTIONS)
+        self.assertNotEqual(MoveAction('nowhere', peon).id_, key) # ids are not reused
+
+    def test_mdp(self):
+        from dungeon import basic_map, DungeonMDP
+        mdp = DungeonMDP(basic_map())
+        for s in mdp.states():
+            self.assertEqual(mdp.applicable_actions(s), mdp.compute_applicable_actions(s))
+        # the cache is shared between the states with the same location, party, and visited neighbours
+        self.assertLess(len(mdp.applicable_actions_), len(mdp.states()))
+
+    def test_map_edits(self):
+        import pickle
+        from dungeon import basic_map, DungeonMDP
+        map = basic_map()
+        mdp = DungeonMDP(map)
+        nb_states = len(mdp.states())
+        s0 = [ s for s in mdp.states() if s.location_ == map.get_initial_location() and not s.party_.empty_party() ][0]
+        before = mdp.applicable_actions(s0)
+        mdp.compile()
+        # the caches of the MDP are computed again after an edit of the map
+        map.create_chest_room('secret', 50)
+        map.add_path(map.get_initial_location(), 'secret')
+        self.assertIsNone(mdp.compiled_)
+        after = mdp.applicable_actions(s0)
+        self.assertEqual(after, mdp.compute_applicable_actions(s0))
+        self.assertGreater(len(after), len(before))
+        self.assertGreater(len(mdp.states()), nb_states)
+        # also in a copy of the MDP
+        copy = pickle.loads(pickle.dumps(mdp))
+        copy.states()
+        copy.map_.create_chest_room('another', 50)
+        self.assertIsNone(copy.reachable_states_)
+
+def main():
+    unittest.main()
+
+if __name__ == "__main__":
+    main()
+  
+
+# eof
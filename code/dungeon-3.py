@@ -0,0 +1,58 @@
+import unittest
+
+class Test(unittest.TestCase):
+
+    def test(self):
+        from dungeon import basic_map
+
+        map = basic_map()
+        # all locations allowed
+        self.assertEqual(map.distance('inn_start', 'largechest'), 3)
+        self.assertEqual(map.first_step_towards('inn_start', 'largechest'), 'room1')
+        self.assertEqual(map.distance('inn_market', 'smallchest'), 4)
+        self.assertEqual(map.first_step_towards('inn_market', 'smallchest'), 'room2')
+
+        # paths may only go through the allowed locations (but may end anywhere)
+        visited = map.location_mask(['inn_start', 'room2'])
+        self.assertEqual(map.first_step_towards('inn_start', 'inn_market', visited), 'room2')
+        self.assertEqual(map.distance('inn_start', 'inn_market', visited), 2)
+        self.assertIsNone(map.first_step_towards('inn_start', 'largechest', visited))
+        self.assertEqual(map.first_step_towards('room2', 'room4', visited), 'inn_start')
+        self.assertIs(map.route('room2', visited), map.route('room2', visited))
+        self.assertNotIn((visited, 'room1'), map.routes_) # only the sources asked for are computed
+
+        self.assertEqual(map.frontier(visited), ('inn_market', 'room1', 'room4'))
+        self.assertEqual([ inn for _,inn in map.available_adventurers(visited) ], ['inn_start', 'inn_start'])
+        self.assertIs(map.frontier(visited), map.frontier(visited))
+
+        # the tables are computed again when the map changes
+        map.add_path('inn_start', 'largechest')
+        self.assertEqual(map.distance('inn_start', 'largechest'), 1)
+        self.assertEqual(map.frontier(visited), ('inn_market', 'largechest', 'room1', 'room4'))
+
+    def test_policy(self):
+        from algos import compute_v_of_policy, value_iteration
+        from dungeon import basic_map, DungeonMDP, MoveAction, NoAction
+        from simulate import HandCraftedPolicy
+
+        map = basic_map()
+        mdp = DungeonMDP(map)
+        pol = HandCraftedPolicy(map)
+        for s in mdp.states():
+            a = pol.action(s)
+            self.assertIn(a, mdp.applicable_actions(s))
+            if isinstance(a, MoveAction):
+                self.assertIn(a.locname_, map.neighbours(s.location_))
+        # the hand-crafted policy cannot be better than the optimal policy
+        v = compute_v_of_policy(mdp, pol, .9, .01)
+        _, vopt = value_iteration(mdp, .9, .01)
+        self.assertLessEqual(v.value(mdp.initial_state()), vopt.value(mdp.initial_state()) + .1)
+
+def main():
+    unittest.main()
+
+if __name__ == "__main__":
+    main()
+  
+
+# eof
@@ -1,6 +1,10 @@
 from __future__ import annotations # necessary for typing hint references to class not completely defined yet
 # __future__ does not work with Python3.7<
-from typing import Dict, FrozenSet, List, Optional, Set, Tuple
+import itertools
+import uuid
+from typing import Callable, Dict, FrozenSet, List, Optional, Sequence, Set, Tuple
+from weakref import WeakSet, WeakValueDictionary
+
 from MDP import Action, ActionOutcome, History, MDP, State
 
 class MonsterType:
@@ -83,11 +87,20 @@ class Map:
         self.chest_rooms_: Dict[str,int] = {} # How much money in this location
         # neighbours
         self.neighbours_: Dict[str,Set[str]] = {} # Set of locations next to this location
+        self.location_index_ = LocationIndex() # ids of the locations (cf. location_mask)
+        # tables computed lazily from the above (cf. clear_tables)
+        self.routes_: Dict[Tuple[int,str],Tuple[Dict[str,int],Dict[str,str]]] = {} # (allowed mask, start) -> routes
+        self.frontiers_: Dict[int,Tuple[str]] = {} # visited mask -> unvisited neighbours
+        self.available_adventurers_: Dict[int,Tuple[Tuple[AdventurerType,str]]] = {} # visited mask -> adventurers
+        self.adventurer_types_: Optional[Dict[str,AdventurerType]] = None # name -> type
+        self.dependents_: Optional[WeakSet] = None # objects with caches computed from the map (cf. add_dependent)
 
     ''' The following methods modify the map.  '''
     def create_dangerous_location(self, name: str, monster: MonsterType):
         self.dangerous_locations_[name] = monster
         self.neighbours_[name] = set()
+        self.location_index_.id(name)
+        self.clear_tables()
 
     def create_inn(self, name: str, for_hire: List[Tuple[int,AdventurerType]]):
         ''' 
@@ -96,13 +109,50 @@ class Map:
         '''
         self.inns_[name] = for_hire
         self.neighbours_[name] = set()
+        self.location_index_.id(name)
+        self.clear_tables()
 
     def create_chest_room(self, name: str, reward: int):
         self.chest_rooms_[name] = reward
         self.neighbours_[name] = set()
+        self.location_index_.id(name)
+        self.clear_tables()
 
     def set_initial_location(self, locname: str) -> None:
         self.starting_location_ = locname
+        self.clear_tables()
+
+    def clear_tables(self) -> None:
+        '''
+          Forgets the tables (routes, frontiers, etc.) computed so far: they are computed again when needed.
+          Called whenever the map is modified.
+        '''
+        self.routes_ = {}
+        self.frontiers_ = {}
+        self.available_adventurers_ = {}
+        self.adventurer_types_ = None
+        if self.dependents_ is not None:
+            for dependent in list(self.dependents_):
+                dependent.clear_caches()
+
+    def add_dependent(self, dependent) -> None:
+        '''
+          Registers an object whose caches are computed from the map (e.g., a DungeonMDP):
+          its method clear_caches() is called whenever the map is modified.
+          The map does not keep the object alive.
+        '''
+        if self.dependents_ is None:
+            self.dependents_ = WeakSet()
+        self.dependents_.add(dependent)
+
+    def __getstate__(self):
+        # the tables are not sent to other processes: they are computed again when needed
+        state = self.__dict__.copy()
+        state['routes_'] = {}
+        state['frontiers_'] = {}
+        state['available_adventurers_'] = {}
+        state['dependents_'] = None # they register again (cf. DungeonMDP.__setstate__)
+        return state
 
     def add_path(self, locname1: str, locname2: str):
         '''
@@ -110,6 +160,7 @@ class Map:
         '''
         self.neighbours_[locname1].add(locname2)
         self.neighbours_[locname2].add(locname1)
+        self.clear_tables()
 
     ''' Access methods. '''
 
@@ -152,6 +203,125 @@ class Map:
         '''
         return self.neighbours_[locname]
 
+    ''' 
+      Tables computed lazily.  
+      Sets of locations (the visited locations of a state, the locations a path may go through) 
+      are represented by bitmasks (cf. location_mask), 
+      and the tables are computed once per bitmask.
+    '''
+
+    def location_mask(self, locnames) -> int:
+        '''
+        The bitmask that represents the specified set of locations (with the ids of this map).
+        '''
+        return self.location_index_.mask(locnames)
+
+    def locations_mask(self) -> int:
+        return self.location_mask(self.neighbours_.keys())
+
+    def visited_mask(self, state: DungeonState) -> int:
+        '''
+        The visited locations of the state, as a bitmask with the ids of this map 
+        (states of the MDP of this map already use them).
+        '''
+        if state.locations_ is self.location_index_:
+            return state.visited_mask_
+        return self.location_mask(state.visited_places_)
+
+    def route(self, start: str, allowed_mask: Optional[int] = None) -> Tuple[Dict[str,int],Dict[str,str]]:
+        '''
+        Shortest paths from start, for paths whose intermediate locations are allowed 
+        (the first and last locations of the path do not need to be allowed).
+        If no mask is specified, all locations are allowed.
+        Returns a pair of dictionaries: the distance to each destination, 
+        and the first step towards each destination (unreachable destinations are absent).
+        Ties are broken by the alphabetical order of the locations, so the result is deterministic.
+        '''
+        if allowed_mask is None:
+            allowed_mask = self.locations_mask()
+        result = self.routes_.get((allowed_mask, start))
+        if result is None:
+            ids = self.location_index_
+            distance = { start: 0 }
+            first_step = {}
+            queue = []
+            for nei in sorted(self.neighbours_[start]):
+                if nei in distance:
+                    continue
+                distance[nei] = 1
+                first_step[nei] = nei
+                queue.append(nei)
+            i = 0
+            while i < len(queue): # breadth first search
+                current = queue[i]
+                i += 1
+                if not (allowed_mask >> ids.id(current)) & 1:
+                    continue # a path may end here, but not go through
+                for nei in sorted(self.neighbours_[current]):
+                    if nei in distance:
+                        continue
+                    distance[nei] = distance[current] + 1
+                    first_step[nei] = first_step[current]
+                    queue.append(nei)
+            del distance[start]
+            result = (distance, first_step)
+            self.routes_[(allowed_mask, start)] = result
+        return result
+
+    def first_step_towards(self, start: str, end: str, allowed_mask: Optional[int] = None) -> Optional[str]:
+        '''
+        The first location of a shortest path from start to end going through allowed locations
+        (None if there is no such path).
+        '''
+        return self.route(start, allowed_mask)[1].get(end)
+
+    def distance(self, start: str, end: str, allowed_mask: Optional[int] = None) -> Optional[int]:
+        '''
+        The length of a shortest path from start to end going through allowed locations
+        (None if there is no such path).
+        '''
+        return self.route(start, allowed_mask)[0].get(end)
+
+    def adventurer_types(self) -> Dict[str,AdventurerType]:
+        '''
+        The adventurer types that can be hired in this map, by name.
+        '''
+        if self.adventurer_types_ is None:
+            self.adventurer_types_ = { repr(atype):atype for offer in self.inns_.values() for _,atype in offer }
+        return self.adventurer_types_
+
+    def frontier(self, visited_mask: int) -> Tuple[str]:
+        '''
+        The unvisited locations next to a visited location, in alphabetical order.
+        '''
+        result = self.frontiers_.get(visited_mask)
+        if result is None:
+            places = set()
+            ids = self.location_index_
+            for loc, neis in self.neighbours_.items():
+                if (visited_mask >> ids.id(loc)) & 1:
+                    for nei in neis:
+                        if not (visited_mask >> ids.id(nei)) & 1:
+                            places.add(nei)
+            result = tuple(sorted(places))
+            self.frontiers_[visited_mask] = result
+        return result
+
+    def available_adventurers(self, visited_mask: int) -> Tuple[Tuple[AdventurerType,str]]:
+        '''
+        The adventurer types that can be hired in a visited inn, with the inn, sorted.
+        '''
+        result = self.available_adventurers_.get(visited_mask)
+        if result is None:
+            adventurers = set()
+            for loc, offer in self.inns_.items():
+                if (visited_mask >> self.location_index_.id(loc)) & 1:
+                    for _,atype in offer:
+                        adventurers.add((atype,loc))
+            result = tuple(sorted(adventurers))
+            self.available_adventurers_[visited_mask] = result
+        return result
+
 def collect_adventurer_types(map: Map) -> Set[Tuple[int,AdventurerType]]:
     '''
     Collects the types of all adventurers that can be hired in this map.
@@ -163,45 +333,149 @@ def collect_adventurer_types(map: Map) -> Set[Tuple[int,AdventurerType]]:
     return result
 
 PARTY_MAX_SIZE = 2
+
+class LocationIndex:
+    '''
+    Each location of a map is given a small integer id (in the order the locations are created), 
+    so that a set of locations can be represented by a bitmask.  
+    Each map has its own index (cf. Map.location_index_): the ids do not depend on the other maps.
+    An index is identified by a token, so that an index sent to another process (pickle) and back 
+    is the same object again (cf. location_index), and the states that use it are still interned together.
+    '''
+    __slots__ = ('ids_', 'names_', 'token_', '__weakref__')
+    _registry: WeakValueDictionary = WeakValueDictionary() # token -> index
+
+    def __init__(self, token: Optional[str] = None):
+        self.ids_: Dict[str,int] = {}
+        self.names_: List[str] = []
+        self.token_: str = uuid.uuid4().hex if token is None else token
+        LocationIndex._registry[self.token_] = self
+
+    def __reduce__(self):
+        return (location_index, (self.token_, tuple(self.names_)))
+
+    def id(self, locname: str) -> int:
+        result = self.ids_.get(locname)
+        if result is None:
+            result = len(self.names_)
+            self.ids_[locname] = result
+            self.names_.append(locname)
+        return result
+
+    def mask(self, locnames) -> int:
+        '''
+        The bitmask that represents the specified set of locations.
+        '''
+        result = 0
+        for locname in locnames:
+            result |= 1 << self.id(locname)
+        return result
+
+    def locations(self, mask: int) -> FrozenSet[str]:
+        '''
+        The set of locations represented by the specified bitmask.
+        '''
+        result = []
+        i = 0
+        while mask:
+            if mask & 1:
+                result.append(self.names_[i])
+            mask >>= 1
+            i += 1
+        return frozenset(result)
+
+def location_index(token: str, names: Tuple[str]) -> LocationIndex:
+    '''
+    The index with the specified token (created if it does not exist in this process),
+    which knows at least the specified locations (with the same ids).
+    '''
+    result = LocationIndex._registry.get(token)
+    if result is None:
+        result = LocationIndex(token)
+    for name in names:
+        result.id(name)
+    return result
+
+DEFAULT_LOCATIONS = LocationIndex('default') # the index of the states created without a map
+
+def adventurer_key(adtype: Optional[AdventurerType]) -> Optional[Tuple[str,float,float]]:
+    '''
+    What identifies an adventurer type in the interned objects (parties, actions): 
+    two types with the same name but different strengths (e.g., in two maps) must not be confused.
+    '''
+    return None if adtype is None else (adtype._name, adtype._st, adtype._ma)
+
 class Party:
     '''
     This class represents a party of hero.  A party is essentially a set of adventurers.
+    Parties are interned: two equal parties are the same object, 
+    identified by a small integer (id_) that is never reused.
+    The adventurer types are identified by their name and their strengths (cf. adventurer_key).
+    The interned parties are only kept as long as they are used (e.g., by a state).
     '''
-    def __init__(self, party: Optional[Party] = None, add: Optional[AdventurerType] = None, rem: Optional[AdventurerType] = None):
-        '''
-        Creates a party that contains the specified party + add - rem
-        '''
-        # We store the number of adventurers of each type in a dictionary
-        advs: Dict[AdventurerType,int] = {}
-        if not party is None:
-            for (ad,i) in party.adventurers_:
-                advs[ad] = i
-        if not add is None:
-            if not add in advs:
-                advs[add] = 0
-            advs[add] += 1
-        if not rem is None:
-            # We assume rem is in advs
-            advs[rem] -= 1
-            if advs[rem] == 0:
-                del advs[rem]
-
-        # We now need to make an hashable version of the dictionary.
-        # Dictionaries and lists are not hashable in python.
-        # There is no frozendict in python (actually, seems there is in Python 3.10), 
-        # so we create a tuple of pairs and sort them
-        self.adventurers_: Tuple[Tuple[AdventurerType,int]] = tuple([ 
-            (t,advs[t]) for t in sorted(advs.keys())
-        ])
+    __slots__ = ('adventurers_', 'id_', 'hash_', '__weakref__')
+    _interned: WeakValueDictionary = WeakValueDictionary() # adventurer keys -> party
+    _derived: WeakValueDictionary = WeakValueDictionary() # (party id, add key, rem key) -> party
+    _ids = itertools.count()
+
+    def __new__(cls, party: Optional[Party] = None, add: Optional[AdventurerType] = None, rem: Optional[AdventurerType] = None):
+        '''
+        Returns the party that contains the specified party + add - rem
+        '''
+        key = (None if party is None else party.id_, adventurer_key(add), adventurer_key(rem))
+        result = cls._derived.get(key)
+        if result is None:
+            # We store the number of adventurers of each type in a dictionary
+            advs: Dict[Tuple,List] = {} # adventurer key -> [type, number]
+            if not party is None:
+                for (ad,i) in party.adventurers_:
+                    advs[adventurer_key(ad)] = [ad, i]
+            if not add is None:
+                advs.setdefault(adventurer_key(add), [add, 0])[1] += 1
+            if not rem is None:
+                # We assume rem is in advs
+                entry = advs[adventurer_key(rem)]
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del advs[adventurer_key(rem)]
+
+            # We now need to make an hashable version of the dictionary.
+            # Dictionaries and lists are not hashable in python.
+            # There is no frozendict in python (actually, seems there is in Python 3.10), 
+            # so we create a tuple of pairs and sort them
+            result = cls.from_adventurers(tuple([ (advs[k][0],advs[k][1]) for k in sorted(advs.keys()) ]))
+            cls._derived[key] = result
+        return result
+
+    def __init__(self, *args, **kwargs):
+        pass # everything is done in __new__
+
+    @classmethod
+    def from_adventurers(cls, adventurers: Tuple[Tuple[AdventurerType,int]]) -> Party:
+        '''
+        Returns the (interned) party with the specified sorted tuple of (adventurer type, number).
+        '''
+        key = tuple([ (adventurer_key(ad),i) for ad,i in adventurers ])
+        result = cls._interned.get(key)
+        if result is None:
+            result = object.__new__(cls)
+            result.adventurers_ = adventurers
+            result.id_ = next(cls._ids)
+            result.hash_ = hash(key)
+            cls._interned[key] = result
+        return result
+
+    def __reduce__(self):
+        return (Party.from_adventurers, (self.adventurers_,))
 
     def __eq__(self, party) -> bool:
-        return self.adventurers_ == party.adventurers_
+        return self is party # parties are interned
 
     def __repr__(self) -> str:
         return ','.join([f'{adtype}->{nb}' for (adtype,nb) in self.adventurers_])
 
     def __hash__(self) -> int:
-        return self.adventurers_.__hash__()
+        return self.hash_
 
     def empty_party(self) -> bool: 
         '''
@@ -235,33 +509,85 @@ class DungeonState(State):
     A dungeon state is defined by the current location, 
     the list of locations that have already been visited, 
     and the current party.
+    States are interned: two equal states that use the same location index are the same object.  
+    A state is represented compactly by the id of its party, 
+    the id of its location, and the bitmask of the visited locations 
+    (the ids of the locations come from the location index of the map, cf. LocationIndex); 
+    its hash is computed once, from the names, so that states that use different indices
+    (e.g., built by two maps) are still equal when they have the same party, location and visited locations.
     '''
-    def __init__(self, state: Optional[DungeonState] = None, 
+    __slots__ = ('party_', 'location_', 'location_id_', 'visited_mask_', 'locations_', 'hash_', '_visited_places', '__weakref__')
+    _interned: WeakValueDictionary = WeakValueDictionary() # (index, party id, location id, visited mask) -> state
+
+    def __new__(cls, state: Optional[DungeonState] = None, 
           location: Optional[str] = None, 
           add: Optional[AdventurerType] = None, 
-          rem: Optional[AdventurerType] = None
+          rem: Optional[AdventurerType] = None,
+          locations: Optional[LocationIndex] = None
           ):
         '''
-        Creates a new dungeon state from the specified state 
+        Returns the dungeon state obtained from the specified state 
         where the party is now in the specified location, 
         the first specified adventurer (add) is added to the party, 
         and the second specified adventurer (rem) is removed from the party.
+        A new state (without a previous state) uses the specified location index 
+        (by default, the index shared by such states: cf. DungeonMDP.initial_state for the index of the map).
+        '''
+        party = Party() if state is None else Party(state.party_, add=add, rem=rem)
+        if state is not None:
+            locations = state.locations_
+        elif locations is None:
+            locations = DEFAULT_LOCATIONS
+        if location is not None:
+            locid = locations.id(location)
+            mask = (0 if state is None else state.visited_mask_) | (1 << locid)
+        elif state is not None:
+            locid = state.location_id_
+            mask = state.visited_mask_
+        else:
+            locid = -1
+            mask = 0
+        return cls.from_ids(party, locid, mask, locations)
+
+    def __init__(self, *args, **kwargs):
+        pass # everything is done in __new__
+
+    @classmethod
+    def from_ids(cls, party: Party, locid: int, mask: int, locations: LocationIndex) -> DungeonState:
+        '''
+        Returns the (interned) state with the specified party, location id (-1 for no location), and visited mask.
         '''
-        self.party_: Party = Party() if state is None else Party(state.party_, add=add, rem=rem)
-        self.location_: str = location if location is not None else (state.location_ if state is not None else None)
-        visited = set() if state is None else set(state.visited_places_)
-        if not location is None:
-            visited.add(location)
-        self.visited_places_: FrozenSet[str] = frozenset(visited)
+        key = (id(locations), party.id_, locid, mask) # the state keeps the index alive
+        result = cls._interned.get(key)
+        if result is None:
+            result = object.__new__(cls)
+            result.party_ = party
+            result.location_ = None if locid < 0 else locations.names_[locid]
+            result.location_id_ = locid
+            result.visited_mask_ = mask
+            result.locations_ = locations
+            result._visited_places = None
+            result.hash_ = hash((party, result.location_, result.visited_places_))
+            cls._interned[key] = result
+        return result
+
+    def __reduce__(self):
+        # ids are specific to a process: the state is rebuilt from names
+        return (make_dungeon_state, (self.party_, self.location_, tuple(sorted(self.visited_places_)), self.locations_))
+
+    @property
+    def visited_places_(self) -> FrozenSet[str]:
+        if self._visited_places is None:
+            self._visited_places = self.locations_.locations(self.visited_mask_)
+        return self._visited_places
 
     def __eq__(self, state) -> bool:
-        if not self.party_ == state.party_:
-            return False
-        if not self.location_ == state.location_:
-            return False
-        if not self.visited_places_ == state.visited_places_:
-            return False
-        return True
+        if self is state:
+            return True # states are interned
+        # states of different indices are compared by value
+        return isinstance(state, DungeonState) and self.locations_ is not state.locations_ \
+            and self.hash_ == state.hash_ and self.party_ is state.party_ \
+            and self.location_ == state.location_ and self.visited_places_ == state.visited_places_
 
     def __repr__(self) -> str:
         from colorama import Fore
@@ -272,25 +598,71 @@ class DungeonState(State):
         return f'{party_string} -- {location_string} -- {visited_string}'
 
     def __hash__(self) -> int:
-        v1 = self.party_.__hash__()
-        v2 = self.location_.__hash__()
-        v3 = self.visited_places_.__hash__()
-        return v1 + v2 + v3 # it's a good hashing function assuming all other hashing functions are good
+        return self.hash_
 
     def has_visited(self, locname: str) -> bool:
         '''
         Has the party already visited the specified location?
         '''
-        return locname in self.visited_places_
+        locid = self.locations_.ids_.get(locname)
+        return locid is not None and (self.visited_mask_ >> locid) & 1 == 1
 
     def party(self) -> Party:
         return self.party_
 
+def make_dungeon_state(party: Party, location: Optional[str], visited: Tuple[str], locations: LocationIndex) -> DungeonState:
+    '''
+    Returns the dungeon state with the specified party, location, and visited locations.
+    '''
+    return DungeonState.from_ids(party, -1 if location is None else locations.id(location), locations.mask(visited), locations)
+
+def dungeon_state_key(s: DungeonState) -> str:
+    '''
+    A plain string that identifies the state (e.g., to store it in a file): 
+    location|party|visited locations (sorted).
+    '''
+    location = '' if s.location_ is None else s.location_
+    return f'{location}|{s.party_}|{",".join(sorted(s.visited_places_))}'
+
 class DungeonAction(Action):
     '''
     Generic class for actions in the dungeon MDP. 
     The classes are actually implemented below.
+    Actions are interned: creating an action that already exists returns the existing object, 
+    so that actions are compared by identity, and each action has a unique integer id (id_) that is never reused.
+    The interned actions are only kept as long as they are used (e.g., by an MDP), as the parties.
+    The adventurer types of the parameters are identified by their name and their strengths (cf. adventurer_key),
+    so that the action of a map never stands for the action of another map with a different adventurer.
     '''
+    __slots__ = ('id_', '__weakref__')
+    _pool: WeakValueDictionary = WeakValueDictionary() # (class, parameter keys) -> action
+    ACTIONS: WeakValueDictionary = WeakValueDictionary() # id -> action
+    _ids = itertools.count()
+
+    def __new__(cls, *parameters):
+        key = (cls,) + tuple([ adventurer_key(p) if isinstance(p, AdventurerType) else p for p in parameters ])
+        result = DungeonAction._pool.get(key)
+        if result is None:
+            result = object.__new__(cls)
+            result.id_ = next(DungeonAction._ids)
+            result.set_parameters(*parameters)
+            DungeonAction._pool[key] = result
+            DungeonAction.ACTIONS[result.id_] = result
+        return result
+
+    def __init__(self, *parameters):
+        pass # everything is done in __new__
+
+    def set_parameters(self, *parameters) -> None:
+        pass
+
+    def parameters(self) -> Tuple:
+        return ()
+
+    def __reduce__(self):
+        # ids are specific to a process: the action is interned again from its parameters
+        return (type(self), self.parameters())
+
     def next_states(self, state: DungeonState, map: Map) -> List[ActionOutcome]:
         '''
           Indicates the possible outcomes when this action is applied in the specified state. 
@@ -303,21 +675,21 @@ class HireAction(DungeonAction):
     The action of hiring the specified adventurer at the specified price.  
     This action has only one outcome.
     '''
-    def __init__(self, adventurer_type, price):
+    __slots__ = ('adventurer_type_', 'price_')
+
+    def __new__(cls, adventurer_type, price):
+        return super().__new__(cls, adventurer_type, price)
+
+    def set_parameters(self, adventurer_type, price) -> None:
         self.adventurer_type_ = adventurer_type
         self.price_ = price
 
+    def parameters(self) -> Tuple:
+        return (self.adventurer_type_, self.price_)
+
     def __repr__(self) -> str:
         return f'Hire {self.adventurer_type_._name} for {self.price_}'
 
-    def __hash__(self) -> int:
-        return self.adventurer_type_.__hash__() + self.price_
-
-    def __eq__(self, act) -> bool: 
-        if not type(self) == type(act):
-            return False
-        return (self.adventurer_type_ == act.adventurer_type_) and (self.price_ == act.price_)
-
     def next_states(self, state: DungeonState, map: Map) -> List[ActionOutcome]:
         new_state = DungeonState(state=state,add=self.adventurer_type_)
         return [ ActionOutcome(prob=1.0, state=new_state, reward=-self.price_) ]
@@ -334,21 +706,21 @@ class MoveAction(DungeonAction):
     (and the first adventurer is dead).  
     Otherwise, the party moves in.
     '''
-    def __init__(self, locname: str, adv: AdventurerType):
+    __slots__ = ('locname_', 'adv_')
+
+    def __new__(cls, locname: str, adv: AdventurerType):
+        return super().__new__(cls, locname, adv)
+
+    def set_parameters(self, locname: str, adv: AdventurerType) -> None:
         self.locname_: str = locname
         self.adv_: AdventurerType = adv
 
+    def parameters(self) -> Tuple:
+        return (self.locname_, self.adv_)
+
     def __repr__(self) -> str:
         return f'Move {self.locname_} {self.adv_}'
 
-    def __hash__(self) -> int:
-        return self.locname_.__hash__() + self.adv_.__hash__()
-
-    def __eq__(self, act) -> bool:
-        if not type(self) == type(act):
-            return False
-        return self.locname_ == act.locname_ and self.adv_ == act.adv_
-
     def next_states(self, state: DungeonState, map: Map) -> List[ActionOutcome]:
         # if the new place is already visited, just move in
         if state.has_visited(self.locname_):
@@ -375,20 +747,56 @@ class MoveAction(DungeonAction):
         return result
 
 class NoAction(DungeonAction):
-    def __eq__(self, act) -> bool:
-        if not type(self) == type(act):
-            return False
-        return True
+    __slots__ = ()
+
+    def __new__(cls):
+        return super().__new__(cls)
 
     def __repr__(self) -> str:
         return 'No Action'
 
-    def __hash__(self) -> int:
-        return self.__repr__().__hash__()
-
     def next_states(self, state: DungeonState, map: Map) -> List[ActionOutcome]:
         return [ ActionOutcome(prob=1.0,state=state,reward=0) ]
 
+def dungeon_action_key(a: DungeonAction) -> str:
+    '''
+    A plain string that identifies the action (e.g., to store it in a file): 
+    hire|adventurer type|price, move|location|adventurer type (empty if none), or none.
+    '''
+    if isinstance(a, HireAction):
+        return f'hire|{a.adventurer_type_}|{a.price_}'
+    if isinstance(a, MoveAction):
+        return f'move|{a.locname_}|{"" if a.adv_ is None else a.adv_}'
+    return 'none'
+
+def dungeon_action_from_key(key: str, map: Map) -> DungeonAction:
+    '''
+    The action identified by the key (cf. dungeon_action_key), for the specified map.
+    '''
+    fields = key.split('|')
+    if fields[0] == 'hire':
+        price = float(fields[2])
+        return HireAction(map.adventurer_types()[fields[1]], int(price) if price.is_integer() else price)
+    if fields[0] == 'move':
+        return MoveAction(fields[1], map.adventurer_types()[fields[2]] if fields[2] else None)
+    return NoAction()
+
+def dungeon_state_from_key(key: str, map: Map) -> DungeonState:
+    '''
+    The state identified by the key (cf. dungeon_state_key), for the specified map.
+    '''
+    location, party, visited = key.split('|')
+    types = map.adventurer_types()
+    adventurers = []
+    for entry in (party.split(',') if party else []):
+        name, nb = entry.split('->')
+        adventurers.append((types[name], int(nb)))
+    adventurers.sort(key=lambda pair: adventurer_key(pair[0]))
+    return make_dungeon_state(Party.from_adventurers(tuple(adventurers)), 
+        location if location else None, 
+        tuple(visited.split(',')) if visited else (),
+        map.location_index_)
+
 def reachable_states(mdp: MDP, start: Optional[State] = None) -> List[State]:
     '''
     Computes the list of states that are reachable in the specified mdp.
@@ -403,8 +811,8 @@ def reachable_states(mdp: MDP, start: Optional[State] = None) -> List[State]:
 
     while open:
         state = open.pop()
-        for act in mdp.applicable_actions(state):
-            for outcome in mdp.next_states(state, act):
+        for act in mdp.applicable_actions_view(state):
+            for outcome in mdp.next_states_view(state, act):
                 next_state = outcome.state
                 if next_state in result:
                     continue
@@ -413,6 +821,19 @@ def reachable_states(mdp: MDP, start: Optional[State] = None) -> List[State]:
     
     return list(result)
 
+def dungeon_upper_bound(map: Map) -> Callable[[DungeonState],float]:
+    '''
+    An upper bound of the optimal value for the heuristic search solvers (cf. heuristic.py):
+    the sum of the rewards of the chests that are not collected yet.
+    It is admissible because chests are the only positive rewards, and each chest is collected once
+    (this remains true for the variants of modelling.py, which only add costs).
+    '''
+    chests = sorted(map.chest_rooms_.items())
+    total = sum([ reward for _,reward in chests ])
+    def bound(s: DungeonState) -> float:
+        return total - sum([ reward for room,reward in chests if s.has_visited(room) ])
+    return bound
+
 class DungeonMDP(MDP):
     '''
       The MDP that represents the travelling into the dungeon.
@@ -421,10 +842,37 @@ class DungeonMDP(MDP):
         self.map_ = map
         self.reachable_states_ = None # lazy computation
         self.actions_ = None
+        self.compiled_ = None
+        self.applicable_actions_: Dict[Tuple[int,int,int],Tuple[Action]] = {} # cf. applicable_actions
+        self.neighbour_masks_: Dict[str,int] = {}
+        map.add_dependent(self)
+
+    def clear_caches(self) -> None:
+        '''
+        Forgets everything computed from the map (states, actions, compiled MDP):
+        called by the map when it is modified (cf. Map.clear_tables).
+        '''
+        self.reachable_states_ = None
+        self.actions_ = None
+        self.compiled_ = None
+        self.applicable_actions_ = {}
+        self.neighbour_masks_ = {}
+
+    def __getstate__(self):
+        # the caches are indexed by location and party ids, which are specific to a process
+        state = self.__dict__.copy()
+        state['applicable_actions_'] = {}
+        state['neighbour_masks_'] = {}
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.map_.add_dependent(self)
 
     def states(self) -> List[State]:
         if self.reachable_states_ == None:
-            self.reachable_states_ = reachable_states(self)
+            # the states of the compiled MDP (e.g., from the model cache) are the reachable states
+            self.reachable_states_ = reachable_states(self) if self.compiled_ is None else list(self.compiled_.states())
         return self.reachable_states_
 
     def actions(self) -> List[Action]:
@@ -444,6 +892,29 @@ class DungeonMDP(MDP):
         return self.actions_
 
     def applicable_actions(self, s: State) -> List[Action]:
+        return list(self.applicable_actions_view(s))
+
+    def applicable_actions_view(self, s: State) -> Sequence[Action]:
+        '''
+        The applicable actions only depend on the location, on the party, 
+        and (if the party is empty) on the visited neighbours: 
+        they are computed once for each combination (and shared by the states of the combination).
+        '''
+        if s.locations_ is not self.map_.location_index_: # a state built outside this MDP
+            return tuple(self.compute_applicable_actions(s))
+        locname = s.location_
+        neighbours = self.neighbour_masks_.get(locname)
+        if neighbours is None:
+            neighbours = self.map_.location_mask(self.map_.neighbours(locname))
+            self.neighbour_masks_[locname] = neighbours
+        key = (s.location_id_, s.party_.id_, s.visited_mask_ & neighbours if s.party_.empty_party() else 0)
+        result = self.applicable_actions_.get(key)
+        if result is None:
+            result = tuple(self.compute_applicable_actions(s))
+            self.applicable_actions_[key] = result
+        return result
+
+    def compute_applicable_actions(self, s: State) -> List[Action]:
         result = [ NoAction() ]
         map = self.map_
         locname = s.location_
@@ -475,7 +946,24 @@ class DungeonMDP(MDP):
         return a.next_states(s, self.map_)
     
     def initial_state(self) -> DungeonState:
-        return DungeonState(location=self.map_.get_initial_location())
+        return DungeonState(location=self.map_.get_initial_location(), locations=self.map_.location_index_)
+
+    def compile(self) -> MDP:
+        if self.compiled_ == None:
+            from compiled import compile_mdp
+            self.compiled_ = compile_mdp(self)
+        return self.compiled_
+
+    def explore(self, processes: Optional[int] = None, **options) -> MDP:
+        '''
+        Computes the reachable states and the compiled MDP in one breadth-first exploration
+        (possibly in several processes, cf. explore.py for the options);
+        states() and compile() then reuse the result.
+        '''
+        from explore import explore_compiled
+        self.compiled_ = explore_compiled(self, processes, **options)
+        self.reachable_states_ = self.compiled_.states_
+        return self.compiled_
 
 # end of class
 
@@ -0,0 +1,86 @@
+import unittest
+
+class Test(unittest.TestCase):
+
+    def test(self):
+        from dungeon import basic_map, DungeonMDP, reachable_states
+        from explore import explore_states
+
+        mdp = DungeonMDP(basic_map())
+        expected = set(reachable_states(mdp))
+        serial = explore_states(mdp)
+        self.assertEqual(len(serial), len(expected))
+        self.assertEqual(set(serial), expected)
+        self.assertIs(serial[0], mdp.initial_state())
+        parallel = explore_states(mdp, processes=2, min_parallel=10)
+        self.assertEqual(set(parallel), expected)
+        self.assertEqual(len(parallel), len(expected))
+
+    def test_compiled(self):
+        from dungeon import basic_map, DungeonMDP
+        from explore import explore_compiled
+
+        mdp = DungeonMDP(basic_map())
+        for processes in [None, 2]:
+            model = explore_compiled(mdp, processes, min_parallel=10)
+            self.assertEqual(model.nb_states(), 848)
+            self.assertIs(model.states_[model.initial_], mdp.initial_state())
+            for s in model.states():
+                self.assertEqual(model.applicable_actions(s), mdp.applicable_actions(s))
+                for a in model.applicable_actions(s):
+                    self.assertEqual(
+                        sorted([ (id(o.state), o.prob, o.reward) for o in model.next_states(s, a) ]),
+                        sorted([ (id(o.state), o.prob, o.reward) for o in mdp.next_states(s, a) ]))
+
+        # states() and compile() reuse the exploration
+        mdp = DungeonMDP(basic_map())
+        model = mdp.explore()
+        self.assertIs(mdp.compile(), model)
+        self.assertEqual(len(mdp.states()), 848)
+
+    def test_limits(self):
+        from dungeon import basic_map, DungeonMDP
+        from explore import explore_states, ExplorationLimitError
+
+        mdp = DungeonMDP(basic_map())
+        with self.assertRaises(ExplorationLimitError) as context:
+            explore_states(mdp, max_states=100)
+        self.assertGreater(len(context.exception.states_), 100)
+        with self.assertRaises(ExplorationLimitError):
+            explore_states(mdp, max_bytes=1000)
+        levels = []
+        explore_states(mdp, progress=levels.append)
+        self.assertEqual(levels[-1]['states'], 848)
+        self.assertEqual(levels[-1]['frontier'], 0)
+
+    def test_fallback(self):
+        import threading
+        from statemachine import SMMDP, SMTransition
+        from explore import Explorer
+
+        # the states of this MDP cannot be sent to another process
+        mdp = SMMDP([ SMTransition(str(i), 'next', [ (str((i+1) % 50), 1., 0.) ]) for i in range(50) ], '0')
+        for s in mdp.states():
+            s.lock = threading.Lock()
+        explorer = Explorer(mdp, processes=2, min_parallel=1)
+        states, _ = explorer.explore()
+        self.assertEqual(len(states), 50)
+        self.assertFalse(explorer.parallel_)
+        self.assertIsInstance(explorer.fallback_error_, TypeError)
+
+        # other errors are not hidden by the fallback
+        class Broken(SMMDP):
+            def applicable_actions_view(self, s):
+                raise RuntimeError('broken')
+        mdp = Broken([ SMTransition(str(i), 'next', [ (str((i+1) % 50), 1., 0.) ]) for i in range(50) ], '0')
+        with self.assertRaises(RuntimeError):
+            Explorer(mdp, processes=2, min_parallel=1).explore()
+
+def main():
+    unittest.main()
+
+if __name__ == "__main__":
+    main()
+  
+
+# eof
@@ -0,0 +1,260 @@
+'''
+  Level-synchronous exploration of the reachable states of an MDP.
+  reachable_states() (dungeon.py) and state_machine_from_mdp() (statemachine.py)
+  expand the reachable states one at a time;
+  the explorer below expands a whole frontier (all the states at the same depth) at once,
+  possibly in a pool of processes, and then merges the successors into the next frontier.
+
+  The states are numbered in the order in which they are discovered (breadth-first),
+  so that the explorer can build a compiled model (cf. compiled.py) directly,
+  without querying the MDP a second time.
+
+  Parallel exploration requires the MDP, its states and its actions to be picklable
+  (with the fork start method, only the states and actions need to be);
+  if this is not the case, the exploration silently continues in the current process.
+  States that are sent to or received from another process are copies:
+  they are deduplicated with a canonical key (by default, the state itself,
+  which works for states that define __eq__ and __hash__, or that are interned as DungeonStates).
+'''
+from __future__ import annotations # necessary for typing hint references to class not completely defined yet
+# __future__ does not work with Python3.7<
+import pickle
+import sys
+import time
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from MDP import Action, MDP, State
+
+class ExplorationLimitError(RuntimeError):
+    '''
+      Raised when the exploration exceeds its state budget or its memory cap.
+      The states discovered so far are available in states_.
+    '''
+    def __init__(self, message: str, states: List[State]):
+        super().__init__(message)
+        self.states_ = states
+
+''' Worker side. '''
+
+_WORKER_MDP: Optional[MDP] = None
+_WORKER_ACTIONS: Dict[Action,int] = {}
+
+def _init_worker(mdp: MDP) -> None:
+    global _WORKER_MDP, _WORKER_ACTIONS
+    _WORKER_MDP = mdp
+    _WORKER_ACTIONS = { a:i for i,a in enumerate(mdp.actions()) }
+
+def _expand_successors(mdp: MDP, states: List[State]) -> List[State]:
+    '''
+      The successors of the specified states (without duplicates).
+    '''
+    result = {}
+    for s in states:
+        for a in mdp.applicable_actions_view(s):
+            for outcome in mdp.next_states_view(s, a):
+                result[outcome.state] = None
+    return list(result)
+
+def _expand_transitions(mdp: MDP, states: List[State], action_index: Dict[Action,int]) -> List[List[Tuple[Any, List[Tuple[State,float,float]]]]]:
+    '''
+      The transitions of each of the specified states, as a list (action, outcomes) per state.
+      Actions that appear in action_index are replaced by their index,
+      so that the process that receives the result uses its own action objects.
+    '''
+    result = []
+    for s in states:
+        rows = []
+        for a in mdp.applicable_actions_view(s):
+            rows.append((action_index.get(a, a),
+                [ (outcome.state, float(outcome.prob), float(outcome.reward)) for outcome in mdp.next_states_view(s, a) ]))
+        result.append(rows)
+    return result
+
+def _worker_successors(states: List[State]) -> List[State]:
+    return _expand_successors(_WORKER_MDP, states)
+
+def _worker_transitions(states: List[State]) -> List[List[Tuple[Any, List[Tuple[State,float,float]]]]]:
+    return _expand_transitions(_WORKER_MDP, states, _WORKER_ACTIONS)
+
+''' Explorer. '''
+
+def log_progress(info: Dict[str,Any]) -> None:
+    '''
+      A progress callback that prints one line per level.
+    '''
+    print(f'depth {info["depth"]}: {info["states"]} states, frontier {info["frontier"]}, '
+        f'{info["bytes"] // 1024} KiB, {info["time"]:.2f}s', file=sys.stderr)
+
+class Explorer:
+    '''
+      Explores the reachable states of an MDP, level by level.
+      * processes: number of worker processes (None or 1 means no parallelism);
+      * key: computes the canonical key of a state (by default the state itself);
+      * max_states: maximal number of states (the exploration raises ExplorationLimitError beyond);
+      * max_bytes: maximal (estimated) memory used by the explorer (idem);
+      * progress: function called after each level with a dictionary
+        (depth, states, frontier, bytes, time), e.g. log_progress;
+      * min_parallel: frontiers smaller than this are expanded in the current process,
+        since sending them to the workers would cost more than expanding them.
+    '''
+    def __init__(self, mdp: MDP,
+          processes: Optional[int] = None,
+          key: Optional[Callable[[State],Hashable]] = None,
+          max_states: Optional[int] = None,
+          max_bytes: Optional[int] = None,
+          progress: Optional[Callable[[Dict[str,Any]],None]] = None,
+          min_parallel: int = 256):
+        self.mdp_ = mdp
+        self.processes_ = processes
+        self.key_ = key
+        self.max_states_ = max_states
+        self.max_bytes_ = max_bytes
+        self.progress_ = progress
+        self.min_parallel_ = min_parallel
+        self.parallel_ = processes is not None and processes > 1 # becomes False if the pool fails
+        self.fallback_error_: Optional[BaseException] = None # why the pool failed
+        self._pool = None
+
+    def _get_pool(self):
+        if self._pool is None:
+            import multiprocessing
+            self._pool = multiprocessing.Pool(self.processes_, initializer=_init_worker, initargs=(self.mdp_,))
+        return self._pool
+
+    def _close(self) -> None:
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool = None
+
+    def _expand(self, frontier: List[State], transitions: bool, action_index: Dict[Action,int]) -> List[Any]:
+        '''
+          Expands the frontier, in parallel if possible.
+          Returns one list per chunk (of successors, or of transitions per state);
+          the chunks are in the order of the frontier.
+        '''
+        if self.parallel_ and len(frontier) >= self.min_parallel_:
+            chunk_size = max(1, len(frontier) // (4 * self.processes_))
+            chunks = [ frontier[i:i+chunk_size] for i in range(0, len(frontier), chunk_size) ]
+            import multiprocessing
+            try:
+                return self._get_pool().map(_worker_transitions if transitions else _worker_successors, chunks)
+            except (pickle.PicklingError, TypeError, AttributeError, OSError, multiprocessing.ProcessError) as e:
+                # the MDP or its states cannot be pickled, or the workers cannot be started;
+                # errors of the MDP itself are raised again by the serial expansion below
+                self._close()
+                self.parallel_ = False
+                self.fallback_error_ = e
+        if transitions:
+            return [ _expand_transitions(self.mdp_, frontier, action_index) ]
+        return [ _expand_successors(self.mdp_, frontier) ]
+
+    def explore(self, start: Optional[State] = None, transitions: bool = False) -> Tuple[List[State], Optional[Tuple]]:
+        '''
+          Explores the states reachable from start (by default the initial state).
+          Returns the list of states in the order of discovery and,
+          if transitions is True, the arrays of the compiled model
+          (actions, state_ptr, action_ids, row_ptr, successors, probs, rewards) as lists.
+        '''
+        if start is None:
+            start = self.mdp_.initial_state()
+        key = self.key_ if self.key_ is not None else (lambda s: s)
+        actions: List[Action] = list(self.mdp_.actions()) if transitions else []
+        action_index: Dict[Action,int] = { a:i for i,a in enumerate(actions) }
+
+        states: List[State] = [ start ]
+        index: Dict[Hashable,int] = { key(start): 0 }
+        nb_bytes = sys.getsizeof(start)
+        state_ptr = [0]
+        action_ids = []
+        row_ptr = [0]
+        successors = []
+        probs = []
+        rewards = []
+
+        def add(s: State) -> int:
+            nonlocal nb_bytes
+            k = key(s)
+            i = index.get(k)
+            if i is None:
+                i = len(states)
+                index[k] = i
+                states.append(s)
+                nb_bytes += sys.getsizeof(s) + 100 # approximate cost of the state and of its entry in the index
+            return i
+
+        def check(depth: int) -> None:
+            if self.max_states_ is not None and len(states) > self.max_states_:
+                raise ExplorationLimitError(f'More than {self.max_states_} states at depth {depth}', states)
+            if self.max_bytes_ is not None and nb_bytes > self.max_bytes_:
+                raise ExplorationLimitError(f'More than {self.max_bytes_} bytes at depth {depth}', states)
+
+        begin = time.perf_counter()
+        depth = 0
+        level_start, level_end = 0, 1
+        try:
+            while level_start < level_end:
+                frontier = states[level_start:level_end]
+                for chunk in self._expand(frontier, transitions, action_index):
+                    if not transitions:
+                        for succ in chunk:
+                            add(succ)
+                        continue
+                    for rows in chunk: # the rows of each state, in the order of the frontier
+                        for act, outcomes in rows:
+                            if not isinstance(act, int):
+                                if not act in action_index:
+                                    action_index[act] = len(actions)
+                                    actions.append(act)
+                                act = action_index[act]
+                            action_ids.append(act)
+                            for succ, prob, reward in outcomes:
+                                successors.append(add(succ))
+                                probs.append(prob)
+                                rewards.append(reward)
+                            row_ptr.append(len(successors))
+                            nb_bytes += 20 * len(outcomes) + 12 # size of the compiled arrays
+                        state_ptr.append(len(action_ids))
+                    check(depth)
+                check(depth)
+                depth += 1
+                level_start, level_end = level_end, len(states)
+                if self.progress_ is not None:
+                    self.progress_({ 'depth': depth, 'states': len(states), 'frontier': level_end - level_start,
+                        'bytes': nb_bytes, 'time': time.perf_counter() - begin })
+        finally:
+            self._close()
+
+        if not transitions:
+            return states, None
+        return states, (actions, state_ptr, action_ids, row_ptr, successors, probs, rewards)
+
+def explore_states(mdp: MDP, start: Optional[State] = None, processes: Optional[int] = None, **options) -> List[State]:
+    '''
+      Computes the list of states that are reachable in the specified MDP,
+      in breadth-first order (the same states as reachable_states() in dungeon.py).
+      The options are those of Explorer.
+    '''
+    states, _ = Explorer(mdp, processes, **options).explore(start)
+    return states
+
+def explore_compiled(mdp: MDP, processes: Optional[int] = None, **options):
+    '''
+      Explores the MDP from its initial state and returns the corresponding compiled MDP (cf. compiled.py).
+      Each pair state/action is queried exactly once.
+      The options are those of Explorer.
+    '''
+    import numpy # pip install numpy
+    from compiled import CompiledMDP
+
+    explorer = Explorer(mdp, processes, **options)
+    states, (actions, state_ptr, action_ids, row_ptr, successors, probs, rewards) = explorer.explore(transitions=True)
+    return CompiledMDP(states, actions,
+        state_ptr=numpy.array(state_ptr, dtype=numpy.int64),
+        action_ids=numpy.array(action_ids, dtype=numpy.int32),
+        row_ptr=numpy.array(row_ptr, dtype=numpy.int64),
+        successors=numpy.array(successors, dtype=numpy.int32),
+        probs=numpy.array(probs, dtype=numpy.float64),
+        rewards=numpy.array(rewards, dtype=numpy.float64),
+        initial=0)
+
+# eof
@@ -0,0 +1,57 @@
+import unittest
+
+class Test(unittest.TestCase):
+
+    def test(self):
+        from algos import compute_v_of_policy, value_iteration
+        from benchmark.generators import random_dungeon_map
+        from dungeon import basic_map, dungeon_upper_bound, DungeonMDP
+        from heuristic import lao_star, lrtdp
+        from instrumentation import SolverStats
+
+        gamma = .95
+        for map in [ basic_map(), random_dungeon_map(9, 2, 3) ]:
+            mdp = DungeonMDP(map)
+            bound = dungeon_upper_bound(map)
+            _, v = value_iteration(DungeonMDP(map), gamma, .0001)
+            optimal = v.value(mdp.initial_state())
+            self.assertGreaterEqual(bound(mdp.initial_state()), optimal)
+
+            for solver in [ lambda m, stats: lao_star(m, gamma, .001, bound, stats=stats),
+                            lambda m, stats: lrtdp(m, gamma, .001, bound, seed=0, stats=stats) ]:
+                stats = SolverStats()
+                pol, vs = solver(mdp, stats)
+                # the calls to the MDP are counted, and each transition is queried once
+                self.assertGreater(stats.nb_next_states_, 0)
+                self.assertLessEqual(stats.nb_next_states_, DungeonMDP(map).compile().nb_rows())
+                self.assertAlmostEqual(vs.value(mdp.initial_state()), optimal, delta=.1)
+                # the policy is defined on the states it reaches, and is (nearly) optimal
+                self.assertTrue(pol.covers(mdp.initial_state()))
+                for s in pol.states():
+                    for outcome in mdp.next_states(s, pol.action(s)):
+                        self.assertTrue(pol.covers(outcome.state))
+                # the states were not all enumerated
+                self.assertIsNone(mdp.reachable_states_)
+                self.assertLess(len(pol.states()), len(v.values_))
+                pv = compute_v_of_policy(DungeonMDP(map), pol, gamma, .0001)
+                self.assertAlmostEqual(pv.value(mdp.initial_state()), optimal, delta=.1)
+
+    def test_smmdp(self):
+        from algos import value_iteration
+        from heuristic import constant_upper_bound, lao_star, lrtdp
+
+        from benchmark.generators import grid_smmdp
+        mdp = grid_smmdp(6, 6)
+        _, v = value_iteration(mdp, .9, .0001)
+        for pol, vs in [ lao_star(mdp, .9, .0001, constant_upper_bound(100, .9)),
+                         lrtdp(mdp, .9, .0001, constant_upper_bound(100, .9), seed=1) ]:
+            self.assertAlmostEqual(vs.value(mdp.initial_state()), v.value(mdp.initial_state()), delta=.01)
+
+def main():
+    unittest.main()
+
+if __name__ == "__main__":
+    main()
+  
+
+# eof
@@ -0,0 +1,244 @@
+'''
+  Heuristic search solvers: LAO* (in its improved version, ILAO*) and Labeled RTDP.
+  Unlike the solvers of algos.py, they never call mdp.states():
+  they start from the initial state and only expand the states
+  that the current greedy policy may reach.
+  When the MDP is huge but the optimal policy only visits a small part of it
+  (as in the dungeon), they are much faster than value iteration.
+
+  Both solvers need an upper bound of the optimal value of each state (the heuristic),
+  which must be admissible (never below the optimal value) for the result to be optimal
+  (e.g. constant_upper_bound, or dungeon_upper_bound in dungeon.py).
+  The result is a partial policy, defined on the states reachable from the initial state
+  when following the policy, and the value function of the explored states.
+'''
+from __future__ import annotations # necessary for typing hint references to class not completely defined yet
+# __future__ does not work with Python3.7<
+from random import Random
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from MDP import Action, ActionOutcome, ExplicitPolicy, MDP, State
+from algos import StateValueFunction
+from instrumentation import SolverStats
+
+class PartialPolicy(ExplicitPolicy):
+    '''
+      A policy computed for the relevant states only (cf. states()).
+      In other states, it behaves as ExplicitPolicy (the first applicable action).
+    '''
+    def states(self) -> List[State]:
+        return list(self._explicit_decision)
+
+    def covers(self, s: State) -> bool:
+        return s in self._explicit_decision
+
+def constant_upper_bound(max_reward: float, gamma: float) -> Callable[[State],float]:
+    '''
+      The trivial upper bound when no reward is larger than max_reward.
+    '''
+    bound = max_reward / (1 - gamma)
+    return lambda s: bound
+
+class HeuristicSearch:
+    '''
+      What LAO* and LRTDP have in common:
+      the transitions of the expanded states (queried once),
+      and the value function, initialised with the heuristic.
+    '''
+    def __init__(self, mdp: MDP, gamma: float, heuristic: Callable[[State],float]):
+        self.mdp_ = mdp
+        self.gamma_ = gamma
+        self.heuristic_ = heuristic
+        self.transitions_: Dict[State,Dict[Action,List[ActionOutcome]]] = {}
+        self.values_: Dict[State,float] = {}
+
+    def expanded(self, s: State) -> bool:
+        return s in self.transitions_
+
+    def expand(self, s: State) -> Dict[Action,List[ActionOutcome]]:
+        '''
+          The outcomes of each applicable action (in the order of the MDP).
+        '''
+        result = self.transitions_.get(s)
+        if result is None:
+            result = { a:self.mdp_.next_states_view(s, a) for a in self.mdp_.applicable_actions_view(s) }
+            self.transitions_[s] = result
+        return result
+
+    def value(self, s: State) -> float:
+        result = self.values_.get(s)
+        if result is None:
+            result = self.heuristic_(s)
+            self.values_[s] = result
+        return result
+
+    def greedy(self, s: State) -> Tuple[Optional[Action],float]:
+        '''
+          The greedy action and its Q-value (cf. one_step_lookahead); expands the state if needed.
+        '''
+        best_action = None
+        best_val = None
+        for a, outcomes in self.expand(s).items():
+            val = 0
+            for outcome in outcomes:
+                val += outcome.prob * (outcome.reward + self.gamma_ * self.value(outcome.state))
+            if best_val == None or best_val < val:
+                best_action = a
+                best_val = val
+        if best_action == None:
+            return None, self.value(s)
+        return best_action, best_val
+
+    def backup(self, s: State) -> float:
+        '''
+          Updates the value of the state; returns the residual.
+        '''
+        _, val = self.greedy(s)
+        residual = abs(val - self.value(s))
+        self.values_[s] = val
+        return residual
+
+    def result(self, start: State) -> Tuple[PartialPolicy,StateValueFunction]:
+        '''
+          The greedy policy on the states it reaches from start, and the value of the explored states.
+        '''
+        pol = PartialPolicy(self.mdp_)
+        open = [ start ]
+        while open:
+            s = open.pop()
+            if pol.covers(s):
+                continue
+            a, _ = self.greedy(s)
+            if a is None:
+                continue
+            pol.set_action(s, a)
+            for outcome in self.expand(s)[a]:
+                if not pol.covers(outcome.state):
+                    open.append(outcome.state)
+        vs = StateValueFunction()
+        for s, val in self.values_.items():
+            vs.set_value(s, val)
+        return pol, vs
+
+def lao_star(mdp: MDP, gamma: float, epsilon: float, heuristic: Callable[[State],float],
+    max_iterations: Optional[int] = None, stats: Optional[SolverStats] = None) -> Tuple[PartialPolicy,StateValueFunction]:
+    '''
+      Improved LAO*: at each iteration, traverses the states reachable from the initial state
+      with the greedy policy (depth first), expands the states that were not expanded yet (the tips),
+      and backs up the traversed states in post-order.
+      Stops when the greedy policy reaches no tip and the largest residual is below epsilon.
+      If stats is specified, each iteration is recorded in it (cf. instrumentation.py).
+    '''
+    if stats is not None:
+        mdp = stats.wrap(mdp)
+    search = HeuristicSearch(mdp, gamma, heuristic)
+    start = mdp.initial_state()
+    iteration = 0
+    while max_iterations is None or iteration < max_iterations:
+        iteration += 1
+        if stats is not None:
+            stats.start()
+        nb_tips = 0
+        residual = 0
+        visited: Set[State] = { start }
+        stack = [ (start, False) ] # (state, children already pushed)
+        while stack:
+            s, done = stack.pop()
+            if done:
+                residual = max(residual, search.backup(s))
+                continue
+            if not search.expanded(s):
+                nb_tips += 1
+                search.expand(s)
+                residual = max(residual, search.backup(s))
+                continue
+            stack.append((s, True))
+            a, _ = search.greedy(s)
+            if a is None:
+                continue
+            for outcome in search.expand(s)[a]:
+                if not outcome.state in visited:
+                    visited.add(outcome.state)
+                    stack.append((outcome.state, False))
+        if stats is not None:
+            stats.record_iteration('lao_star', residual, search.values_)
+        if nb_tips == 0 and residual < epsilon:
+            break
+    return search.result(start)
+
+def lrtdp(mdp: MDP, gamma: float, epsilon: float, heuristic: Callable[[State],float],
+    max_trials: Optional[int] = None, max_depth: int = 1000, seed: Optional[int] = None,
+    stats: Optional[SolverStats] = None) -> Tuple[PartialPolicy,StateValueFunction]:
+    '''
+      Labeled RTDP: performs trials from the initial state, following the greedy policy
+      and sampling the outcomes, and backs up the states along the way.
+      At the end of a trial, the states of the trial are labeled solved (in reverse order)
+      when the residual of all the states their greedy policy reaches is below epsilon;
+      the algorithm stops when the initial state is solved.
+      Since there are no goal states in a discounted MDP, trials are stopped after max_depth steps.
+      If stats is specified, each trial is recorded in it (cf. instrumentation.py).
+    '''
+    if stats is not None:
+        mdp = stats.wrap(mdp)
+    search = HeuristicSearch(mdp, gamma, heuristic)
+    rng = Random(seed)
+    solved: Set[State] = set()
+    start = mdp.initial_state()
+
+    def sample(s: State, a: Action) -> State:
+        outcomes = search.expand(s)[a]
+        r = rng.random()
+        for outcome in outcomes:
+            r -= outcome.prob
+            if r < 0:
+                return outcome.state
+        return outcomes[-1].state
+
+    def check_solved(s: State) -> bool:
+        result = True
+        open = [ s ]
+        closed = []
+        seen = { s }
+        while open:
+            current = open.pop()
+            closed.append(current)
+            a, val = search.greedy(current)
+            if abs(val - search.value(current)) > epsilon:
+                result = False
+                continue
+            if a is None:
+                continue
+            for outcome in search.expand(current)[a]:
+                succ = outcome.state
+                if not succ in solved and not succ in seen:
+                    seen.add(succ)
+                    open.append(succ)
+        if result:
+            solved.update(closed)
+        else:
+            for current in reversed(closed):
+                search.backup(current)
+        return result
+
+    nb_trials = 0
+    while not start in solved and (max_trials is None or nb_trials < max_trials):
+        nb_trials += 1
+        if stats is not None:
+            stats.start()
+        trial = []
+        s = start
+        while not s in solved and len(trial) < max_depth:
+            trial.append(s)
+            search.backup(s)
+            a, _ = search.greedy(s)
+            if a is None:
+                break
+            s = sample(s, a)
+        while trial:
+            if not check_solved(trial.pop()):
+                break
+        if stats is not None:
+            stats.record_iteration('lrtdp', None, search.values_)
+    return search.result(start)
+
+# eof
@@ -0,0 +1,74 @@
+import unittest
+
+class Test(unittest.TestCase):
+
+    def test(self):
+        import json, os, tempfile
+        from example1 import example_1
+        from example2 import example_2
+        from algos import value_iteration, policy_iteration, compute_v_of_policy
+        from instrumentation import SolverStats
+
+        # implicit MDP: the calls to the MDP are counted
+        mdp = example_2()
+        stats = SolverStats()
+        value_iteration(mdp, gamma=.9, epsilon=.01, stats=stats)
+        self.assertGreater(stats.nb_iterations('value_iteration'), 1)
+        self.assertLess(stats.records_[-1]['residual'], .01)
+        self.assertGreater(stats.records_[0]['next_states'], 0)
+        self.assertEqual(stats.records_[0]['next_states'], stats.records_[1]['next_states'])
+        self.assertEqual(stats.peak_table_size_, 4)
+
+        # policy iteration records its evaluations and its improvement steps
+        stats = SolverStats()
+        policy_iteration(mdp, gamma=.9, epsilon=.01, stopping_threshold=.01, stats=stats)
+        self.assertGreater(stats.nb_iterations('compute_v_of_policy'), 0)
+        self.assertGreater(stats.nb_iterations('policy_iteration'), 0)
+        self.assertEqual(stats.summary()['iterations']['policy_iteration'], stats.nb_iterations('policy_iteration'))
+
+        # compiled MDP, records written as JSON lines
+        with tempfile.TemporaryDirectory() as directory:
+            file = os.path.join(directory, 'trace.jsonl')
+            stats = SolverStats(jsonl=file)
+            value_iteration(example_1(), gamma=.9, epsilon=.01, stats=stats)
+            with open(file) as input:
+                lines = [ json.loads(line) for line in input.readlines() ]
+            self.assertEqual(lines, stats.records_)
+            summary_file = os.path.join(directory, 'summary.jsonl')
+            stats.write_jsonl(summary_file)
+            with open(summary_file) as input:
+                self.assertIn('summary', json.loads(input.readlines()[-1]))
+
+    def test_others(self):
+        from statemachine import SMMDP, SMTransition
+        from connectedcomp import compute_connected_components
+        from top import topological_vi
+        from nondet import NDPolicy, compute_policy_value
+        from algos import value_iteration
+        from instrumentation import SolverStats
+
+        smmdp = SMMDP([
+              SMTransition('0', 'a1', [ ['1', 1, 1]]),
+              SMTransition('1', 'a1', [ ['0', .5, 2], ['2', .5, 0]]),
+              SMTransition('2', 'a1', [ ['2', 1, 1]]),
+            ], '0'
+          )
+        stats = SolverStats()
+        topological_vi(smmdp, gamma=.9, epsilon=.01, graph=compute_connected_components(smmdp), stats=stats)
+        self.assertGreater(stats.nb_iterations('topological_vi'), 0)
+
+        pol, _ = value_iteration(smmdp, gamma=.9, epsilon=.01)
+        ndpol = NDPolicy()
+        ndpol.add_det_policy(smmdp, pol)
+        compute_policy_value(smmdp, ndpol, gamma=.9, epsilon=.01, max_iteration=100, stats=stats)
+        self.assertGreater(stats.nb_iterations('compute_policy_value'), 0)
+        self.assertGreater(stats.nb_next_states_, 0)
+
+def main():
+    unittest.main()
+
+if __name__ == "__main__":
+    main()
+  
+
+# eof
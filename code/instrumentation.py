@@ -0,0 +1,155 @@
+'''
+  Instrumentation of the solvers.
+  A SolverStats object is passed to a solver (parameter stats), which records in it
+  the residual, the wall time, the number of calls to the MDP, and the size of the tables
+  at each iteration.
+  The records can be read from the object after the execution,
+  or written as JSON lines while the solver is running.
+'''
+from __future__ import annotations # necessary for typing hint references to class not completely defined yet
+# __future__ does not work with Python3.7<
+import json
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+from MDP import Action, ActionOutcome, MDP, State
+
+def table_size(table: Any) -> int:
+    '''
+      Number of entries of a value function (dictionary or array based), or of an array.
+    '''
+    if hasattr(table, 'values_'):
+        return len(table.values_)
+    if hasattr(table, '_explicit_value'):
+        return len(table._explicit_value)
+    if hasattr(table, '__len__'):
+        return len(table)
+    return 0
+
+class SolverStats:
+    '''
+      Records the execution of one or several solvers.
+      Each iteration is recorded as a dictionary with the following entries:
+      * solver: the name of the solver that performed the iteration;
+      * iteration: the number of the iteration for this solver (starting from 1);
+      * residual: the change of the value function during the iteration (None if not meaningful);
+      * time: the wall time of the iteration, in seconds;
+      * next_states, applicable_actions: the number of calls to the MDP during the iteration;
+      * table_size: the number of entries of the value function after the iteration.
+    '''
+    def __init__(self, jsonl: Optional[str] = None):
+        '''
+          If a file name is specified, each record is appended to this file as a JSON line.
+        '''
+        self.records_: List[Dict[str,Any]] = []
+        self.nb_next_states_: int = 0
+        self.nb_applicable_actions_: int = 0
+        self.peak_table_size_: int = 0
+        self.jsonl_: Optional[str] = jsonl
+        self._iterations: Dict[str,int] = {}
+        self._last_time: float = time.perf_counter()
+        self._last_next_states: int = 0
+        self._last_applicable_actions: int = 0
+
+    def wrap(self, mdp: MDP) -> MDP:
+        '''
+          Returns an MDP that behaves as the specified MDP and counts the calls in this object.
+        '''
+        if isinstance(mdp, CountingMDP) and mdp._stats is self:
+            return mdp
+        return CountingMDP(mdp, self)
+
+    def start(self) -> None:
+        '''
+          Starts the timer of the next iteration.
+        '''
+        self._last_time = time.perf_counter()
+
+    def record_iteration(self, solver: str, residual: Optional[float], table: Any = None) -> None:
+        now = time.perf_counter()
+        self._iterations[solver] = self._iterations.get(solver, 0) + 1
+        size = table_size(table)
+        self.peak_table_size_ = max(self.peak_table_size_, size)
+        record = {
+            'solver': solver,
+            'iteration': self._iterations[solver],
+            'residual': None if residual is None else float(residual),
+            'time': now - self._last_time,
+            'next_states': self.nb_next_states_ - self._last_next_states,
+            'applicable_actions': self.nb_applicable_actions_ - self._last_applicable_actions,
+            'table_size': size,
+        }
+        self.records_.append(record)
+        if self.jsonl_ is not None:
+            with open(self.jsonl_, 'a') as output:
+                output.write(json.dumps(record) + '\n')
+        self._last_time = now
+        self._last_next_states = self.nb_next_states_
+        self._last_applicable_actions = self.nb_applicable_actions_
+
+    def nb_iterations(self, solver: Optional[str] = None) -> int:
+        return len([ r for r in self.records_ if solver is None or r['solver'] == solver ])
+
+    def total_time(self) -> float:
+        return sum([ r['time'] for r in self.records_ ])
+
+    def summary(self) -> Dict[str,Any]:
+        return {
+            'iterations': { solver:nb for solver,nb in self._iterations.items() },
+            'time': self.total_time(),
+            'next_states': self.nb_next_states_,
+            'applicable_actions': self.nb_applicable_actions_,
+            'peak_table_size': self.peak_table_size_,
+            'final_residual': self.records_[-1]['residual'] if self.records_ else None,
+        }
+
+    def write_jsonl(self, file: str) -> None:
+        '''
+          Writes all the records, followed by the summary, as JSON lines.
+        '''
+        with open(file, 'w') as output:
+            for record in self.records_:
+                output.write(json.dumps(record) + '\n')
+            output.write(json.dumps({ 'summary': self.summary() }) + '\n')
+
+class CountingMDP(MDP):
+    '''
+      An MDP that behaves as the specified MDP
+      and counts the calls to next_states and applicable_actions.
+    '''
+    def __init__(self, mdp: MDP, stats: SolverStats):
+        self._mdp = mdp
+        self._stats = stats
+
+    def states(self) -> List[State]:
+        return self._mdp.states()
+
+    def actions(self) -> List[Action]:
+        return self._mdp.actions()
+
+    def applicable_actions(self, s: State) -> List[Action]:
+        self._stats.nb_applicable_actions_ += 1
+        return self._mdp.applicable_actions(s)
+
+    def next_states(self, s: State, a: Action) -> List[ActionOutcome]:
+        self._stats.nb_next_states_ += 1
+        return self._mdp.next_states(s, a)
+
+    def states_view(self) -> Sequence[State]:
+        return self._mdp.states_view()
+
+    def applicable_actions_view(self, s: State) -> Sequence[Action]:
+        self._stats.nb_applicable_actions_ += 1
+        return self._mdp.applicable_actions_view(s)
+
+    def next_states_view(self, s: State, a: Action) -> Sequence[ActionOutcome]:
+        self._stats.nb_next_states_ += 1
+        return self._mdp.next_states_view(s, a)
+
+    def initial_state(self) -> State:
+        return self._mdp.initial_state()
+
+    def compile(self) -> Optional[MDP]:
+        return self._mdp.compile()
+
+# eof
@@ -0,0 +1,75 @@
+import unittest
+
+class Test(unittest.TestCase):
+
+    def test(self):
+        from algos import simulate
+        from benchmark.generators import grid_smmdp
+        from mcts import MCTSPolicy
+
+        # the goal of the grid is reached, with a budget far below the size of the tree
+        mdp = grid_smmdp(4, 4, slip=0)
+        pol = MCTSPolicy(mdp, .9, nb_simulations=200, horizon=20, seed=0)
+        h = simulate(mdp, pol, 8)
+        self.assertIn(100., [ h.reward(i) for i in range(8) ])
+        self.assertEqual(pol.nb_simulations_done_, 200)
+
+        # the tree is reused: the successor already has statistics
+        pol = MCTSPolicy(mdp, .9, nb_simulations=200, horizon=20, seed=0)
+        s = mdp.initial_state()
+        a = pol.action(s)
+        succ = mdp.next_states(s, a)[0].state
+        self.assertGreater(pol.tree_[succ].nb_visits_, 0)
+        self.assertGreater(pol.q_values(s)[a], 0)
+
+    def test_prune(self):
+        from statemachine import SMMDP, SMTransition
+        from mcts import MCTSPolicy
+
+        mdp = SMMDP([ SMTransition('start', 'left', [ ('l0', 1., 0.) ]),
+                      SMTransition('start', 'right', [ ('r0', 1., 1.) ]) ] +
+            [ SMTransition(f'{side}{i}', 'next', [ (f'{side}{(i+1) % 5}', 1., 0.) ]) for side in 'lr' for i in range(5) ], 
+            'start')
+        pol = MCTSPolicy(mdp, .9, nb_simulations=100, horizon=10, seed=0)
+        pol.action(mdp.initial_state())
+        self.assertIn(mdp.get_state('l1'), pol.tree_)
+        # once on the right, the start and the left are not needed any more
+        pol.action(mdp.get_state('r0'))
+        self.assertTrue(all([ repr(s).startswith('r') for s in pol.tree_ ]))
+        self.assertGreater(pol.tree_[mdp.get_state('r1')].nb_visits_, 0)
+
+    def test_terminal(self):
+        from statemachine import SMMDP, SMTransition
+        from mcts import MCTSPolicy
+
+        # the goal has no applicable action
+        mdp = SMMDP([ SMTransition('start', 'go', [ ('goal', 1., 1.) ]) ], 'start')
+        pol = MCTSPolicy(mdp, .9, nb_simulations=10, seed=0)
+        self.assertIsNone(pol.action(mdp.get_state('goal')))
+        self.assertEqual(pol.action(mdp.initial_state()), mdp.get_action('go'))
+
+    def test_dungeon(self):
+        import time
+        from dungeon import basic_map, DungeonMDP
+        from mcts import MCTSPolicy
+        from simulate import HandCraftedPolicy
+
+        mdp = DungeonMDP(basic_map())
+        pol = MCTSPolicy(mdp, .95, time_budget=.05, seed=0)
+        self.assertIsInstance(pol.rollout_policy_, HandCraftedPolicy)
+        s = mdp.initial_state()
+        start = time.perf_counter()
+        a = pol.action(s)
+        self.assertLess(time.perf_counter() - start, .5)
+        self.assertIn(a, mdp.applicable_actions(s))
+        self.assertGreater(pol.nb_simulations_done_, 0)
+        self.assertIsNone(mdp.reachable_states_) # the states were not enumerated
+
+def main():
+    unittest.main()
+
+if __name__ == "__main__":
+    main()
+  
+
+# eof
@@ -0,0 +1,207 @@
+'''
+  Online planning with Monte Carlo Tree Search (UCT).
+  Instead of solving the whole MDP beforehand, the policy plans when it is asked for an action:
+  it performs simulations from the current state within a budget (time or number of simulations),
+  and returns the action that was tried the most.
+  The search tree is indexed by the states, and is kept from one decision to the next,
+  so that the simulations performed for a decision also benefit the next decisions
+  (e.g., the successive steps of algos.simulate); 
+  the parts of the tree that cannot be reached from the current state any more are dropped.
+'''
+from __future__ import annotations # necessary for typing hint references to class not completely defined yet
+# __future__ does not work with Python3.7<
+import math
+import time
+from random import Random
+from typing import Dict, List, Optional
+
+from MDP import Action, ActionOutcome, MDP, Policy, State
+
+class MCTSNode:
+    '''
+      The statistics of a state of the tree:
+      the number of visits of the state and of each action, the mean return of each action,
+      and the outcomes of the actions (queried once).
+    '''
+    __slots__ = ('actions_', 'outcomes_', 'nb_visits_', 'action_visits_', 'q_values_')
+
+    def __init__(self, actions: List[Action]):
+        self.actions_: List[Action] = actions
+        self.outcomes_: Dict[Action,List[ActionOutcome]] = {}
+        self.nb_visits_: int = 0
+        self.action_visits_: List[int] = [0] * len(actions)
+        self.q_values_: List[float] = [0.] * len(actions)
+
+class MCTSPolicy(Policy):
+    '''
+      A policy that plans online with UCT.
+      * gamma: the discount factor;
+      * time_budget: the time (in seconds) allowed for each decision;
+      * nb_simulations: the number of simulations for each decision
+        (if both are specified, the first limit reached stops the search;
+        if none is, 1000 simulations are performed);
+      * horizon: the maximal depth of a simulation (tree + rollout);
+      * rollout_policy: the policy used to evaluate a state that was just added to the tree
+        (by default, HandCraftedPolicy for a dungeon, and random actions otherwise);
+      * exploration: the exploration constant of UCB1 (relative to the scale of the values).
+    '''
+    def __init__(self, mdp: MDP, gamma: float,
+          time_budget: Optional[float] = None,
+          nb_simulations: Optional[int] = None,
+          horizon: int = 50,
+          rollout_policy: Optional[Policy] = None,
+          exploration: float = 1.4,
+          seed: Optional[int] = None):
+        self.mdp_ = mdp
+        self.gamma_ = gamma
+        self.time_budget_ = time_budget
+        self.nb_simulations_ = nb_simulations if nb_simulations is not None or time_budget is not None else 1000
+        self.horizon_ = horizon
+        self.rollout_policy_ = rollout_policy if rollout_policy is not None else default_rollout_policy(mdp, seed)
+        self.exploration_ = exploration
+        self.rng_ = Random(seed)
+        self.tree_: Dict[State,MCTSNode] = {}
+        self.nb_simulations_done_ = 0 # during the last decision
+
+    def reset(self) -> None:
+        '''
+          Forgets the search tree.
+        '''
+        self.tree_ = {}
+
+    def prune(self, root: State) -> None:
+        '''
+          Keeps only the nodes of the tree that can be reached from root (through the outcomes queried so far).
+        '''
+        kept: Dict[State,MCTSNode] = {}
+        open = [ root ]
+        while open:
+            s = open.pop()
+            node = self.tree_.get(s)
+            if node is None or s in kept:
+                continue
+            kept[s] = node
+            for outcomes in node.outcomes_.values():
+                for outcome in outcomes:
+                    if not outcome.state in kept:
+                        open.append(outcome.state)
+        self.tree_ = kept
+
+    def action(self, s: State) -> Optional[Action]:
+        self.nb_simulations_done_ = 0
+        if not self.mdp_.applicable_actions_view(s):
+            return None # terminal state, as in the other policies
+        self.prune(s) # otherwise, the tree would grow with each decision
+        deadline = None if self.time_budget_ is None else time.perf_counter() + self.time_budget_
+        while True:
+            if self.nb_simulations_ is not None and self.nb_simulations_done_ >= self.nb_simulations_:
+                break
+            if deadline is not None and time.perf_counter() >= deadline and self.nb_simulations_done_ > 0:
+                break
+            self.simulate(s, 0)
+            self.nb_simulations_done_ += 1
+        node = self.tree_[s]
+        best = max(range(len(node.actions_)), key=lambda i: (node.action_visits_[i], node.q_values_[i]))
+        return node.actions_[best]
+
+    def q_values(self, s: State) -> Dict[Action,float]:
+        '''
+          The mean return of each action of the state (empty if the state is not in the tree).
+        '''
+        node = self.tree_.get(s)
+        if node is None:
+            return {}
+        return { a:q for a,q in zip(node.actions_, node.q_values_) }
+
+    def sample(self, node: MCTSNode, s: State, a: Action) -> ActionOutcome:
+        outcomes = node.outcomes_.get(a)
+        if outcomes is None:
+            outcomes = self.mdp_.next_states_view(s, a)
+            node.outcomes_[a] = outcomes
+        r = self.rng_.random()
+        for outcome in outcomes:
+            r -= outcome.prob
+            if r < 0:
+                return outcome
+        return outcomes[-1]
+
+    def select(self, node: MCTSNode) -> int:
+        '''
+          UCB1: untried actions first, then the best upper confidence bound.
+        '''
+        untried = [ i for i,n in enumerate(node.action_visits_) if n == 0 ]
+        if untried:
+            return self.rng_.choice(untried)
+        scale = max(1., max([ abs(q) for q in node.q_values_ ]))
+        log_n = math.log(node.nb_visits_)
+        best, best_ucb = 0, None
+        for i, q in enumerate(node.q_values_):
+            ucb = q + self.exploration_ * scale * math.sqrt(log_n / node.action_visits_[i])
+            if best_ucb is None or ucb > best_ucb:
+                best, best_ucb = i, ucb
+        return best
+
+    def simulate(self, s: State, depth: int) -> float:
+        '''
+          Performs one simulation from s; returns the discounted return.
+        '''
+        if depth >= self.horizon_:
+            return 0.
+        node = self.tree_.get(s)
+        if node is None:
+            self.tree_[s] = MCTSNode(self.mdp_.applicable_actions_view(s))
+            return self.rollout(s, depth)
+        if not node.actions_:
+            return 0.
+        i = self.select(node)
+        outcome = self.sample(node, s, node.actions_[i])
+        result = outcome.reward + self.gamma_ * self.simulate(outcome.state, depth + 1)
+        node.nb_visits_ += 1
+        node.action_visits_[i] += 1
+        node.q_values_[i] += (result - node.q_values_[i]) / node.action_visits_[i]
+        return result
+
+    def rollout(self, s: State, depth: int) -> float:
+        result = 0.
+        discount = 1.
+        while depth < self.horizon_:
+            a = self.rollout_policy_.action(s)
+            if a is None:
+                break
+            outcomes = self.mdp_.next_states_view(s, a)
+            r = self.rng_.random()
+            outcome = outcomes[-1]
+            for o in outcomes:
+                r -= o.prob
+                if r < 0:
+                    outcome = o
+                    break
+            result += discount * outcome.reward
+            discount *= self.gamma_
+            s = outcome.state
+            depth += 1
+        return result
+
+class RandomPolicy(Policy):
+    '''
+      Selects an applicable action uniformly at random.
+    '''
+    def __init__(self, mdp: MDP, rng: Random):
+        self._mdp = mdp
+        self._rng = rng
+
+    def action(self, s: State) -> Optional[Action]:
+        actions = self._mdp.applicable_actions_view(s)
+        return self._rng.choice(actions) if actions else None
+
+def default_rollout_policy(mdp: MDP, seed: Optional[int] = None) -> Policy:
+    '''
+      HandCraftedPolicy for a dungeon, a random policy otherwise.
+    '''
+    from dungeon import DungeonMDP
+    if isinstance(mdp, DungeonMDP):
+        from simulate import HandCraftedPolicy
+        return HandCraftedPolicy(mdp.map_)
+    return RandomPolicy(mdp, Random(seed))
+
+# eof
@@ -0,0 +1,70 @@
+import unittest
+
+class Test(unittest.TestCase):
+
+    def test(self):
+        import tempfile
+        from algos import value_iteration
+        from dungeon import basic_map, dungeon_state_key, DungeonMDP
+        from modelcache import map_hash, ModelCache
+
+        with tempfile.TemporaryDirectory() as directory:
+            cache = ModelCache(directory)
+            map = basic_map()
+            self.assertIsNone(cache.load(map))
+
+            mdp = cache.dungeon_mdp(map)
+            self.assertEqual(cache.misses_, 1)
+            self.assertEqual(len(mdp.states()), 848)
+
+            # the second time, the model comes from the cache, with the real states and actions
+            cached = cache.dungeon_mdp(basic_map())
+            self.assertEqual(cache.hits_, 1)
+            self.assertEqual(len(cached.states()), 848)
+            self.assertIsInstance(cached.states(), list)
+            # (the states of two maps are different objects, even if the maps are equal)
+            self.assertEqual(dungeon_state_key(cached.initial_state()), dungeon_state_key(mdp.initial_state()))
+            self.assertEqual({ dungeon_state_key(s) for s in cached.states() }, { dungeon_state_key(s) for s in mdp.states() })
+            s = cached.initial_state()
+            self.assertEqual(cached.compile().applicable_actions(s), DungeonMDP(cached.map_).applicable_actions(s))
+            _, v = value_iteration(mdp, .9, .001)
+            _, cv = value_iteration(cached, .9, .001)
+            self.assertEqual(v.value(mdp.initial_state()), cv.value(s))
+            del cached, cv
+
+            # a file without metadata is a cache miss
+            from smio import write_compiled_mdp
+            write_compiled_mdp(mdp.compile(), cache.path(map), metadata=None)
+            self.assertIsNone(cache.load(map))
+
+            # a different map has a different hash
+            self.assertEqual(map_hash(basic_map()), map_hash(map))
+            map.add_path('inn_start', 'largechest')
+            self.assertNotEqual(map_hash(basic_map()), map_hash(map))
+            self.assertIsNone(cache.load(map))
+            import dungeon
+            size = dungeon.PARTY_MAX_SIZE
+            try:
+                dungeon.PARTY_MAX_SIZE = 3
+                self.assertIsNone(cache.load(basic_map()))
+            finally:
+                dungeon.PARTY_MAX_SIZE = size
+
+    def test_decoding(self):
+        from dungeon import AdventurerType, basic_map, dungeon_state_from_key, DungeonMDP, Map
+        DungeonMDP(basic_map()).states() # interns the parties of the weak peon
+        strong_peon = AdventurerType('peon', st=1, ma=2)
+        map = Map()
+        map.create_inn('inn', for_hire=[(10,strong_peon)])
+        map.set_initial_location('inn')
+        s = dungeon_state_from_key('inn|peon->1|inn', map)
+        self.assertEqual(s.party_.adventurer_types()[0].strength(), 1)
+
+def main():
+    unittest.main()
+
+if __name__ == "__main__":
+    main()
+  
+
+# eof
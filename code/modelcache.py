@@ -0,0 +1,121 @@
+'''
+  A cache on disk of the compiled dungeon MDPs.
+  Exploring a dungeon (and compiling it) is done again in every script, even for the same map;
+  the cache stores the compiled MDP in the binary format of smio.py,
+  in a file whose name is a hash of the content of the map (locations, monsters, inns, paths, party size),
+  so that the next scripts that use the same map open the model instead of exploring it.
+  Modifying the map changes the hash: a model is never used for another map.
+'''
+import hashlib
+import json
+import os
+from typing import Any, Dict, Optional
+
+import dungeon
+from compiled import CompiledMDP
+from dungeon import DungeonMDP, Map
+from smio import VERSION, load_dungeon_mdp, read_header, write_dungeon_mdp
+
+CACHE_VERSION = 1 # to be increased whenever the semantics of the dungeon MDP change
+
+def map_description(map: Map) -> Dict[str,Any]:
+    '''
+      The content of the map that determines the MDP, in a canonical form.
+    '''
+    def adventurer(atype) -> list:
+        return [ repr(atype), atype.strength(), atype.magic() ]
+    return {
+        'cache_version': CACHE_VERSION,
+        'format_version': VERSION,
+        'party_max_size': dungeon.PARTY_MAX_SIZE,
+        'initial': map.get_initial_location(),
+        'dangerous': sorted([ [ loc, repr(m), m.strength(), m.magic() ] for loc, m in map.dangerous_locations_.items() ]),
+        'inns': sorted([ [ loc, [ [ cost ] + adventurer(atype) for cost, atype in offer ] ] for loc, offer in map.inns_.items() ]),
+        'chests': sorted([ [ loc, reward ] for loc, reward in map.chest_rooms_.items() ]),
+        'paths': sorted([ sorted([ loc, nei ]) for loc, neis in map.neighbours_.items() for nei in neis if loc <= nei ]),
+    }
+
+def map_hash(map: Map) -> str:
+    description = json.dumps(map_description(map), sort_keys=True)
+    return hashlib.sha256(description.encode()).hexdigest()
+
+def default_directory() -> str:
+    '''
+      The directory of the cache: $MDP_CACHE_DIR, or ~/.cache/mdp-models.
+    '''
+    return os.environ.get('MDP_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'mdp-models'))
+
+class ModelCache:
+    '''
+      The compiled dungeon MDPs stored in a directory, one file per map.
+    '''
+    def __init__(self, directory: Optional[str] = None):
+        self.directory_ = default_directory() if directory is None else directory
+        self.hits_ = 0
+        self.misses_ = 0
+
+    def path(self, map: Map) -> str:
+        return os.path.join(self.directory_, f'dungeon-{map_hash(map)}.cmdp')
+
+    def load(self, map: Map) -> Optional[CompiledMDP]:
+        '''
+          The compiled MDP of the map if it is in the cache, None otherwise
+          (files that cannot be read, e.g., written with another version, are ignored).
+        '''
+        file = self.path(map)
+        if not os.path.exists(file):
+            return None
+        try:
+            metadata = read_header(file).get('metadata')
+            if not isinstance(metadata, dict) or metadata.get('map_hash') != map_hash(map):
+                return None
+            return load_dungeon_mdp(file, map)
+        except (ValueError, KeyError, OSError):
+            return None
+
+    def store(self, mdp: DungeonMDP) -> str:
+        '''
+          Compiles the MDP (if not done yet) and writes it in the cache; returns the file.
+          The file is written under a temporary name and then renamed,
+          so that other processes never read a partial file.
+        '''
+        os.makedirs(self.directory_, exist_ok=True)
+        file = self.path(mdp.map_)
+        temporary = f'{file}.{os.getpid()}.tmp'
+        write_dungeon_mdp(mdp, temporary, metadata={ 'map_hash': map_hash(mdp.map_) })
+        os.replace(temporary, file)
+        return file
+
+    def dungeon_mdp(self, map: Map, processes: Optional[int] = None) -> DungeonMDP:
+        '''
+          Returns the dungeon MDP of the map, whose compile() (and therefore states()) comes from the cache.
+          If the map is not in the cache yet, the MDP is explored (cf. DungeonMDP.explore) and stored.
+        '''
+        mdp = DungeonMDP(map)
+        model = self.load(map)
+        if model is None:
+            self.misses_ += 1
+            mdp.explore(processes)
+            self.store(mdp)
+        else:
+            self.hits_ += 1
+            mdp.compiled_ = model # states() lists the states of the model when it is called
+        return mdp
+
+    def clear(self) -> None:
+        '''
+          Removes all the models of the cache.
+        '''
+        if not os.path.isdir(self.directory_):
+            return
+        for name in os.listdir(self.directory_):
+            if name.startswith('dungeon-') and name.endswith('.cmdp'):
+                os.remove(os.path.join(self.directory_, name))
+
+def cached_dungeon_mdp(map: Map, directory: Optional[str] = None, processes: Optional[int] = None) -> DungeonMDP:
+    '''
+      Shortcut for ModelCache(directory).dungeon_mdp(map, processes).
+    '''
+    return ModelCache(directory).dungeon_mdp(map, processes)
+
+# eof
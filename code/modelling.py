@@ -1,4 +1,4 @@
-from typing import Callable, List
+from typing import Callable, List, Sequence
 from xmlrpc.client import Boolean
 from MDP import Action, ActionOutcome, State, MDP
 from dungeon import HireAction, NoAction
@@ -44,13 +44,25 @@ def add_cost_to_actions(mdp: MDP, action_condition: Callable[[Action], Boolean],
             """
             if not self._acond(a):
                 return self._mdp.next_states(s, a)
-            old_outcomes = self._mdp.next_states(s, a)
+            old_outcomes = self._mdp.next_states_view(s, a)
             new_outcomes = []
             for old_outcome in old_outcomes:
                 new_outcome = ActionOutcome(old_outcome.prob, old_outcome.state, old_outcome.reward - self._cost)
                 new_outcomes.append(new_outcome)
             return new_outcomes
 
+        def states_view(self) -> Sequence[State]:
+            return self._mdp.states_view()
+
+        def applicable_actions_view(self, s: State) -> Sequence[Action]:
+            return self._mdp.applicable_actions_view(s)
+
+        def next_states_view(self, s: State, a: Action) -> Sequence[ActionOutcome]:
+            """ The outcomes that are not modified are shared with the MDP """
+            if not self._acond(a):
+                return self._mdp.next_states_view(s, a)
+            return self.next_states(s, a)
+
         def initial_state(self) -> State:
             """ Same initial state """
             return self._mdp.initial_state()
@@ -101,7 +113,7 @@ def penalise_state_action(mdp: MDP, action_condition: Callable[[Action], Boolean
         def next_states(self, s: State, a: Action) -> List[ActionOutcome]:
             if self._scond(s):
                 if self._acond(a):
-                    old_outcomes = self._mdp.next_states(s, a)
+                    old_outcomes = self._mdp.next_states_view(s, a)
                     new_outcomes = []
                     for old_outcome in old_outcomes:
                         new_outcome = ActionOutcome(old_outcome.prob, old_outcome.state, old_outcome.reward - self._cost)
@@ -112,6 +124,17 @@ def penalise_state_action(mdp: MDP, action_condition: Callable[[Action], Boolean
             else:
                 return self._mdp.next_states(s, a)
 
+        def states_view(self) -> Sequence[State]:
+            return self._mdp.states_view()
+
+        def applicable_actions_view(self, s: State) -> Sequence[Action]:
+            return self._mdp.applicable_actions_view(s)
+
+        def next_states_view(self, s: State, a: Action) -> Sequence[ActionOutcome]:
+            """ The outcomes that are not modified are shared with the MDP """
+            if self._scond(s) and self._acond(a):
+                return self.next_states(s, a)
+            return self._mdp.next_states_view(s, a)
 
         def initial_state(self) -> State:
             """ Same initial state """
@@ -190,6 +213,20 @@ def forbid_actions_in_states(mdp: MDP, action_condition: Callable[[Action], Bool
         def next_states(self, s: State, a: Action) -> List[ActionOutcome]:
             return self._mdp.next_states(s, a)
 
+        def states_view(self) -> Sequence[State]:
+            return self._mdp.states_view()
+
+        def applicable_actions_view(self, s: State) -> Sequence[Action]:
+            """ Same as applicable_actions, without copying the actions when none is forbidden """
+            actions = self._mdp.applicable_actions_view(s)
+            if not actions or not self._scond(s):
+                return actions
+            allowed = tuple([ a for a in actions if not self._acond(a) ])
+            return allowed if allowed else actions
+
+        def next_states_view(self, s: State, a: Action) -> Sequence[ActionOutcome]:
+            return self._mdp.next_states_view(s, a)
+
         def initial_state(self) -> State:
             """ Same initial state """
             return self._mdp.initial_state()
@@ -304,6 +341,22 @@ def limit_action_number(mdp: MDP, action_condition: Callable[[Action], Boolean],
 
             return self._mdp.next_states(s, a)
 
+        def states_view(self) -> Sequence[State]:
+            return self._mdp.states_view()
+
+        def applicable_actions_view(self, s: State) -> Sequence[Action]:
+            """ Same as applicable_actions, without copying the actions when none is filtered """
+            actions = self._mdp.applicable_actions_view(s)
+            if len(actions) <= 1 or all([ self._actionsWithLimits.get(a, 1) > 0 for a in actions ]):
+                return actions
+            return tuple([ a for a in actions if self._actionsWithLimits.get(a, 1) > 0 ])
+
+        def next_states_view(self, s: State, a: Action) -> Sequence[ActionOutcome]:
+            """ Same as next_states (including the count of the limited actions) """
+            if a in self._actionsWithLimits.keys():
+                self._actionsWithLimits[a] = max(0, self._actionsWithLimits[a] - 1)
+            return self._mdp.next_states_view(s, a)
+
         def initial_state(self) -> State:
             """ Same initial state """
             return self._mdp.initial_state()
@@ -5,6 +5,7 @@ from typing import Dict, Tuple, Optional
 from MDP import Action, State, MDP, Policy
 from algos import StateValueFunction, value_iteration, state_value_difference, ActionValueFunction, greedy_action, \
     compute_v_of_policy, compute_q_from_v, greedy_policy
+from instrumentation import SolverStats
 
 
 class NDPolicy:
@@ -32,7 +33,7 @@ class NDPolicy:
                 self._actions[s].add(a)
 
     def add_det_policy(self, mdp, pol: Policy):
-        for s in mdp.states():
+        for s in mdp.states_view():
             self.add(s, pol.action(s))
 
     def actions(self, s):
@@ -40,12 +41,17 @@ class NDPolicy:
 
 
 def compute_policy_value(mdp: MDP, ndpol: NDPolicy, gamma: float, epsilon: float,
-                         max_iteration: int) -> StateValueFunction:
+                         max_iteration: int, stats: Optional[SolverStats] = None) -> StateValueFunction:
+    if stats is not None:
+        mdp = stats.wrap(mdp)
+        stats.start()
     current_svalue = StateValueFunction()
     while max_iteration > 0:
         qvalue = ND_compute_q_from_v(mdp, current_svalue, gamma)
         new_svalue = ND_compute_v_from_q_and_policy(mdp, ndpol, qvalue)
         diff = state_value_difference(mdp, current_svalue, new_svalue)
+        if stats is not None:
+            stats.record_iteration('compute_policy_value', diff, new_svalue)
         if diff < epsilon:
             return new_svalue
         current_svalue = new_svalue
@@ -61,14 +67,14 @@ def compute_non_augmentable_policy(mdp: MDP, gamma: float, epsilon: float, subop
     while True:
         if isPolicyAllreadyFit:
             actionsPairs =[]
-            for s in mdp.states():
-                for a in mdp.applicable_actions(s):
+            for s in mdp.states_view():
+                for a in mdp.applicable_actions_view(s):
                     if a not in ndpol.actions(s):
                         actionsPairs.append((s,a))
             resultList = []
             for sublist in list(chain.from_iterable(combinations(actionsPairs, r) for r in range(1, len(actionsPairs)+1))):
                 tempPol = NDPolicy()
-                for s in mdp.states():
+                for s in mdp.states_view():
                     for a in ndpol.actions(s):
                         tempPol.add(s,a)
                 for pair in sublist:
@@ -119,8 +125,8 @@ def ND_compute_q_from_v(mdp: MDP, v: StateValueFunction, gamma: float) -> Action
       Computes the action value function as a one-step lookahead value of the specified state value function.
     '''
     result = ActionValueFunction()
-    for s in mdp.states():
-        for a in mdp.applicable_actions(s):
+    for s in mdp.states_view():
+        for a in mdp.applicable_actions_view(s):
             result.set_value(s, a, ND_one_step_lookahead(mdp, v, gamma, s, a))
     return result
 
@@ -131,7 +137,7 @@ def ND_compute_v_from_q_and_policy(mdp: MDP, pol: NDPolicy, q: ActionValueFuncti
       for the given policy.
     '''
     result = StateValueFunction()
-    for s in mdp.states():
+    for s in mdp.states_view():
         vals = None
         # print(pol.actions(s) == None)
         for a in pol.actions(s):
@@ -153,7 +159,7 @@ def ND_one_step_lookahead(mdp: MDP, v: StateValueFunction, gamma: float, s: Stat
       and adding their expected outcomes.
     '''
     value = 0
-    for outcome in mdp.next_states(s, a):
+    for outcome in mdp.next_states_view(s, a):
         value += outcome.prob * (outcome.reward + (gamma * v.value(outcome.state)))
     return value
 
@@ -165,7 +171,7 @@ def ND_greedy_policy(mdp: MDP, q: ActionValueFunction) -> Tuple[NDPolicy, StateV
     '''
     result_pol = NDPolicy()
     result_val = StateValueFunction()
-    for s in mdp.states():
+    for s in mdp.states_view():
         actions, val = ND_greedy_action(mdp, q, s)
         # print(actions)
         # result_pol.set_action(s, action)
@@ -181,7 +187,7 @@ def ND_is_policy_nearly_greedy(mdp: MDP, Vndpol: StateValueFunction, Vpol: State
       i.e., whether the action it selects in each state has a value
       that is at most epsilon away from the value of the state with maximal value.
     '''
-    for s in mdp.states():
+    for s in mdp.states_view():
         # print("s: ",s )
         # print("Vndpol.value(s): ", Vndpol.value(s))
         # print("(1 - subopt_epsilon) * Vpol.value(s): ", (1 - subopt_epsilon) * Vpol.value(s))
@@ -199,7 +205,7 @@ def ND_greedy_action(mdp: MDP, q: ActionValueFunction, s: State) -> Tuple[Action
     '''
     best_action = None
     best_val = None
-    for a in mdp.applicable_actions(s):
+    for a in mdp.applicable_actions_view(s):
         val = q.value(s,a)
         if best_val == None or best_val > val:
             best_action = a
@@ -1,4 +1,4 @@
-from typing import Set
+from typing import List, Set, Tuple
 
 from MDP import Action, Policy, State
 from dungeon import AdventurerType, DungeonMDP, DungeonState, HireAction, Map, MoveAction, pretty_print_history, probability_of_dying
@@ -19,6 +19,7 @@ class HandCraftedPolicy(Policy):
     def __init__(self, m: Map) -> None:
         self._map = m
         self._computed = {} # a dictionary that records decisions that were already computed.
+        self._locations_mask = m.locations_mask()
 
     def action(self, s: State) -> Action:
         if s in self._computed:
@@ -29,9 +30,10 @@ class HandCraftedPolicy(Policy):
 
     def do_compute_action(self, s: State) -> Action:
         dstate: DungeonState = s
+        visited = self._map.visited_mask(dstate)
 
         # If all locations have been visited, do nothing
-        if dstate.visited_places_ == self.locations():
+        if visited & self._locations_mask == self._locations_mask:
             return NoAction()
 
         # If party is not empty, selects the first adventurer, 
@@ -43,13 +45,13 @@ class HandCraftedPolicy(Policy):
             
             best_location = None
             best_proba = -1
-            for loc in self.reachable_unvisited_places(dstate):
+            for loc in self._map.frontier(visited):
                 if self._map.is_inn(loc) or self._map.is_chest_room(loc):
                     best_location = loc
                     best_proba = 1
                     break # let's stop here!
                 # There's a monster in this room
-                proba = 1- probability_of_dying(map.room_monster(loc), atype)
+                proba = 1- probability_of_dying(self._map.room_monster(loc), atype)
                 if proba > best_proba:
                     best_location = loc
                     best_proba = proba
@@ -59,13 +61,13 @@ class HandCraftedPolicy(Policy):
             if best_location == None: # If the map disconnected?
                 return NoAction() 
 
-            first_move = self.first_step_towards(dstate.location_, best_location, dstate.visited_places_)
+            first_move = self._map.first_step_towards(dstate.location_, best_location, visited)
             return MoveAction(first_move, atype)
 
         # Party is empty.  We now select the pair (adventurer type that can be hired / room to visit) 
         # that maximises the chances of success for the adventurer
-        reachables = self.reachable_unvisited_places(dstate)
-        availables = self.available_adventurers(dstate)
+        reachables = self._map.frontier(visited)
+        availables = self._map.available_adventurers(visited)
 
         best_type = None
         best_inn = None
@@ -79,6 +81,9 @@ class HandCraftedPolicy(Policy):
                         best_inn = inn
                         best_proba = proba
 
+        if best_inn == None: # no monster left to fight, or no inn visited
+            return NoAction()
+
         # we want to go to the best inn!
         # if we are in the inn, we hire the adventurer
         if dstate.location_ == best_inn:
@@ -86,75 +91,25 @@ class HandCraftedPolicy(Policy):
                 if type == best_type:
                     return HireAction(best_type, price)
 
-        first_move = self.first_step_towards(dstate.location_, best_inn, dstate.visited_places_)
+        first_move = self._map.first_step_towards(dstate.location_, best_inn, visited)
         return MoveAction(first_move, None)
 
+    ''' 
+      The following methods are kept for compatibility;
+      they use the tables of the map (cf. Map.route, Map.frontier, Map.available_adventurers).
+    '''
+
     def locations(self) -> Set[str]:
-        try: 
-            self._locations
-        except:
-            locations = set()
-            for loc in self._map.chest_rooms_:
-                locations.add(loc)
-            for loc in self._map.dangerous_locations_:
-                locations.add(loc)
-            for loc in self._map.inns_:
-                locations.add(loc)
-            self._locations = locations
-        return self._locations
-
-    def first_step_towards(self, start, end, allowed_location):
-        if end in self._map.neighbours(start):
-            return end
-
-        # too tired to optimise
-        open = []
-        distance = {}
-        first_move = {}
-
-        # initialise
-        for loc in self._map.neighbours(start):
-            if not loc in allowed_location:
-                continue
-            open.append(loc)
-            distance[loc] = 1
-            first_move[loc] = loc
-
-        while open:
-            current_loc = open.pop()
-            for nei in self._map.neighbours(current_loc):
-                if not nei in allowed_location and nei != end:
-                    continue
-                new_distance = distance[current_loc] + 1
-                if nei in distance and distance[nei] <= new_distance:
-                    continue
-                open.append(nei)
-                distance[nei] = new_distance
-                first_move[nei] = first_move[current_loc]
-        
-        return first_move[end]
-
-    def reachable_unvisited_places(self, dstate: DungeonState):
-        result = set()
-        for loc in dstate.visited_places_:
-            for nei in self._map.neighbours(loc):
-                if nei in dstate.visited_places_:
-                    continue
-                result.add(nei)
-
-        result = list(result) # Want to make sure they are always in the same order
-        result.sort()
-        return result
+        return set(self._map.locations())
 
-    def available_adventurers(self, dstate):
-        result = set()
-        for loc in dstate.visited_places_:
-            if self._map.is_inn(loc):
-                for _,atype in self._map.for_hire(loc):
-                    result.add((atype,loc))
-        result = list(result)
-        result.sort()
-        return result
+    def first_step_towards(self, start: str, end: str, allowed_location: Set[str]) -> str:
+        return self._map.first_step_towards(start, end, self._map.location_mask(allowed_location))
+
+    def reachable_unvisited_places(self, dstate: DungeonState) -> List[str]:
+        return list(self._map.frontier(self._map.visited_mask(dstate)))
+
+    def available_adventurers(self, dstate: DungeonState) -> List[Tuple[AdventurerType,str]]:
+        return list(self._map.available_adventurers(self._map.visited_mask(dstate)))
 
 if __name__ == '__main__':
     from dungeon import basic_map
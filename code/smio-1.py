@@ -0,0 +1,64 @@
+import unittest
+
+def write_state_machine(mdp, file):
+    with open(file, 'w') as output:
+        output.write(f'{mdp.initial_state()}\n')
+        for s in mdp.states():
+            for a in mdp.applicable_actions(s):
+                outcomes = ' '.join([ f'({o.state}, {o.prob}, {o.reward})' for o in mdp.next_states(s, a) ])
+                output.write(f'{s} {a} {outcomes}\n')
+
+class Test(unittest.TestCase):
+
+    def assertSameModel(self, model, expected):
+        import numpy
+        self.assertEqual([ repr(s) for s in model.states() ], [ repr(s) for s in expected.states() ])
+        self.assertEqual([ repr(a) for a in model.actions() ], [ repr(a) for a in expected.actions() ])
+        self.assertEqual(model.initial_, expected.initial_)
+        for name in [ 'state_ptr_', 'action_ids_', 'row_ptr_', 'successors_', 'probs_', 'rewards_' ]:
+            self.assertTrue(numpy.array_equal(getattr(model, name), getattr(expected, name)), name)
+
+    def test(self):
+        import os
+        import tempfile
+        from benchmark.generators import random_smmdp
+        from compiled import compile_mdp
+        from smio import read_compiled_state_machine
+        from statemachine import read_state_machine
+
+        with tempfile.TemporaryDirectory() as directory:
+            file = os.path.join(directory, 'sm.txt')
+            write_state_machine(random_smmdp(300, 3, 3, seed=2), file)
+            with open(file, 'a') as output:
+                output.write('5 a0 (7, 1.0, 3.0)\n') # overrides a previous line
+                output.write('new_state a0 (0, 1.0, 0.0)\n')
+            expected = compile_mdp(read_state_machine(file))
+            self.assertSameModel(read_compiled_state_machine(file), expected)
+            self.assertSameModel(read_compiled_state_machine(file, chunk_size=100), expected)
+            self.assertSameModel(read_compiled_state_machine(file, processes=3, chunk_size=1000), expected)
+
+    def test_segments(self):
+        import os
+        import tempfile
+        from smio import file_segments
+
+        with tempfile.TemporaryDirectory() as directory:
+            file = os.path.join(directory, 'lines.txt')
+            with open(file, 'w') as output:
+                output.write('init\n' + ''.join([ f'line {i}\n' for i in range(100) ]))
+            segments = file_segments(file, 5, 4)
+            self.assertEqual(segments[0][0], 5)
+            self.assertEqual(segments[-1][1], os.path.getsize(file))
+            with open(file, 'rb') as input:
+                data = input.read()
+            for begin, end in segments:
+                self.assertEqual(data[begin-1:begin], b'\n')
+
+def main():
+    unittest.main()
+
+if __name__ == "__main__":
+    main()
+  
+
+# eof
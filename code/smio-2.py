@@ -0,0 +1,71 @@
+import unittest
+
+class Test(unittest.TestCase):
+
+    def assertSameArrays(self, model, expected):
+        import numpy
+        for name in [ 'state_ptr_', 'action_ids_', 'row_ptr_', 'successors_', 'probs_', 'rewards_' ]:
+            self.assertTrue(numpy.array_equal(getattr(model, name), getattr(expected, name)), name)
+        self.assertEqual(model.initial_, expected.initial_)
+
+    def test(self):
+        import os
+        import tempfile
+        from benchmark.generators import grid_smmdp
+        from smio import load_compiled_mdp, read_header, write_smmdp
+
+        mdp = grid_smmdp(5, 4)
+        with tempfile.TemporaryDirectory() as directory:
+            file = os.path.join(directory, 'grid.cmdp')
+            write_smmdp(mdp, file)
+            self.assertEqual(read_header(file)['metadata'], { 'kind': 'smmdp' })
+            for mmap in [ True, False ]:
+                model = load_compiled_mdp(file, mmap=mmap)
+                self.assertSameArrays(model, mdp.compile())
+                self.assertEqual([ s.name() for s in model.states() ], [ s.name() for s in mdp.states() ])
+                self.assertEqual([ a.name() for a in model.actions() ], [ a.name() for a in mdp.actions() ])
+                self.assertEqual(model.initial_state().name(), '0_0')
+
+            # states are created when they are accessed, and only once
+            model = load_compiled_mdp(file)
+            self.assertEqual(model.states_._elements.count(None), model.nb_states())
+            s = model.states_[3]
+            self.assertIs(model.states_[3], s)
+            self.assertEqual(model.states_._elements.count(None), model.nb_states() - 1)
+            del model, s # releases the memory map before the directory is removed
+
+            # corrupted files are rejected
+            with open(file, 'r+b') as output:
+                output.seek(4)
+                output.write(b'\x63')
+            with self.assertRaises(ValueError):
+                load_compiled_mdp(file)
+
+    def test_dungeon(self):
+        import os
+        import tempfile
+        from algos import value_iteration
+        from dungeon import basic_map, dungeon_state_key, DungeonMDP
+        from smio import load_compiled_mdp, load_dungeon_mdp, write_dungeon_mdp
+
+        mdp = DungeonMDP(basic_map())
+        with tempfile.TemporaryDirectory() as directory:
+            file = os.path.join(directory, 'dungeon.cmdp')
+            write_dungeon_mdp(mdp, file)
+            model = load_compiled_mdp(file)
+            self.assertSameArrays(model, mdp.compile())
+            self.assertEqual(model.initial_state().name(), dungeon_state_key(mdp.initial_state()))
+            self.assertIs(load_dungeon_mdp(file, mdp.map_).initial_state(), mdp.initial_state())
+            _, v = value_iteration(mdp, .9, .001)
+            _, vm = value_iteration(model, .9, .001)
+            self.assertAlmostEqual(v.value(mdp.initial_state()), vm.value(model.initial_state()))
+            del model
+
+def main():
+    unittest.main()
+
+if __name__ == "__main__":
+    main()
+  
+
+# eof
@@ -0,0 +1,385 @@
+'''
+  Fast input/output of state machines (cf. statemachine.py).
+
+  read_compiled_state_machine() reads the same text format as read_state_machine():
+    initial_state
+    origin action (successor, probability, reward) (successor, probability, reward) ...
+  but builds a compiled MDP (cf. compiled.py) directly:
+  the file is read in chunks (it is never entirely in memory),
+  the names of the states and actions are interned as they are read,
+  and the transitions are stored in typed arrays instead of SMTransition objects.
+  Large files can be split in segments that are parsed in parallel.
+
+  Compiled MDPs can also be saved in a binary format (write_compiled_mdp) 
+  and opened again without any parsing (load_compiled_mdp).  
+  The file contains:
+  * a prefix: the magic bytes CMDP, the version of the format, the length of the header (little endian);
+  * a header in JSON: the sizes of the model, the initial state, user metadata, 
+    and the position, type and length of each array;
+  * the raw arrays (each aligned on 64 bytes): the arrays of the compiled MDP, 
+    and the names of the states and actions (UTF-8 bytes, with offsets).
+  The arrays are opened with numpy.memmap: opening a model is almost instantaneous, 
+  only the parts that are used are read, and processes that open the same file share the memory pages.
+  The states (SMStates named after the name table) are only created when they are accessed.
+'''
+import json
+import os
+import struct
+from array import array
+from collections.abc import Sequence
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy
+
+from MDP import Action, MDP, State
+from compiled import CompiledMDP, LazyList, compile_mdp
+from statemachine import SMAction, SMMDP, SMState
+
+CHUNK_SIZE = 1 << 22 # bytes read at once
+
+def parse_segment(file: str, start: int, end: int, chunk_size: int = CHUNK_SIZE) -> Dict[str,Any]:
+    '''
+      Parses the transitions of the specified part of the file (from byte start to byte end,
+      both at the beginning of a line).
+      Names are numbered locally, in the order in which they appear.
+      Returns a dictionary with the names of the states and actions,
+      and for each line (= row) the origin, the action and the number of outcomes,
+      and for each outcome the successor, the probability and the reward.
+    '''
+    state_ids: Dict[str,int] = {}
+    state_names: List[str] = []
+    action_ids: Dict[str,int] = {}
+    action_names: List[str] = []
+    origins = array('i')
+    actions = array('i')
+    lengths = array('i')
+    successors = array('i')
+    probs = array('d')
+    rewards = array('d')
+
+    def parse(lines: str) -> None:
+        for line in lines.splitlines():
+            parts = line.split(None, 2)
+            if len(parts) < 2:
+                continue # empty line
+            orig = state_ids.get(parts[0])
+            if orig is None:
+                orig = state_ids[parts[0]] = len(state_names)
+                state_names.append(parts[0])
+            act = action_ids.get(parts[1])
+            if act is None:
+                act = action_ids[parts[1]] = len(action_names)
+                action_names.append(parts[1])
+            fields = parts[2].replace('(', ' ').replace(')', ' ').replace(',', ' ').split() if len(parts) == 3 else []
+            nb = len(fields) // 3
+            for name in fields[0:3*nb:3]:
+                succ = state_ids.get(name)
+                if succ is None:
+                    succ = state_ids[name] = len(state_names)
+                    state_names.append(name)
+                successors.append(succ)
+            probs.extend(map(float, fields[1:3*nb:3]))
+            rewards.extend(map(float, fields[2:3*nb:3]))
+            origins.append(orig)
+            actions.append(act)
+            lengths.append(nb)
+
+    with open(file, 'rb') as input:
+        input.seek(start)
+        remaining = end - start
+        tail = b''
+        while remaining > 0:
+            data = input.read(min(chunk_size, remaining))
+            if not data:
+                break
+            remaining -= len(data)
+            data = tail + data
+            cut = data.rfind(b'\n') + 1 if remaining > 0 else len(data)
+            tail = data[cut:]
+            parse(data[:cut].decode())
+        if tail:
+            parse(tail.decode())
+
+    return {
+        'states': state_names,
+        'actions': action_names,
+        'origins': numpy.frombuffer(origins, dtype=numpy.int32),
+        'action_ids': numpy.frombuffer(actions, dtype=numpy.int32),
+        'lengths': numpy.frombuffer(lengths, dtype=numpy.int32),
+        'successors': numpy.frombuffer(successors, dtype=numpy.int32),
+        'probs': numpy.frombuffer(probs, dtype=numpy.float64),
+        'rewards': numpy.frombuffer(rewards, dtype=numpy.float64),
+    }
+
+def _parse_segment(args: Tuple[str,int,int,int]) -> Dict[str,Any]:
+    return parse_segment(*args)
+
+def file_segments(file: str, start: int, nb_segments: int) -> List[Tuple[int,int]]:
+    '''
+      Splits the file (from byte start) into segments of similar sizes that begin at the beginning of a line.
+    '''
+    size = os.path.getsize(file)
+    bounds = [ start ]
+    with open(file, 'rb') as input:
+        for k in range(1, nb_segments):
+            position = start + (size - start) * k // nb_segments
+            if position <= bounds[-1]:
+                continue
+            input.seek(position - 1)
+            input.readline() # goes to the beginning of the next line
+            position = input.tell()
+            if position < size and position > bounds[-1]:
+                bounds.append(position)
+    bounds.append(size)
+    return [ (bounds[k], bounds[k+1]) for k in range(len(bounds) - 1) ]
+
+def read_compiled_state_machine(file: str, processes: Optional[int] = None, chunk_size: int = CHUNK_SIZE) -> CompiledMDP:
+    '''
+      Reads a state machine file (cf. read_state_machine) into a compiled MDP,
+      whose states and actions are SMStates and SMActions.
+      The states and actions are numbered in the order in which they appear in the file,
+      and the result is the same as compile_mdp(read_state_machine(file)).
+      If the same pair origin/action appears several times, the last line wins.
+      If processes is specified, the file is split in as many segments, parsed in parallel.
+    '''
+    with open(file, 'rb') as input:
+        initial_name = input.readline().decode().strip()
+        start = input.tell()
+
+    if processes is not None and processes > 1:
+        import multiprocessing
+        segments = [ (file, begin, end, chunk_size) for begin, end in file_segments(file, start, processes) ]
+        with multiprocessing.Pool(processes) as pool:
+            parsed = pool.map(_parse_segment, segments)
+    else:
+        parsed = [ parse_segment(file, start, os.path.getsize(file), chunk_size) ]
+
+    # merges the segments: the local numbers are translated into global numbers (in the order of appearance)
+    state_ids: Dict[str,int] = {}
+    action_ids: Dict[str,int] = {}
+    def intern(ids: Dict[str,int], names: List[str]) -> numpy.ndarray:
+        result = numpy.empty(len(names), dtype=numpy.int32)
+        for i, name in enumerate(names):
+            k = ids.get(name)
+            if k is None:
+                k = ids[name] = len(ids)
+            result[i] = k
+        return result
+    origins, acts, lengths, successors = [], [], [], []
+    for segment in parsed:
+        state_map = intern(state_ids, segment['states'])
+        action_map = intern(action_ids, segment['actions'])
+        origins.append(state_map[segment['origins']])
+        acts.append(action_map[segment['action_ids']])
+        lengths.append(segment['lengths'])
+        successors.append(state_map[segment['successors']])
+    initial = intern(state_ids, [ initial_name ])[0]
+    origins = numpy.concatenate(origins)
+    acts = numpy.concatenate(acts)
+    lengths = numpy.concatenate(lengths).astype(numpy.int64)
+    successors = numpy.concatenate(successors)
+    probs = numpy.concatenate([ segment['probs'] for segment in parsed ])
+    rewards = numpy.concatenate([ segment['rewards'] for segment in parsed ])
+    nb_states = len(state_ids)
+    nb_actions = len(action_ids)
+
+    # groups the rows by origin;
+    # as in SMMDP, the actions of a state are in the order of their first line, with the outcomes of their last line
+    keys = origins.astype(numpy.int64) * max(1, nb_actions) + acts
+    unique_keys, first = numpy.unique(keys, return_index=True)
+    _, last_reversed = numpy.unique(keys[::-1], return_index=True)
+    last = len(keys) - 1 - last_reversed
+    key_origins = unique_keys // max(1, nb_actions)
+    rows = last[numpy.lexsort((first, key_origins))]
+
+    line_ptr = numpy.zeros(len(lengths) + 1, dtype=numpy.int64)
+    numpy.cumsum(lengths, out=line_ptr[1:])
+    row_lengths = lengths[rows]
+    row_ptr = numpy.zeros(len(rows) + 1, dtype=numpy.int64)
+    numpy.cumsum(row_lengths, out=row_ptr[1:])
+    outcomes = numpy.repeat(line_ptr[rows] - row_ptr[:-1], row_lengths) + numpy.arange(row_ptr[-1], dtype=numpy.int64)
+    state_ptr = numpy.zeros(nb_states + 1, dtype=numpy.int64)
+    numpy.cumsum(numpy.bincount(origins[rows], minlength=nb_states), out=state_ptr[1:])
+
+    result = CompiledMDP(
+        [ SMState(name) for name in state_ids ],
+        [ SMAction(name) for name in action_ids ],
+        state_ptr=state_ptr,
+        action_ids=acts[rows].astype(numpy.int32),
+        row_ptr=row_ptr,
+        successors=successors[outcomes].astype(numpy.int32),
+        probs=probs[outcomes],
+        rewards=rewards[outcomes],
+        initial=int(initial))
+    return result
+
+''' Binary format. '''
+
+MAGIC = b'CMDP'
+VERSION = 1
+PREFIX = struct.Struct('<4sII') # magic, version, length of the header
+ALIGNMENT = 64
+
+def _aligned(position: int) -> int:
+    return (position + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+def _name_table(names: List[str]) -> Tuple[numpy.ndarray,numpy.ndarray]:
+    encoded = [ name.encode() for name in names ]
+    ptr = numpy.zeros(len(encoded) + 1, dtype=numpy.int64)
+    numpy.cumsum([ len(e) for e in encoded ], out=ptr[1:])
+    return ptr, numpy.frombuffer(b''.join(encoded), dtype=numpy.uint8)
+
+def write_compiled_mdp(model: CompiledMDP, file: str,
+      state_name: Callable[[State],str] = repr,
+      action_name: Callable[[Action],str] = repr,
+      metadata: Optional[Dict[str,Any]] = None) -> None:
+    '''
+      Writes the compiled MDP in the binary format.
+      The states and actions are stored as names, computed by the specified functions.
+      The metadata (any JSON value) is stored in the header (cf. read_header).
+    '''
+    state_ptr, state_bytes = _name_table([ state_name(s) for s in model.states_ ])
+    action_ptr, action_bytes = _name_table([ action_name(a) for a in model.actions_ ])
+    arrays = {
+        'state_ptr': model.state_ptr_.astype(numpy.int64),
+        'action_ids': model.action_ids_.astype(numpy.int32),
+        'row_ptr': model.row_ptr_.astype(numpy.int64),
+        'successors': model.successors_.astype(numpy.int32),
+        'probs': model.probs_.astype(numpy.float64),
+        'rewards': model.rewards_.astype(numpy.float64),
+        'state_name_ptr': state_ptr,
+        'state_names': state_bytes,
+        'action_name_ptr': action_ptr,
+        'action_names': action_bytes,
+    }
+    specs = {}
+    position = 0
+    for name, values in arrays.items():
+        specs[name] = { 'dtype': values.dtype.str, 'offset': position, 'length': len(values) }
+        position = _aligned(position + values.nbytes)
+    header = json.dumps({
+        'nb_states': model.nb_states(),
+        'nb_actions': len(model.actions_),
+        'nb_rows': model.nb_rows(),
+        'nb_outcomes': len(model.successors_),
+        'initial': int(model.initial_),
+        'metadata': metadata,
+        'arrays': specs,
+    }).encode()
+    data_start = _aligned(PREFIX.size + len(header))
+    with open(file, 'wb') as output:
+        output.write(PREFIX.pack(MAGIC, VERSION, len(header)))
+        output.write(header)
+        for name, values in arrays.items():
+            output.write(b'\0' * (data_start + specs[name]['offset'] - output.tell()))
+            output.write(values.tobytes())
+
+def read_header(file: str) -> Dict[str,Any]:
+    '''
+      The header of a binary model (sizes, initial state, metadata, arrays), 
+      plus the position of the arrays in the file (data_start).
+    '''
+    with open(file, 'rb') as input:
+        prefix = input.read(PREFIX.size)
+        if len(prefix) < PREFIX.size:
+            raise ValueError(f'{file} is not a compiled MDP')
+        magic, version, length = PREFIX.unpack(prefix)
+        if magic != MAGIC:
+            raise ValueError(f'{file} is not a compiled MDP')
+        if version != VERSION:
+            raise ValueError(f'{file}: unsupported version {version} (expected {VERSION})')
+        header = json.loads(input.read(length).decode())
+    header['data_start'] = _aligned(PREFIX.size + length)
+    return header
+
+class NameTable(Sequence):
+    '''
+      The names stored in a binary model, decoded when they are accessed.
+    '''
+    def __init__(self, ptr: numpy.ndarray, data: numpy.ndarray):
+        self._ptr = ptr
+        self._data = data
+
+    def __len__(self) -> int:
+        return len(self._ptr) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [ self[k] for k in range(*i.indices(len(self))) ]
+        return self._data[self._ptr[i]:self._ptr[i+1]].tobytes().decode()
+
+def load_compiled_mdp(file: str, mmap: bool = True,
+      state_factory: Optional[Callable[[str],State]] = None,
+      action_factory: Optional[Callable[[str],Action]] = None) -> CompiledMDP:
+    '''
+      Opens a compiled MDP written by write_compiled_mdp.
+      The arrays are memory mapped (read only) unless mmap is False, in which case they are read in memory.
+      By default, the states and actions are SMStates and SMActions named after the stored names;
+      other objects can be created from the names with the factories.
+      Either way, the objects are only created when they are accessed.
+    '''
+    header = read_header(file)
+    def load(name: str) -> numpy.ndarray:
+        spec = header['arrays'][name]
+        offset = header['data_start'] + spec['offset']
+        if spec['length'] == 0:
+            return numpy.zeros(0, dtype=spec['dtype'])
+        if mmap:
+            return numpy.memmap(file, dtype=spec['dtype'], mode='r', offset=offset, shape=(spec['length'],))
+        return numpy.fromfile(file, dtype=spec['dtype'], count=spec['length'], offset=offset)
+
+    state_names = NameTable(load('state_name_ptr'), load('state_names'))
+    action_names = NameTable(load('action_name_ptr'), load('action_names'))
+    state_factory = SMState if state_factory is None else state_factory
+    action_factory = SMAction if action_factory is None else action_factory
+    return CompiledMDP(
+        LazyList(len(state_names), lambda i: state_factory(state_names[i])),
+        LazyList(len(action_names), lambda i: action_factory(action_names[i])),
+        state_ptr=load('state_ptr'),
+        action_ids=load('action_ids'),
+        row_ptr=load('row_ptr'),
+        successors=load('successors'),
+        probs=load('probs'),
+        rewards=load('rewards'),
+        initial=header['initial'])
+
+''' Writers for the different kinds of models. '''
+
+def write_smmdp(mdp: SMMDP, file: str) -> None:
+    '''
+      Writes a state machine in the binary format; the states and actions keep their names.
+    '''
+    write_compiled_mdp(mdp.compile(), file, state_name=SMState.name, action_name=SMAction.name,
+        metadata={ 'kind': 'smmdp' })
+
+def convert_state_machine(text_file: str, file: str, processes: Optional[int] = None) -> None:
+    '''
+      Converts a state machine file (the text format of read_state_machine) into the binary format.
+    '''
+    write_compiled_mdp(read_compiled_state_machine(text_file, processes), file,
+        state_name=SMState.name, action_name=SMAction.name, metadata={ 'kind': 'smmdp' })
+
+def write_dungeon_mdp(mdp: MDP, file: str, metadata: Optional[Dict[str,Any]] = None) -> None:
+    '''
+      Writes a dungeon MDP in the binary format.
+      States and actions are named by dungeon_state_key and dungeon_action_key, 
+      so that they can be rebuilt by load_dungeon_mdp.
+    '''
+    from dungeon import dungeon_action_key, dungeon_state_key
+    model = mdp.compile()
+    if model is None:
+        model = compile_mdp(mdp)
+    write_compiled_mdp(model, file, state_name=dungeon_state_key, action_name=dungeon_action_key,
+        metadata=dict({ 'kind': 'dungeon' }, **(metadata or {})))
+
+def load_dungeon_mdp(file: str, map, mmap: bool = True) -> CompiledMDP:
+    '''
+      Opens a dungeon MDP written by write_dungeon_mdp;
+      its states and actions are the DungeonStates and DungeonActions of the specified map.
+    '''
+    from dungeon import dungeon_action_from_key, dungeon_state_from_key
+    return load_compiled_mdp(file, mmap,
+        state_factory=lambda key: dungeon_state_from_key(key, map),
+        action_factory=lambda key: dungeon_action_from_key(key, map))
+
+# eof
@@ -0,0 +1,59 @@
+import unittest
+
+class Test(unittest.TestCase):
+
+    def test(self):
+        from dungeon import basic_map, DungeonMDP
+        from instrumentation import SolverStats
+        from statemachine import state_machine_from_mdp
+
+        # next_states is called once per pair state/action
+        stats = SolverStats()
+        smmdp, _, _ = state_machine_from_mdp(stats.wrap(DungeonMDP(basic_map())))
+        nb_pairs = sum([ len(smmdp.applicable_actions(s)) for s in smmdp.states() ])
+        self.assertEqual(stats.nb_next_states_, nb_pairs)
+
+    def test_export(self):
+        from algos import simulate, value_iteration
+        from dungeon import basic_map, DungeonAction, DungeonMDP
+        from instrumentation import SolverStats
+        from statemachine import export_mdp, state_machine_from_mdp, TranslatedPolicy
+
+        mdp = DungeonMDP(basic_map())
+        stats = SolverStats()
+        model, states, actions = export_mdp(stats.wrap(mdp))
+        self.assertEqual(stats.nb_next_states_, model.nb_rows())
+        self.assertEqual(model.nb_states(), 848)
+        # the states are only created when they are accessed
+        self.assertEqual(model.states_._elements.count(None), 848)
+        s0 = model.initial_state()
+        self.assertEqual(s0.name(), 'state_0')
+        self.assertIs(states[s0], mdp.initial_state())
+        self.assertIs(states.inverse()[mdp.initial_state()], s0)
+        self.assertEqual(model.states_._elements.count(None), 847)
+
+        # the translations behave like the dictionaries of state_machine_from_mdp
+        smmdp, _, _ = state_machine_from_mdp(mdp)
+        with self.assertRaises(KeyError):
+            states[smmdp.initial_state()]
+        self.assertEqual(len(states), 848)
+        for a in model.actions():
+            self.assertIsInstance(actions[a], DungeonAction)
+
+        # a policy of the exported MDP can be used on the original MDP
+        pol, v = value_iteration(model, .9, .01)
+        _, v2 = value_iteration(smmdp, .9, .01)
+        self.assertAlmostEqual(v.value(s0), v2.value(smmdp.initial_state()))
+        translated = TranslatedPolicy(pol, states.inverse(), actions)
+        for s in mdp.states():
+            self.assertIn(translated.action(s), mdp.applicable_actions(s))
+        self.assertEqual(simulate(mdp, translated, 10).length(), 10)
+
+def main():
+    unittest.main()
+
+if __name__ == "__main__":
+    main()
+  
+
+# eof
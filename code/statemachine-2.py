@@ -0,0 +1,48 @@
+import unittest
+
+class Test(unittest.TestCase):
+
+    def test_smmdp(self):
+        from example2 import Example2
+        from statemachine import state_machine_from_mdp
+        mdp, _, _ = state_machine_from_mdp(Example2())
+        self.assertEqual(list(mdp.states_view()), mdp.states())
+        self.assertIs(mdp.states_view(), mdp.states_view())
+        for s in mdp.states_view():
+            actions = mdp.applicable_actions_view(s)
+            self.assertEqual(list(actions), mdp.applicable_actions(s))
+            self.assertIs(actions, mdp.applicable_actions_view(s)) # no copy
+            self.assertIsInstance(actions, tuple)
+            for a in actions:
+                outcomes = mdp.next_states_view(s, a)
+                self.assertEqual(list(outcomes), mdp.next_states(s, a))
+                self.assertIs(outcomes, mdp.next_states_view(s, a))
+                # the copies can be modified without changing the MDP
+                mdp.next_states(s, a).clear()
+                self.assertEqual(len(mdp.next_states_view(s, a)), len(outcomes))
+
+    def test_dungeon(self):
+        from dungeon import basic_map, DungeonMDP
+        from modelling import add_cost_to_actions, forbid_actions_in_states, q0_action_condition, \
+            q2_action_condition1, q2_state_condition1
+        mdp = DungeonMDP(basic_map())
+        s = mdp.initial_state()
+        self.assertIs(mdp.applicable_actions_view(s), mdp.applicable_actions_view(s))
+        self.assertEqual(list(mdp.applicable_actions_view(s)), mdp.applicable_actions(s))
+
+        costly = add_cost_to_actions(mdp, q0_action_condition, 1)
+        self.assertIs(costly.applicable_actions_view(s), mdp.applicable_actions_view(s))
+        forbidden = forbid_actions_in_states(mdp, q2_action_condition1, q2_state_condition1)
+        for s in mdp.states_view():
+            self.assertEqual(list(forbidden.applicable_actions_view(s)), forbidden.applicable_actions(s))
+            for a in mdp.applicable_actions_view(s):
+                self.assertEqual(list(costly.next_states_view(s, a)), costly.next_states(s, a))
+
+def main():
+    unittest.main()
+
+if __name__ == "__main__":
+    main()
+  
+
+# eof
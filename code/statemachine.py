@@ -1,5 +1,6 @@
+from collections.abc import Mapping, Sequence
 from dataclasses import dataclass
-from typing import Dict, List, Tuple
+from typing import Callable, Dict, List, Optional, Set, Tuple
 
 from MDP import Action, ActionOutcome, MDP, Policy, State
 
@@ -51,7 +52,11 @@ class SMMDP(MDP):
       initial_state: str):
         self._states: Dict[str, SMState] = {}
         self._actions: Dict[str, SMAction] = {}
-        self._transitions: Dict[SMState, Dict[SMAction, List[ActionOutcome]]] = {}
+        self._transitions: Dict[SMState, Dict[SMAction, Tuple[ActionOutcome,...]]] = {}
+        self._states_view: Optional[Tuple[SMState,...]] = None # cf. states_view
+        self._applicable_actions_views: Dict[SMState, Tuple[SMAction,...]] = {}
+        self._dirty: Set[SMState] = set() # cf. dirty_states
+        self._predecessors: Optional[Dict[SMState, Dict[SMState,int]]] = None # lazy computation
 
         # Now populate the MDP
         trans: SMTransition = None
@@ -62,9 +67,10 @@ class SMMDP(MDP):
             for succname, prob, rew in trans.prob_distribution:
                 succ: SMState = self.get_state(succname)
                 outcomes.append( ActionOutcome(prob=prob, state=succ, reward=rew) )
-            self._transitions[origin][action] = outcomes
+            self._transitions[origin][action] = tuple(outcomes)
 
         self._initial_state: SMState = self.get_state(initial_state)
+        self._compiled = None # lazy computation
     
     def get_state(self, sname: str) -> SMState:
         '''
@@ -74,6 +80,8 @@ class SMMDP(MDP):
             s = SMState(sname)
             self._states[sname] = s
             self._transitions[s] = {}
+            self._states_view = None
+            self._compiled = None # the compiled MDP lists all the states
         return self._states[sname]
     
     def get_action(self, aname: str) -> SMAction:
@@ -95,11 +103,113 @@ class SMMDP(MDP):
         return [ a for (a,_) in self._transitions[s].items()]
 
     def next_states(self, s: State, a: Action) -> List[ActionOutcome]: # Making a copy to avoid wrong doings
-        return self._transitions[s][a].copy()
+        return list(self._transitions[s][a])
+
+    def states_view(self) -> Sequence[State]:
+        if self._states_view is None:
+            self._states_view = tuple(self._states.values())
+        return self._states_view
+
+    def applicable_actions_view(self, s: State) -> Sequence[Action]:
+        result = self._applicable_actions_views.get(s)
+        if result is None:
+            result = tuple(self._transitions[s])
+            self._applicable_actions_views[s] = result
+        return result
+
+    def next_states_view(self, s: State, a: Action) -> Sequence[ActionOutcome]:
+        return self._transitions[s][a]
     
     def initial_state(self) -> State:
         return self._initial_state
 
+    def compile(self) -> MDP:
+        '''
+        Returns the compiled version of this MDP (cf. compiled.py), computed once.
+        '''
+        if self._compiled is None:
+            from compiled import compile_mdp
+            self._compiled = compile_mdp(self)
+        return self._compiled
+
+    ''' 
+      Edits of the MDP. 
+      The states whose transitions change are marked dirty, 
+      so that a solution of the previous MDP can be repaired from them (cf. algos.resolve)
+      instead of solving the MDP again.
+    '''
+
+    def set_transition(self, trans: SMTransition) -> None:
+        '''
+        Adds the transition, or replaces the outcomes of the action in the state if it was already applicable.
+        '''
+        origin: SMState = self.get_state(trans.origin)
+        action: SMAction = self.get_action(trans.action)
+        outcomes = tuple([ ActionOutcome(prob=prob, state=self.get_state(succname), reward=rew)
+            for succname, prob, rew in trans.prob_distribution ])
+        self._set_outcomes(origin, action, outcomes)
+
+    def remove_transition(self, origin: str, action: str) -> None:
+        '''
+        Makes the action inapplicable in the state (KeyError if it was not applicable).
+        '''
+        self._set_outcomes(self._states[origin], self._actions[action], None)
+
+    def set_reward(self, origin: str, action: str, successor: str, reward: float) -> None:
+        '''
+        Changes the reward of the outcomes of the action that lead to the successor (KeyError if there is none).
+        '''
+        s = self._states[origin]
+        a = self._actions[action]
+        succ = self._states[successor]
+        if not any([ outcome.state is succ for outcome in self._transitions[s][a] ]):
+            raise KeyError((origin, action, successor))
+        self._set_outcomes(s, a, tuple([ ActionOutcome(prob=outcome.prob, state=outcome.state, 
+                reward=reward if outcome.state is succ else outcome.reward) 
+            for outcome in self._transitions[s][a] ]))
+
+    def _set_outcomes(self, s: SMState, a: SMAction, outcomes: Optional[Tuple[ActionOutcome,...]]) -> None:
+        previous = self._transitions[s].get(a, ())
+        if outcomes is None:
+            del self._transitions[s][a] # KeyError if the action was not applicable
+        else:
+            self._transitions[s][a] = outcomes
+        if self._predecessors is not None:
+            for outcome in previous:
+                counts = self._predecessors[outcome.state]
+                counts[s] -= 1
+                if counts[s] == 0:
+                    del counts[s]
+            for outcome in (outcomes or ()):
+                counts = self._predecessors.setdefault(outcome.state, {})
+                counts[s] = counts.get(s, 0) + 1
+        self._applicable_actions_views.pop(s, None)
+        self._compiled = None
+        self._dirty.add(s)
+
+    def dirty_states(self) -> Set[SMState]:
+        '''
+        The states whose transitions changed since the last call to clear_dirty.
+        '''
+        return set(self._dirty)
+
+    def clear_dirty(self) -> None:
+        self._dirty.clear()
+
+    def predecessors(self, s: State) -> List[State]:
+        '''
+        The states from which s can be reached in one step (with any action).
+        The predecessor index is computed on the first call, and then maintained by the edits.
+        '''
+        if self._predecessors is None:
+            self._predecessors = {}
+            for origin, transitions in self._transitions.items():
+                for outcomes in transitions.values():
+                    for outcome in outcomes:
+                        counts = self._predecessors.setdefault(outcome.state, {})
+                        counts[origin] = counts.get(origin, 0) + 1
+        return list(self._predecessors.get(s, ()))
+
     def print(self) -> None:
         print(f'{self.initial_state()}')
         for state in self.states():
@@ -169,18 +279,20 @@ def state_machine_from_mdp(mdp: MDP) -> Tuple[SMMDP,Dict[SMState,State],Dict[SMA
     while open:
         state = open.pop()
         str_state = get_state(state)
-        for act in mdp.applicable_actions(state):
+        for act in mdp.applicable_actions_view(state):
             str_act = get_action(act)
 
+            outcomes = mdp.next_states_view(state,act) # computed once per pair
+
             # copy the successors in open/known
-            for outcome in mdp.next_states(state,act):
+            for outcome in outcomes:
                 if not outcome.state in known:
                     open.add(outcome.state)
                     known.add(outcome.state)
             
             trans = SMTransition( str_state, str_act,
                 [ (get_state(outcome.state),outcome.prob,outcome.reward) 
-                  for outcome in mdp.next_states(state,act)]
+                  for outcome in outcomes]
             )
             transitions.append(trans)
 
@@ -191,6 +303,108 @@ def state_machine_from_mdp(mdp: MDP) -> Tuple[SMMDP,Dict[SMState,State],Dict[SMA
         { smmdp.get_action(str_act):act for act,str_act in action_to_str.items() }
     )
     
+class IndexedState(SMState):
+    '''
+      A state of an exported MDP (cf. export_mdp), identified by its index.
+      Its name (state_<index>, as in state_machine_from_mdp) is only built when it is needed.
+    '''
+    def __init__(self, index: int):
+        self.index_ = index
+
+    def __repr__(self) -> str:
+        return self.name()
+
+    def name(self) -> str:
+        return f'state_{self.index_}'
+
+class IndexedAction(SMAction):
+    '''
+      An action of an exported MDP (cf. export_mdp), identified by its index.
+    '''
+    def __init__(self, index: int):
+        self.index_ = index
+
+    def __repr__(self) -> str:
+        return self.name()
+
+    def name(self) -> str:
+        return f'act_{self.index_}'
+
+class ExportTranslation(Mapping):
+    '''
+      Translates the states (or the actions) of an exported MDP into the original ones, 
+      like the dictionaries returned by state_machine_from_mdp, 
+      but without building any dictionary: the index of the exported object is the index of the original.
+      inverse() returns the translation in the other direction.
+    '''
+    def __init__(self, exported: Sequence, originals: Sequence, original_indices: Callable[[],Dict]):
+        self._exported = exported
+        self._originals = originals
+        self._original_indices = original_indices
+
+    def __getitem__(self, key):
+        index = getattr(key, 'index_', None)
+        if index is None or not 0 <= index < len(self._exported) or not self._exported[index] is key:
+            raise KeyError(key)
+        return self._originals[index]
+
+    def __len__(self) -> int:
+        return len(self._exported)
+
+    def __iter__(self):
+        return iter(self._exported)
+
+    def inverse(self) -> Mapping:
+        return InverseExportTranslation(self)
+
+class InverseExportTranslation(Mapping):
+    '''
+      Translates the original states (or actions) into the ones of the exported MDP.
+    '''
+    def __init__(self, translation: ExportTranslation):
+        self._translation = translation
+
+    def __getitem__(self, key):
+        return self._translation._exported[self._translation._original_indices()[key]]
+
+    def __len__(self) -> int:
+        return len(self._translation)
+
+    def __iter__(self):
+        return iter(self._translation._originals)
+
+def export_mdp(mdp: MDP, processes: Optional[int] = None) -> Tuple[MDP,ExportTranslation,ExportTranslation]:
+    '''
+      Computes a compiled MDP (cf. compiled.py) that is equivalent to the specified MDP, 
+      as state_machine_from_mdp does, but in one pass: 
+      the states and actions are numbered while the MDP is explored (cf. explore.py), 
+      each pair state/action is queried once, and the transitions are stored directly in arrays.
+      The states and actions of the result are IndexedStates and IndexedActions, 
+      created only when they are accessed.
+      Alongside the compiled MDP, the method returns the translations 
+      from its states and actions into the states and actions of the original MDP
+      (e.g., TranslatedPolicy(pol, states.inverse(), actions) uses on the original MDP 
+      a policy pol computed on the compiled MDP).
+    '''
+    from compiled import CompiledMDP, LazyList
+    from explore import explore_compiled
+    original = explore_compiled(mdp, processes)
+    result = CompiledMDP(
+        LazyList(original.nb_states(), IndexedState),
+        LazyList(len(original.actions_), IndexedAction),
+        state_ptr=original.state_ptr_,
+        action_ids=original.action_ids_,
+        row_ptr=original.row_ptr_,
+        successors=original.successors_,
+        probs=original.probs_,
+        rewards=original.rewards_,
+        initial=original.initial_)
+    return (
+        result,
+        ExportTranslation(result.states_, original.states_, original.state_indices),
+        ExportTranslation(result.actions_, original.actions_, original.action_indices),
+    )
+
 class TranslatedPolicy(Policy):
     '''
       Given two equivalent MDPs m1 and m2, 
@@ -1,11 +1,17 @@
 from typing import Set, List, Tuple, Optional
+import algos
 from algos import StateValueFunction, ActionValueFunction, one_step_lookahead, greedy_action, compute_q_from_v, \
     greedy_policy, value_iteration, state_value_difference
 from MDP import State, MDP, Policy, ExplicitPolicy
 from connectedcomp import CCGraph
+from instrumentation import SolverStats
 
 
-def topological_vi(mdp: MDP, gamma: float, epsilon: float, graph: CCGraph) -> StateValueFunction:
+def topological_vi(mdp: MDP, gamma: float, epsilon: float, graph: CCGraph,
+                   stats: Optional[SolverStats] = None) -> StateValueFunction:
+    if stats is not None:
+        mdp = stats.wrap(mdp)
+        stats.start()
     # print(mdp.states())
     # print(mdp.actions())
     # print(graph.print())
@@ -33,7 +39,7 @@ def topological_vi(mdp: MDP, gamma: float, epsilon: float, graph: CCGraph) -> St
         for each in innerCCs:
             statesList.append(each)
         # print(innerCCs)
-        pol, v = value_iteration_states(mdp, gamma, epsilon, statesList, v)
+        pol, v = value_iteration_states(mdp, gamma, epsilon, statesList, v, stats)
         # for s in mdp.states():
             # print("v.value(s): ",s,": ", v.value(s))
             # print("answer: ",s,": ", vC.value(s))
@@ -63,26 +69,24 @@ def greedy_policy_states(mdp: MDP, q: ActionValueFunction, states: List[State])
     return result_pol, result_val
 
 
-NB_BACKUPS = 0
-
-
 def bellman_backup_states(mdp: MDP, v: StateValueFunction, gamma: float, states: List[State]) -> Tuple[
     Policy, StateValueFunction]:
 
-    global NB_BACKUPS
     q = compute_q_from_v_states(mdp, v, gamma, states)
-    NB_BACKUPS += 1
+    algos.NB_BACKUPS += 1
     return greedy_policy_states(mdp, q, states)
 
 
 def value_iteration_states(mdp: MDP, gamma: float, epsilon: float, states: List[State],
-                           starting_value: StateValueFunction) -> Tuple[
+                           starting_value: StateValueFunction, stats: Optional[SolverStats] = None) -> Tuple[
     Policy, StateValueFunction]:
 
     vs = starting_value
     while True:
         pol, newvs = bellman_backup_states(mdp, vs, gamma, states)
         diff = state_value_difference(mdp, vs, newvs)
+        if stats is not None:
+            stats.record_iteration('topological_vi', diff, newvs)
         if diff < epsilon:
             return pol, newvs
         vs = newvs